@@ -54,13 +54,18 @@ def create_constants_module(parser, extension=False):
     
     lines.append('\n')
     
-    # For extensions, we only take the OES ones, and remove the OES
+    # For extensions, we only take the OES ones, and remove the OES. The
+    # S3TC formats (EXT_texture_compression_s3tc) are included as well,
+    # since they are the common compressed formats on the desktop.
     if extension:
         constantDefs = []
         for c in parser.constantDefs:
             if 'OES' in c.cname:
                 c.cname = c.cname.replace('OES', '').replace('__', '_').strip('_')
                 constantDefs.append(c)
+            elif c.cname.endswith('S3TC_DXT1_EXT'):
+                c.cname = c.cname[:-len('_EXT')]
+                constantDefs.append(c)
     else:
         constantDefs = parser.constantDefs
     
@@ -141,13 +146,144 @@ def create_gl_module(parser, extension=False):
     print('wrote %s' % fname)
 
 
+def create_record_module(parser, extension=False):
+    
+    # Initialize
+    lines = []
+    doc = 'OpenGL ES 2.0 API that records the calls instead of drawing.'
+    lines.append(PREAMBLE % doc)
+    
+    # Import constants and ext
+    if extension:
+        lines.append('from vispy.gl._constants_ext import *')
+        lines.append('from vispy.gl import recorder as _recorder')
+    else:
+        lines.append('from vispy.gl._constants import *')
+        lines.append('from vispy.gl import _record_ext as ext')
+        lines.append('from vispy.gl import recorder as _recorder')
+    
+    lines.append('\n')
+    
+    # For extensions, we only take the OES ones, and remove the OES
+    if extension:
+        functionDefs = []
+        for f in parser.functionDefs:
+            if 'OES' in f.cname:
+                f.cname = f.cname.replace('OES', '')
+                functionDefs.append(f)
+    else:
+        functionDefs = parser.functionDefs
+    
+    # Insert functions; all of them, since these do not depend on PyOpenGL.
+    # The "super-functions" are added if PyOpenGL has them, so that the
+    # namespace is the same as that of the gl target.
+    lines.append('_glfunctions = [')
+    for f in sorted(functionDefs, key=lambda x:x.cname):
+        if isinstance(f.group, list):
+            if hasattr(GL, f.keyname):
+                lines.append('    "%s",' % f.keyname)
+        lines.append('    "%s",' % f.cname)
+    lines.append('    ]')
+    
+    # A bit of space
+    lines.append('')
+    lines.append('')
+    
+    # Create the functions
+    lines.append('_recorder.create_functions(globals(), _glfunctions)')
+    lines.append('')
+    
+    # Write the file
+    fname = '_record_ext.py' if extension else '_record.py'
+    with open(os.path.join(GLDIR, fname), 'w') as f:
+        f.write('\n'.join(lines))
+    print('wrote %s' % fname)
+
+
+def _c_type(arg):
+    """ Get the C type of an argument as a string, e.g. "GLfloat*".
+    """
+    if arg.ctype == 'const*':
+        return 'GLchar**'  # glShaderSource: const GLchar* const* string
+    ctype = arg.ctype + '*' * arg.isptr
+    return ctype.replace('GLvoid*', 'void*')
+
+
+def create_ctypes_module(parser, extension=False):
+    
+    # Initialize
+    lines = []
+    doc = 'OpenGL ES 2.0 API that calls the OpenGL library via ctypes.'
+    lines.append(PREAMBLE % doc)
+    
+    # Import constants and ext
+    if extension:
+        lines.append('from vispy.gl._constants_ext import *')
+        lines.append('from vispy.gl import ctypeshelper as _ctypeshelper')
+    else:
+        lines.append('from vispy.gl._constants import *')
+        lines.append('from vispy.gl import _gl_ctypes_ext as ext')
+        lines.append('from vispy.gl import ctypeshelper as _ctypeshelper')
+    
+    lines.append('\n')
+    
+    # For extensions, we only take the OES ones, and remove the OES
+    if extension:
+        functionDefs = []
+        for f in parser.functionDefs:
+            if 'OES' in f.cname:
+                f.cname = f.cname.replace('OES', '')
+                functionDefs.append(f)
+    else:
+        functionDefs = parser.functionDefs
+    
+    # Insert the signatures: (name, restype, argtypes). The group
+    # "super-functions" are added if PyOpenGL has them, so that the
+    # namespace is the same as that of the gl target.
+    groups = []
+    lines.append('_glsignatures = [')
+    for f in sorted(functionDefs, key=lambda x:x.cname):
+        if isinstance(f.group, list) and hasattr(GL, f.keyname):
+            groups.append((f.keyname, [f2.cname for f2 in f.group]))
+        restype = _c_type(f.args[0])
+        argtypes = ''.join('%r, ' % _c_type(arg) for arg in f.args[1:])
+        lines.append('    (%r, %r, (%s)),' % (f.cname, restype, argtypes))
+    lines.append('    ]')
+    lines.append('')
+    lines.append('_glgroups = {')
+    for keyname, names in groups:
+        lines.append('    %r: %r,' % (keyname, sorted(names)))
+    lines.append('    }')
+    
+    # A bit of space
+    lines.append('')
+    lines.append('')
+    
+    # Create the functions
+    lines.append('_ctypeshelper.create_functions(globals(), _glsignatures, '
+                 '_glgroups)')
+    lines.append('')
+    
+    # Write the file
+    fname = '_gl_ctypes_ext.py' if extension else '_gl_ctypes.py'
+    with open(os.path.join(GLDIR, fname), 'w') as f:
+        f.write('\n'.join(lines))
+    print('wrote %s' % fname)
+
+
 if __name__ == '__main__':
     # Create code  for normal ES 2.0
     parser = Parser(os.path.join(THISDIR, 'headers', 'gl2.h'))
     create_constants_module(parser)
     create_gl_module(parser)
+    create_record_module(parser)
+    create_ctypes_module(parser)
     
     # Create code for extensions
     parser = Parser(os.path.join(THISDIR, 'headers', 'gl2ext.h'))
     create_constants_module(parser, True)
     create_gl_module(parser, True)
+    parser = Parser(os.path.join(THISDIR, 'headers', 'gl2ext.h'))
+    create_record_module(parser, True)
+    parser = Parser(os.path.join(THISDIR, 'headers', 'gl2ext.h'))
+    create_ctypes_module(parser, True)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team All rights reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+"""
+Microbenchmark for the overhead per GL call of the 'ctypes' target of
+vispy.gl, compared with the 'gl' target (PyOpenGL). Does not need a GPU:
+the ctypes target calls a stub library in which each function does
+nothing (built with the C compiler, see build_stub_library), and PyOpenGL
+is called without a current context, for which the OpenGL library of a
+Linux system (libglvnd) dispatches to functions that do nothing. So the
+times are those of the Python side of each call.
+"""
+
+import os
+import timeit
+import tempfile
+import numpy as np
+
+from vispy import gl
+from vispy.gl import ctypeshelper
+
+N = 20000
+
+data = np.zeros(1024, np.float32)
+matrix = np.eye(4, dtype=np.float32)
+
+CALLS = [
+    ('glClear', lambda gl: gl.glClear(gl.GL_COLOR_BUFFER_BIT)),
+    ('glBindBuffer', lambda gl: gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)),
+    ('glUniform4f', lambda gl: gl.glUniform4f(0, 1.0, 0.0, 0.0, 1.0)),
+    ('glUniformMatrix4fv', lambda gl: gl.glUniformMatrix4fv(0, 1, False,
+                                                            matrix)),
+    ('glVertexAttribPointer', lambda gl: gl.glVertexAttribPointer(
+        0, 3, gl.GL_FLOAT, False, 12, 0)),
+    ('glBufferSubData', lambda gl: gl.glBufferSubData(
+        gl.GL_ARRAY_BUFFER, 0, data.nbytes, data)),
+    ('glDrawArrays', lambda gl: gl.glDrawArrays(gl.GL_TRIANGLES, 0, 3)),
+    ]
+
+
+def bench(label, func, number):
+    t = min(timeit.repeat(func, number=number, repeat=3)) / number
+    print("%-34s %8.2f us" % (label, t * 1e6))
+    return t
+
+
+if __name__ == '__main__':
+    # The ctypes target with the stub library
+    dirname = tempfile.mkdtemp()
+    ctypeshelper.load_library(ctypeshelper.build_stub_library(
+        os.path.join(dirname, 'glstub.so')))
+    from vispy.gl import _gl_ctypes
+    
+    # The PyOpenGL target, if available
+    try:
+        from vispy.gl import _gl
+    except Exception as err:
+        print('PyOpenGL target not available: %s' % err)
+        _gl = None
+    
+    print("Per call:")
+    for name, call in CALLS:
+        t_new = bench('  %s (ctypes)' % name, lambda: call(_gl_ctypes), N)
+        if _gl is None:
+            continue
+        try:
+            call(_gl)
+        except Exception:
+            # E.g. PyOpenGL stores the vertex attribute pointers per context
+            print('  %s (PyOpenGL) needs a context' % name)
+            continue
+        t_old = bench('  %s (PyOpenGL)' % name, lambda: call(_gl), N)
+        print("  -> %.1fx" % (t_old / t_new))
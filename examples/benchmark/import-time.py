@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team All rights reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+"""
+Benchmark for the time it takes to import vispy and its subpackages, each
+in a fresh Python process, and for the time of resolving the functions of
+vispy.gl on first use (which imports PyOpenGL for the 'gl' target).
+Reports whether each import pulls in PyOpenGL or a GUI toolkit, which it
+should not: processes that only prepare data do not need them. Does not
+need an OpenGL context.
+"""
+
+import os
+import sys
+import subprocess
+
+REPEAT = 5
+
+# Modules that should only be imported when drawing
+HEAVY = ('OpenGL', 'PyQt4', 'PyQt5', 'PySide', 'pyglet')
+
+IMPORTS = [
+    ('import vispy', 'import vispy'),
+    ('import vispy.gl', 'import vispy.gl'),
+    ('import vispy.oogl', 'import vispy.oogl'),
+    ('import vispy.app', 'import vispy.app'),
+    ('+ first GL function', 'import vispy.oogl; vispy.gl.glClear'),
+    ]
+
+SCRIPT = '''
+import sys, time
+t0 = time.time()
+%s
+t1 = time.time()
+heavy = sorted(set(m.split('.')[0] for m in sys.modules
+                   if m.split('.')[0] in %r))
+print('%%f %%s' %% (t1 - t0, ','.join(heavy) or '-'))
+'''
+
+VISPY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         '..', '..')
+
+
+def time_import(code):
+    """ Run the code in fresh processes. Returns the minimum time in
+    seconds and the heavy modules that it imported.
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([VISPY_DIR,
+                                         env.get('PYTHONPATH', '')])
+    times = []
+    for i in range(REPEAT):
+        out = subprocess.check_output([sys.executable, '-c',
+                                       SCRIPT % (code, HEAVY)], env=env)
+        t, heavy = out.decode().split()
+        times.append(float(t))
+    return min(times), heavy
+
+
+if __name__ == '__main__':
+    print('%-22s %10s   %s' % ('', 'time', 'heavy modules imported'))
+    for name, code in IMPORTS:
+        t, heavy = time_import(code)
+        print('%-22s %8.1f ms   %s' % (name, t * 1000, heavy))
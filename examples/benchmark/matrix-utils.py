@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team All rights reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+"""
+Microbenchmarks for the matrix functions in vispy.util.transforms. The
+in-place functions are compared with the previous implementation (which
+built a new matrix for each call and multiplied with np.dot), and the
+batched model_matrices() with a loop that builds one matrix per object.
+Does not need an OpenGL context.
+"""
+
+import math
+import timeit
+import numpy as np
+
+from vispy.util import transforms
+
+N = 10000
+
+
+# The previous implementations, for comparison
+def old_translate(M, x, y=None, z=None):
+    if y is None: y = x
+    if z is None: z = x
+    T = [[ 1, 0, 0, x],
+         [ 0, 1, 0, y],
+         [ 0, 0, 1, z],
+         [ 0, 0, 0, 1]]
+    T = np.array(T, dtype=np.float32).T
+    M[...] = np.dot(M,T)
+
+
+def old_zrotate(M,theta):
+    t = math.pi*theta/180
+    cosT = math.cos( t )
+    sinT = math.sin( t )
+    R = np.array(
+        [[ cosT,-sinT, 0.0, 0.0 ],
+         [ sinT, cosT, 0.0, 0.0 ],
+         [ 0.0,  0.0,  1.0, 0.0 ],
+         [ 0.0,  0.0,  0.0, 1.0 ]], dtype=np.float32)
+    M[...] = np.dot(M,R)
+
+
+def old_rotate(M, angle, x, y, z, point=None):
+    angle = math.pi*angle/180
+    c,s = math.cos(angle), math.sin(angle)
+    n = math.sqrt(x*x+y*y+z*z)
+    x /= n
+    y /= n
+    z /= n
+    cx,cy,cz = (1-c)*x, (1-c)*y, (1-c)*z
+    R = np.array([[ cx*x + c  , cy*x - z*s, cz*x + y*s, 0],
+                  [ cx*y + z*s, cy*y + c  , cz*y - x*s, 0],
+                  [ cx*z - y*s, cy*z + x*s, cz*z + c,   0],
+                  [          0,          0,        0,   1]]).T
+    M[...] = np.dot(M,R)
+
+
+def bench(label, func, number):
+    t = min(timeit.repeat(func, number=number, repeat=3)) / number
+    print("%-34s %8.2f us" % (label, t * 1e6))
+    return t
+
+
+if __name__ == '__main__':
+    M = np.eye(4, dtype=np.float32)
+    print("Per call:")
+    for name, old, new, args in [
+            ('translate', old_translate, transforms.translate, (1, 2, 3)),
+            ('zrotate', old_zrotate, transforms.zrotate, (1,)),
+            ('rotate', old_rotate, transforms.rotate, (1, 0.3, 0.4, 0.5))]:
+        t_old = bench('  %s (previous)' % name, lambda: old(M, *args), 20000)
+        t_new = bench('  %s' % name, lambda: new(M, *args), 20000)
+        print("  -> %.1fx" % (t_old / t_new))
+
+    # Model matrices for N objects
+    t = np.random.normal(size=(N, 3))
+    s = np.random.uniform(0.5, 2, (N, 3))
+    a = np.random.uniform(0, 360, N)
+    out = np.empty((N, 4, 4), np.float32)
+
+    def loop():
+        for i in range(N):
+            M = out[i]
+            M[...] = np.eye(4)
+            old_rotate(M, a[i], 0, 0, 1)
+            old_translate(M, *t[i])
+
+    def batched():
+        transforms.model_matrices(t, s, a, out=out)
+
+    print("Model matrices for %d objects:" % N)
+    t_old = bench('  loop (previous)', loop, 1)
+    t_new = bench('  model_matrices', batched, 10)
+    print("  -> %.1fx" % (t_old / t_new))
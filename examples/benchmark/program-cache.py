@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team All rights reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+"""
+Benchmark for the time it takes to prepare a number of different shader
+programs on the first draw (i.e. the first-frame hitch at startup).
+
+Run once with "--vispy-program-binary-cache" to fill the program binary
+cache, and then again to see the startup time when the linked programs
+are loaded from disk. Without the flag, all programs are compiled and
+linked on each run. Run with "warmup" as argument to compile and link
+the programs in the initialize event using Canvas.warm_up().
+"""
+
+import sys
+import time
+import numpy as np
+
+import vispy
+from vispy import oogl
+from vispy import app
+from vispy import gl
+
+N = 50
+WARMUP = 'warmup' in sys.argv
+
+VERT_SHADER = """
+attribute vec2 a_position;
+void main (void)
+{
+    gl_Position = vec4(a_position * %f, 0.0, 1.0);
+}
+"""
+
+FRAG_SHADER = """
+void main()
+{
+    gl_FragColor = vec4(%f, 0.5, 0.5, 1.0);
+}
+"""
+
+
+class Canvas(app.Canvas):
+
+    def __init__(self):
+        app.Canvas.__init__(self, size=(400, 400),
+                            title='Program cache benchmark')
+        position = np.array([[-1, -1], [1, -1], [0, 1]], np.float32)
+        self.programs = []
+        for i in range(N):
+            program = oogl.Program(VERT_SHADER % (0.5 + i / float(N)),
+                                   FRAG_SHADER % (i / float(N)))
+            program['a_position'] = oogl.VertexBuffer(position)
+            self.programs.append(program)
+
+    def on_initialize(self, event):
+        if WARMUP:
+            t0 = time.time()
+            self.warm_up(self.programs)
+            elapsed = time.time() - t0
+            link = sum([p.timings.get('link', 0) for p in self.programs])
+            print("Warm-up: %.1f ms (%.1f ms linking)" % 
+                  (elapsed * 1000, link * 1000))
+    
+    def on_paint(self, event):
+        gl.glClear(gl.GL_COLOR_BUFFER_BIT)
+        t0 = time.time()
+        for program in self.programs:
+            with program as prog:
+                prog.draw_arrays(gl.GL_TRIANGLES)
+        gl.glFinish()
+        elapsed = time.time() - t0
+        cache = oogl.get_program_binary_cache()
+        print("First frame with %d programs: %.1f ms" % (N, elapsed * 1000))
+        if vispy.config['program_binary_cache']:
+            print("Program binary cache: %r (%s)" % (cache.stats, cache.path))
+        self.close()
+
+
+if __name__ == '__main__':
+    c = Canvas()
+    c.show()
+    app.run()
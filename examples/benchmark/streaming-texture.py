@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team All rights reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+"""
+Benchmark for streaming video-like data to a texture. Reports the
+sustained throughput in frames/s and MB/s, and the number of dropped
+frames. Run with "plain" as argument to use a normal Texture2D for
+comparison.
+"""
+
+import sys
+import time
+import numpy as np
+
+from vispy import oogl
+from vispy import app
+from vispy import gl
+
+W, H = 1280, 720
+PLAIN = 'plain' in sys.argv
+
+# A few frames to cycle through, so that we do not measure numpy
+frames = [np.random.randint(0, 256, (H, W, 3)).astype(np.uint8)
+          for i in range(4)]
+
+data = np.zeros(4, dtype=[ ('a_position', np.float32, 2),
+                           ('a_texcoord', np.float32, 2) ])
+data['a_position'] = np.array([[-1, -1], [1, -1], [-1, 1], [1, 1]])
+data['a_texcoord'] = np.array([[0, 1], [1, 1], [0, 0], [1, 0]])
+
+VERT_SHADER = """
+attribute vec2 a_position;
+attribute vec2 a_texcoord;
+varying vec2 v_texcoord;
+void main (void)
+{
+    v_texcoord = a_texcoord;
+    gl_Position = vec4(a_position, 0.0, 1.0);
+}
+"""
+
+FRAG_SHADER = """
+uniform sampler2D u_texture;
+varying vec2 v_texcoord;
+void main()
+{
+    gl_FragColor = texture2D(u_texture, v_texcoord);
+}
+"""
+
+
+class Canvas(app.Canvas):
+
+    def __init__(self):
+        app.Canvas.__init__(self, size=(W//2, H//2),
+                            title='Streaming texture benchmark')
+        self.program = oogl.Program(VERT_SHADER, FRAG_SHADER)
+        if PLAIN:
+            self.texture = oogl.Texture2D(frames[0])
+        else:
+            self.texture = oogl.StreamingTexture2D((H, W, 3), count=3)
+        self.program['u_texture'] = self.texture
+        self.program.set_vars(oogl.VertexBuffer(data))
+        self.t0, self.count, self.index = time.time(), 0, 0
+
+    def on_resize(self, event):
+        gl.glViewport(0, 0, *event.size)
+
+    def on_paint(self, event):
+        # Set (and upload) the next frame
+        self.index += 1
+        self.texture.set_data(frames[self.index % len(frames)])
+        if not PLAIN:
+            self.texture.upload()
+        # Draw the current frame
+        with self.program as prog:
+            prog.draw_arrays(gl.GL_TRIANGLE_STRIP)
+        # Report
+        self.count += 1
+        elapsed = time.time() - self.t0
+        if elapsed > 2.5:
+            mbps = self.count * frames[0].nbytes / elapsed / 2**20
+            dropped = 0 if PLAIN else self.texture.frames_dropped
+            print("%.1f frames/s, %.1f MB/s, %d dropped" %
+                  (self.count / elapsed, mbps, dropped))
+            self.t0, self.count = time.time(), 0
+        self.update()
+
+
+if __name__ == '__main__':
+    c = Canvas()
+    c.show()
+    app.run()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team All rights reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+"""
+Benchmark for collapsing adjacent linear transforms in a TransformChain.
+For a chain with several scale/translate and affine stages around a log
+transform, reports the number of transform calls in the generated vertex
+shader and an estimate of its arithmetic instructions per vertex (the
+operators in the GLSL of each stage, with a mat4 * vec4 counting as 16),
+and the cost of evaluating the chain on the CPU, with and without
+collapsing. Does not need an OpenGL context.
+"""
+
+import re
+import time
+import numpy as np
+
+from vispy.shaders.transforms import TransformChain, collapse_transforms
+from vispy.shaders.transforms import STTransform, LogTransform
+from vispy.shaders.transforms import AffineTransform
+
+N = 1000000
+
+
+def make_transforms():
+    rotate = AffineTransform()
+    rotate.matrix[:2, :2] = [[0, -1], [1, 0]]
+    rotate.matrix = rotate.matrix
+    return [STTransform(scale=(2, 2), translate=(-1, -1)),
+            rotate,
+            STTransform(scale=(0.5, 0.5)),
+            LogTransform(base=(10, 0, 0)),
+            STTransform(scale=(1e-3, 1e-3), translate=(1, 2)),
+            STTransform(translate=(3, 4, 5)),
+            AffineTransform()]
+
+
+def estimate_instructions(transforms):
+    """ Count the arithmetic operators in the GLSL of each stage.
+    """
+    count = 0
+    for tr in transforms:
+        body = tr.source.split('{', 1)[1]
+        count += len(re.findall(r'[-+*/]|\blog\b', body))
+        count += 15 * body.count('matrix * pos')  # mat4 * vec4: 16 MADs
+    return count
+
+
+def benchmark(transforms, label):
+    chain = TransformChain(transforms, function='global_transform')
+    stages = chain._generate_source().count('pos = ')
+    collapsed = chain._collapsed
+    coords = np.random.uniform(1, 100, (N, 3))
+    t0 = time.time()
+    for i in range(5):
+        TransformChain(collapsed).map(coords)
+    elapsed = (time.time() - t0) / 5
+    print("%-12s %d stages in shader, ~%d ALU ops/vertex, "
+          "CPU map of %d points: %.1f ms" %
+          (label, stages, estimate_instructions(collapsed), N,
+           elapsed * 1000))
+
+
+if __name__ == '__main__':
+    transforms = make_transforms()
+    coords = np.random.uniform(1, 100, (1000, 3))
+    expected = coords
+    for tr in transforms[::-1]:
+        expected = tr.map(expected)
+    err = np.abs(TransformChain(transforms).map(coords) - expected)
+    print("Max difference after collapsing: %g" % err.max())
+
+    # Without collapsing: pretend no transforms can be fused
+    import vispy.shaders.transforms as module
+    linear = module.LINEAR_TRANSFORMS
+    module.LINEAR_TRANSFORMS = ()
+    benchmark(transforms, 'Original:')
+    module.LINEAR_TRANSFORMS = linear
+    benchmark(transforms, 'Collapsed:')
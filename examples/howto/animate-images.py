@@ -69,7 +69,8 @@ class Canvas(app.Canvas):
         self.size = W*5,H*5
 
         self.program = oogl.Program(VERT_SHADER, FRAG_SHADER)
-        self.texture = oogl.Texture2D(I)
+        self.texture = oogl.StreamingTexture2D(I.shape)
+        self.texture.set_data(I)
         self.texture.set_filter(gl.GL_NEAREST, gl.GL_NEAREST)
         
         self.program['u_texture'] = self.texture
@@ -111,6 +112,7 @@ class Canvas(app.Canvas):
         with self.program as prog:
             I[...] = np.random.uniform(0,1,(W,H)).astype(np.float32)
             self.texture.set_data(I)
+            self.texture.upload()
             prog.draw_arrays(gl.GL_TRIANGLE_STRIP)
         self.update()
 
@@ -13,6 +13,8 @@ import numpy as np
 from vispy.util.transforms import perspective, translate, rotate
 from vispy import app, gl, io
 
+use_buffers = False
+
 
 VERT_CODE = """
 uniform mat4 u_model;
@@ -193,8 +195,6 @@ class Canvas(app.Canvas):
 
 
 if __name__ == '__main__':
-    use_buffers = False
-    
     c = Canvas()
     c.show()
     app.run()
@@ -77,6 +77,8 @@ config.update(
     qt_lib= 'any',  # options are 'pyqt', 'pyside', or 'any'
     show_warnings=False,
     gl_debug=False,
+    gl_error_check='call',  # 'call', 'frame' or 'off'
+    program_binary_cache=False,  # Store linked programs on disk
 )
 
 
@@ -86,7 +88,8 @@ def parse_command_line_arguments():
     """
     import getopt, sys
     # Get command line args for vispy
-    argnames = ['vispy-backend', 'vispy-gl-debug']
+    argnames = ['vispy-backend', 'vispy-gl-debug', 'vispy-gl-error-check=',
+                'vispy-program-binary-cache']
     try:
         opts, args = getopt.getopt(sys.argv[1:], '', argnames)
     except getopt.GetoptError:
@@ -99,6 +102,10 @@ def parse_command_line_arguments():
                 print('backend', a)
             elif o == '--vispy-gl-debug':
                 config['gl_debug'] = True
+            elif o == '--vispy-gl-error-check':
+                config['gl_error_check'] = a
+            elif o == '--vispy-program-binary-cache':
+                config['program_binary_cache'] = True
             else:
                 print("Unsupported vispy flag: %s" % o)
 parse_command_line_arguments()
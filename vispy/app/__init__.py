@@ -25,7 +25,8 @@ def use(backend_name=None):
     chose a suitable backend automatically. It is an error to try to
     select a particular backend if one is already selected. Available
     backends: 'PySide', 'PyQt4', 'Glut', 'Pyglet', 'qt'. The latter
-    will use PySide or PyQt4, whichever works.
+    will use PySide or PyQt4, whichever works. The 'null' backend has
+    no GUI toolkit, for headless testing.
     
     If a backend name is provided, and that backend could not be loaded,
     an error is raised.
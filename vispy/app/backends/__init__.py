@@ -24,5 +24,8 @@ BACKENDS = [    ('Test', 'nonexistent', 'foo.bar.lalalala'), # For testing
 # so that we can look up its properties if we only have a name.
 BACKENDMAP = dict([(be[0].lower(), be) for be in BACKENDS])
 
+# Backends that are only used when selected by name
+BACKENDMAP['null'] = ('Null', 'null', None)  # Headless, for testing
+
 # List of attempted backends. For logging and for communicating to the backends.
 ATTEMPTED_BACKENDS = []
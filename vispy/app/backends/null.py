@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2013, Vispy Development Team.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+"""
+vispy backend without a GUI toolkit, for headless testing.
+
+The canvases are not shown and have no OpenGL context, so this backend
+is meant to be used with the 'record' target of vispy.gl. Time does not
+pass by itself: each call to process_events() fires each running timer
+once, and then paints each canvas that requested an update (emitting the
+initialize and resize events before the first paint). This backend is
+never selected automatically; use app.use('null').
+"""
+
+from __future__ import print_function, division, absolute_import
+
+from vispy import app
+
+
+ALL_CANVASES = []
+ALL_TIMERS = []
+
+
+class ApplicationBackend(app.ApplicationBackend):
+
+    def __init__(self):
+        app.ApplicationBackend.__init__(self)
+        self._quit = False
+
+    def _vispy_get_backend_name(self):
+        return 'Null'
+
+    def _vispy_process_events(self):
+        for timer in list(ALL_TIMERS):
+            timer._vispy_timer._timeout()
+        for canvas in list(ALL_CANVASES):
+            canvas._paint_if_needed()
+
+    def _vispy_run(self):
+        # Process events until quit, or until there is nothing to do
+        self._quit = False
+        while not self._quit:
+            if not (ALL_TIMERS or [c for c in ALL_CANVASES
+                                   if c._needs_paint]):
+                break
+            self._vispy_process_events()
+
+    def _vispy_quit(self):
+        self._quit = True
+        for canvas in list(ALL_CANVASES):
+            canvas._vispy_close()
+
+    def _vispy_get_native_app(self):
+        return self
+
+
+
+class CanvasBackend(app.CanvasBackend):
+    """ Null backend for Canvas abstract class."""
+
+    def __init__(self, *args, **kwargs):
+        app.CanvasBackend.__init__(self)
+        self._title = ''
+        self._size = 800, 600
+        self._position = 0, 0
+        self._visible = False
+        self._initialized = False
+        self._needs_paint = True
+        ALL_CANVASES.append(self)
+
+    def _vispy_set_current(self):
+        pass  # There is no context
+
+    def _vispy_swap_buffers(self):
+        pass
+
+    def _vispy_set_title(self, title):
+        self._title = title
+
+    def _vispy_set_size(self, w, h):
+        self._size = w, h
+        if self._initialized:
+            self._vispy_canvas.events.resize(size=(w, h))
+
+    def _vispy_set_position(self, x, y):
+        self._position = x, y
+
+    def _vispy_set_visible(self, visible):
+        self._visible = visible
+
+    def _vispy_update(self):
+        self._needs_paint = True
+
+    def _vispy_close(self):
+        if self in ALL_CANVASES:
+            ALL_CANVASES.remove(self)
+            if self._vispy_canvas is not None:
+                self._vispy_canvas.events.close()
+
+    def _vispy_get_geometry(self):
+        return self._position + self._size
+
+    def _vispy_get_size(self):
+        return self._size
+
+    def _vispy_get_position(self):
+        return self._position
+
+    def _paint_if_needed(self):
+        if self._vispy_canvas is None or not self._needs_paint:
+            return
+        if not self._initialized:
+            self._initialized = True
+            self._vispy_canvas.events.initialize()
+            self._vispy_canvas.events.resize(size=self._size)
+        self._needs_paint = False
+        self._vispy_canvas.events.paint(region=None)
+
+
+
+class TimerBackend(app.TimerBackend):
+
+    def _vispy_start(self, interval):
+        if self not in ALL_TIMERS:
+            ALL_TIMERS.append(self)
+
+    def _vispy_stop(self):
+        if self in ALL_TIMERS:
+            ALL_TIMERS.remove(self)
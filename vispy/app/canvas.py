@@ -4,7 +4,7 @@
 
 from __future__ import print_function, division, absolute_import
 
-from vispy.core.event import EmitterGroup, Event
+from vispy.core.event import EmitterGroup, EventEmitter, Event
 import vispy
 
 # todo: add functions for asking about current mouse/keyboard state
@@ -13,6 +13,17 @@ import vispy
 
 
 
+class _GLEventEmitter(EventEmitter):
+    """ Emitter for the initialize and paint events. Makes the canvas
+    the current context for oogl before any callback is invoked, no
+    matter in what order the callbacks were connected.
+    """
+    def __call__(self, *args, **kwds):
+        self.source._set_current_context()
+        return EventEmitter.__call__(self, *args, **kwds)
+
+
+
 class Canvas(object):
     """ Representation of a GUI element that can be rendered to by an OpenGL
     context. The args and kwargs are used to instantiate the native widget.
@@ -46,9 +57,9 @@ class Canvas(object):
     
     def __init__(self, *args, **kwargs):
         self.events = EmitterGroup(source=self, 
-                        initialize=Event, 
+                        initialize=_GLEventEmitter(self, 'initialize', Event),
                         resize=ResizeEvent,
-                        paint=PaintEvent,
+                        paint=_GLEventEmitter(self, 'paint', PaintEvent),
                         mouse_press=MouseEvent,
                         mouse_release=MouseEvent,
                         mouse_move=MouseEvent, 
@@ -115,10 +126,30 @@ class Canvas(object):
         if self._our_kwargs['position']:
             self.position = self._our_kwargs['position']
         if self._our_kwargs['autoswap']:
-            fun = lambda x:self._backend._vispy_swap_buffers()
+            fun = lambda x:self.swap_buffers()
             self.events.paint.callbacks.append(fun)  # Append callback to end
+        # Let vispy.gl know that a frame was drawn (for the GL call stats),
+        # and delete the GL objects that were garbage collected
+        self.events.paint.callbacks.append(self._gl_frame_end)
         if self._our_kwargs['show']:
             self.show()
+    
+    
+    def _set_current_context(self, event=None):
+        """ Let oogl know that our context is the current one, so that
+        shared GL objects (e.g. compiled shaders) are stored per canvas.
+        Called before the initialize and paint events are handled.
+        """
+        from vispy.oogl.context import set_current_context
+        set_current_context(self)
+    
+    
+    def _gl_frame_end(self, event=None):
+        from vispy import gl
+        from vispy.oogl.deletion import get_deletion_queue
+        # Delete the GL objects that were garbage collected
+        get_deletion_queue().drain()
+        gl.frame_end()
         
     
     @property
@@ -190,9 +221,34 @@ class Canvas(object):
         self._backend._vispy_set_title(title)
     
 
+    def warm_up(self, programs, wait=True):
+        """ Compile and link the given Program objects now (e.g. in the
+        initialize event), so that the first paint does not stall.
+        
+        All programs are first submitted to the driver, so that drivers
+        that support KHR_parallel_shader_compile can process them in
+        parallel. If wait is False, this method does not wait for them, 
+        but returns the programs that are not yet ready. Call warm_up() 
+        with these again later (e.g. each frame) until the returned list
+        is empty. The timings of each program are available via 
+        Program.timings.
+        """
+        self._backend._vispy_set_current()
+        self._set_current_context()
+        pending = [p for p in programs if not p.prepare(wait=False)]
+        if wait:
+            for program in pending:
+                program.prepare()
+            pending = []
+        return pending
+    
+    
     def swap_buffers(self):
         """ Swap GL buffers such that the offscreen buffer becomes visible.
+        With the 'frame' GL error check mode, first check for errors.
         """
+        from vispy.gl import errorcheck
+        errorcheck.frame_check()
         #if not self._our_kwargs['autoswap']:
         self._backend._vispy_swap_buffers()
     
@@ -0,0 +1,35 @@
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team
+# All rights reserved.
+# -----------------------------------------------------------------------------
+import unittest
+
+from vispy.app import Canvas
+from vispy.oogl.context import set_current_context, get_current_context
+
+
+
+# -----------------------------------------------------------------------------
+class CanvasContextTest(unittest.TestCase):
+
+    def tearDown(self):
+        set_current_context(None)
+
+    def test_current_context(self):
+        canvas1 = Canvas(native=None)
+        canvas2 = Canvas(native=None)
+        contexts = []
+        record = lambda event: contexts.append(get_current_context())
+        # Callbacks see their canvas as the current context, also when
+        # they are connected after the canvas was created
+        for canvas in (canvas1, canvas2):
+            canvas.events.initialize.connect(record)
+            canvas.events.paint.connect(record)
+        canvas1.events.initialize()
+        canvas2.events.paint()
+        canvas1.events.paint()
+        assert contexts == [canvas1, canvas2, canvas1]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,8 +12,13 @@ submodule implementations.
 
 from __future__ import print_function, division, absolute_import
 
+import sys
+
 import vispy
 
+# Whether the functions can be resolved on first use (PEP 562)
+_LAZY = sys.version_info >= (3, 7)
+
 
 class _GL_ENUM(int):
     """ Type to represent OpenGL constants.
@@ -26,36 +31,94 @@ class _GL_ENUM(int):
         return self.name
 
 
-def _make_debug_wrapper(funcname, func):
-    def cb(*args, **kwds):
-        argstr = ', '.join(list(map(repr,args)) + ['%s=%s' % item for item in kwds.items()])
-        print("%s(%s)" % (funcname, argstr))
-        ret = func(*args, **kwds)
-        print( " <= %s" % repr(ret))
-        return ret
-    return cb
+# The modules of each target: (functions, extension functions)
+TARGETS = {
+    'gl': ('_gl', '_gl_ext'),
+    'ctypes': ('_gl_ctypes', '_gl_ctypes_ext'),
+    'record': ('_record', '_record_ext'),
+    }
 
 
-
-def set_gl_target(target='gl'):
+def set_gl_target(target='gl', trace=None, error_check=None):
     """ Set vispy.gl to the target OpenGL ES 2.0 implementation.
+    
+    The functions are resolved when one is first used (on Python 3.7 and
+    later), so that e.g. PyOpenGL is not imported by processes that do
+    not draw.
+    
+    Parameters
+    ----------
+    target : str
+        The implementation: 'gl' for the normal OpenGL library (via
+        pyOpenGL), 'ctypes' for the normal OpenGL library via ctypes,
+        with less overhead per call (see vispy.gl.ctypeshelper),
+        'trace' for 'gl' with tracing enabled, or 'record' for a null
+        implementation that records the calls instead of drawing (see
+        vispy.gl.recorder).
+    trace : bool, optional
+        Whether to wrap the functions to count their calls, time and
+        uploaded bytes (see stats()). Default vispy.config['gl_debug'].
+    error_check : str, optional
+        When to check for errors: after each 'call', once per 'frame',
+        or 'off' (see vispy.gl.errorcheck). Default
+        vispy.config['gl_error_check'].
     """
-    debug = vispy.config['gl_debug']
+    global _target, _pending
+    if trace is None:
+        trace = vispy.config['gl_debug']
+    if error_check is None:
+        error_check = vispy.config['gl_error_check']
+    if target == 'trace':
+        target, trace = 'gl', True
+    if target not in TARGETS:
+        raise ValueError('Invalid target to load OpenGL API from.')
+    errorcheck._set_mode(error_check, target)
+    if target == 'gl' and 'OpenGL' in sys.modules:
+        _set_pyopengl_error_checking(error_check)
+    
+    # Remove the functions of the previous target
+    for NS in (globals(), ext.__dict__):
+        for name in [name for name in NS if name.startswith('gl') and
+                     callable(NS[name])]:
+            del NS[name]
+    
+    _target = target
+    _pending = target, trace, error_check
+    tracer._set_enabled(trace)
+    if not _LAZY:
+        _resolve_functions()
+
+
+def _resolve_functions():
+    """ Fill this namespace and ext with the functions of the target, if
+    that was not done yet.
+    """
+    global _pending
+    if _pending is None:
+        return
+    target, trace, error_check = _pending
+    _pending = None
     
     # Select modules to import names from
+    import importlib
+    modname, modname_ext = TARGETS[target]
+    mod = importlib.import_module('vispy.gl.' + modname)
+    mod_ext = importlib.import_module('vispy.gl.' + modname_ext)
     if target == 'gl':
-        from . import _gl as mod
-        from . import _gl_ext as mod_ext
-    else:
-        raise ValueError('Invalid target to load OpenGL API from.')
+        _set_pyopengl_error_checking(error_check)
+    
+    # PyOpenGL checks for errors itself
+    check_calls = error_check == 'call' and target == 'ctypes'
     
     # Import functions here
     NS = globals()
     funcnames = [name for name in dir(mod) if name.startswith('gl')]
     for name in funcnames:
         func = getattr(mod, name)
-        if debug:
-            func = _make_debug_wrapper(name, func)
+        if check_calls and name != 'glGetError':
+            func = errorcheck.wrap(name, func, mod.glGetError)
+        if trace:
+            func = tracer.wrap(name, func)
         NS[name] = func
     
     # Import functions in ext
@@ -63,14 +126,57 @@ def set_gl_target(target='gl'):
     funcnames = [name for name in dir(mod_ext) if name.startswith('gl')]
     for name in funcnames:
         func = getattr(mod_ext, name)
-        if debug:
-            func = _make_debug_wrapper(name, func)
+        if check_calls:
+            func = errorcheck.wrap(name, func, mod.glGetError)
+        if trace:
+            func = tracer.wrap(name, func)
         NS[name] = func
 
 
-# Import ext namespace and constants
-from . import ext
+def _set_pyopengl_error_checking(error_check):
+    # The 'call' mode of the gl target is PyOpenGL's own error checking
+    from .glhelper import set_error_checking
+    set_error_checking(error_check == 'call')
+
+
+def __getattr__(name):
+    # Called for names that are not in this namespace (Python 3.7+)
+    if name.startswith('gl') and _pending is not None:
+        _resolve_functions()
+        if name in globals():
+            return globals()[name]
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    _resolve_functions()
+    return sorted(globals())
+
+
+def _on_config_changed(event):
+    # Apply a new gl_error_check option to the current target
+    if 'gl_error_check' in event.changes:
+        resolved = _pending is None
+        set_gl_target(_target, tracer._enabled)
+        if resolved:
+            _resolve_functions()
+
+
+# Import constants and ext namespace (the constants have an ext name of
+# their own, the module with the extension constants)
 from ._constants import *
+del ext
+from . import ext
+
+# Counters for the GL calls, when tracing
+from . import tracer
+from .tracer import stats, reset_stats, frame_end
+
+# Error checking
+from . import errorcheck
+from .errorcheck import GLError, check_error
 
-# Fill this namespace with functions
+# Fill this namespace with functions (on first use)
+_target = _pending = None
 set_gl_target()
+vispy.config.events.changed.connect(_on_config_changed)
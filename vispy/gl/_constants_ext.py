@@ -13,6 +13,8 @@ GL_ALPHA8 = _GL_ENUM('GL_ALPHA8', 32828)
 GL_BUFFER_ACCESS = _GL_ENUM('GL_BUFFER_ACCESS', 35003)
 GL_BUFFER_MAPPED = _GL_ENUM('GL_BUFFER_MAPPED', 35004)
 GL_BUFFER_MAP_POINTER = _GL_ENUM('GL_BUFFER_MAP_POINTER', 35005)
+GL_COMPRESSED_RGBA_S3TC_DXT1 = _GL_ENUM('GL_COMPRESSED_RGBA_S3TC_DXT1', 33777)
+GL_COMPRESSED_RGB_S3TC_DXT1 = _GL_ENUM('GL_COMPRESSED_RGB_S3TC_DXT1', 33776)
 GL_DEPTH24_STENCIL8 = _GL_ENUM('GL_DEPTH24_STENCIL8', 35056)
 GL_DEPTH24_STENCIL8 = _GL_ENUM('GL_DEPTH24_STENCIL8', 35056)
 GL_DEPTH_COMPONENT16 = _GL_ENUM('GL_DEPTH_COMPONENT16', 33189)
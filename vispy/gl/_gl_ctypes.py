@@ -0,0 +1,164 @@
+""" 
+
+THIS CODE IS AUTO-GENERATED. DO NOT EDIT.
+
+OpenGL ES 2.0 API that calls the OpenGL library via ctypes.
+
+"""
+
+from vispy.gl._constants import *
+from vispy.gl import _gl_ctypes_ext as ext
+from vispy.gl import ctypeshelper as _ctypeshelper
+
+
+_glsignatures = [
+    ('glActiveTexture', 'void', ('GLenum', )),
+    ('glAttachShader', 'void', ('GLuint', 'GLuint', )),
+    ('glBindAttribLocation', 'void', ('GLuint', 'GLuint', 'GLchar*', )),
+    ('glBindBuffer', 'void', ('GLenum', 'GLuint', )),
+    ('glBindFramebuffer', 'void', ('GLenum', 'GLuint', )),
+    ('glBindRenderbuffer', 'void', ('GLenum', 'GLuint', )),
+    ('glBindTexture', 'void', ('GLenum', 'GLuint', )),
+    ('glBlendColor', 'void', ('GLclampf', 'GLclampf', 'GLclampf', 'GLclampf', )),
+    ('glBlendEquation', 'void', ('GLenum', )),
+    ('glBlendEquationSeparate', 'void', ('GLenum', 'GLenum', )),
+    ('glBlendFunc', 'void', ('GLenum', 'GLenum', )),
+    ('glBlendFuncSeparate', 'void', ('GLenum', 'GLenum', 'GLenum', 'GLenum', )),
+    ('glBufferData', 'void', ('GLenum', 'GLsizeiptr', 'void*', 'GLenum', )),
+    ('glBufferSubData', 'void', ('GLenum', 'GLintptr', 'GLsizeiptr', 'void*', )),
+    ('glCheckFramebufferStatus', 'GLenum', ('GLenum', )),
+    ('glClear', 'void', ('GLbitfield', )),
+    ('glClearColor', 'void', ('GLclampf', 'GLclampf', 'GLclampf', 'GLclampf', )),
+    ('glClearDepthf', 'void', ('GLclampf', )),
+    ('glClearStencil', 'void', ('GLint', )),
+    ('glColorMask', 'void', ('GLboolean', 'GLboolean', 'GLboolean', 'GLboolean', )),
+    ('glCompileShader', 'void', ('GLuint', )),
+    ('glCompressedTexImage2D', 'void', ('GLenum', 'GLint', 'GLenum', 'GLsizei', 'GLsizei', 'GLint', 'GLsizei', 'void*', )),
+    ('glCompressedTexSubImage2D', 'void', ('GLenum', 'GLint', 'GLint', 'GLint', 'GLsizei', 'GLsizei', 'GLenum', 'GLsizei', 'void*', )),
+    ('glCopyTexImage2D', 'void', ('GLenum', 'GLint', 'GLenum', 'GLint', 'GLint', 'GLsizei', 'GLsizei', 'GLint', )),
+    ('glCopyTexSubImage2D', 'void', ('GLenum', 'GLint', 'GLint', 'GLint', 'GLint', 'GLint', 'GLsizei', 'GLsizei', )),
+    ('glCreateProgram', 'GLuint', ()),
+    ('glCreateShader', 'GLuint', ('GLenum', )),
+    ('glCullFace', 'void', ('GLenum', )),
+    ('glDeleteBuffers', 'void', ('GLsizei', 'GLuint*', )),
+    ('glDeleteFramebuffers', 'void', ('GLsizei', 'GLuint*', )),
+    ('glDeleteProgram', 'void', ('GLuint', )),
+    ('glDeleteRenderbuffers', 'void', ('GLsizei', 'GLuint*', )),
+    ('glDeleteShader', 'void', ('GLuint', )),
+    ('glDeleteTextures', 'void', ('GLsizei', 'GLuint*', )),
+    ('glDepthFunc', 'void', ('GLenum', )),
+    ('glDepthMask', 'void', ('GLboolean', )),
+    ('glDepthRangef', 'void', ('GLclampf', 'GLclampf', )),
+    ('glDetachShader', 'void', ('GLuint', 'GLuint', )),
+    ('glDisable', 'void', ('GLenum', )),
+    ('glDisableVertexAttribArray', 'void', ('GLuint', )),
+    ('glDrawArrays', 'void', ('GLenum', 'GLint', 'GLsizei', )),
+    ('glDrawElements', 'void', ('GLenum', 'GLsizei', 'GLenum', 'void*', )),
+    ('glEnable', 'void', ('GLenum', )),
+    ('glEnableVertexAttribArray', 'void', ('GLuint', )),
+    ('glFinish', 'void', ()),
+    ('glFlush', 'void', ()),
+    ('glFramebufferRenderbuffer', 'void', ('GLenum', 'GLenum', 'GLenum', 'GLuint', )),
+    ('glFramebufferTexture2D', 'void', ('GLenum', 'GLenum', 'GLenum', 'GLuint', 'GLint', )),
+    ('glFrontFace', 'void', ('GLenum', )),
+    ('glGenBuffers', 'void', ('GLsizei', 'GLuint*', )),
+    ('glGenFramebuffers', 'void', ('GLsizei', 'GLuint*', )),
+    ('glGenRenderbuffers', 'void', ('GLsizei', 'GLuint*', )),
+    ('glGenTextures', 'void', ('GLsizei', 'GLuint*', )),
+    ('glGenerateMipmap', 'void', ('GLenum', )),
+    ('glGetActiveAttrib', 'void', ('GLuint', 'GLuint', 'GLsizei', 'GLsizei*', 'GLint*', 'GLenum*', 'GLchar*', )),
+    ('glGetActiveUniform', 'void', ('GLuint', 'GLuint', 'GLsizei', 'GLsizei*', 'GLint*', 'GLenum*', 'GLchar*', )),
+    ('glGetAttachedShaders', 'void', ('GLuint', 'GLsizei', 'GLsizei*', 'GLuint*', )),
+    ('glGetAttribLocation', 'GLint', ('GLuint', 'GLchar*', )),
+    ('glGetBooleanv', 'void', ('GLenum', 'GLboolean*', )),
+    ('glGetBufferParameteriv', 'void', ('GLenum', 'GLenum', 'GLint*', )),
+    ('glGetError', 'GLenum', ()),
+    ('glGetFloatv', 'void', ('GLenum', 'GLfloat*', )),
+    ('glGetFramebufferAttachmentParameteriv', 'void', ('GLenum', 'GLenum', 'GLenum', 'GLint*', )),
+    ('glGetIntegerv', 'void', ('GLenum', 'GLint*', )),
+    ('glGetProgramInfoLog', 'void', ('GLuint', 'GLsizei', 'GLsizei*', 'GLchar*', )),
+    ('glGetProgramiv', 'void', ('GLuint', 'GLenum', 'GLint*', )),
+    ('glGetRenderbufferParameteriv', 'void', ('GLenum', 'GLenum', 'GLint*', )),
+    ('glGetShaderInfoLog', 'void', ('GLuint', 'GLsizei', 'GLsizei*', 'GLchar*', )),
+    ('glGetShaderPrecisionFormat', 'void', ('GLenum', 'GLenum', 'GLint*', 'GLint*', )),
+    ('glGetShaderSource', 'void', ('GLuint', 'GLsizei', 'GLsizei*', 'GLchar*', )),
+    ('glGetShaderiv', 'void', ('GLuint', 'GLenum', 'GLint*', )),
+    ('glGetString', 'GLubyte*', ('GLenum', )),
+    ('glGetTexParameterfv', 'void', ('GLenum', 'GLenum', 'GLfloat*', )),
+    ('glGetTexParameteriv', 'void', ('GLenum', 'GLenum', 'GLint*', )),
+    ('glGetUniformLocation', 'GLint', ('GLuint', 'GLchar*', )),
+    ('glGetUniformfv', 'void', ('GLuint', 'GLint', 'GLfloat*', )),
+    ('glGetUniformiv', 'void', ('GLuint', 'GLint', 'GLint*', )),
+    ('glGetVertexAttribPointerv', 'void', ('GLuint', 'GLenum', 'void**', )),
+    ('glGetVertexAttribfv', 'void', ('GLuint', 'GLenum', 'GLfloat*', )),
+    ('glGetVertexAttribiv', 'void', ('GLuint', 'GLenum', 'GLint*', )),
+    ('glHint', 'void', ('GLenum', 'GLenum', )),
+    ('glIsBuffer', 'GLboolean', ('GLuint', )),
+    ('glIsEnabled', 'GLboolean', ('GLenum', )),
+    ('glIsFramebuffer', 'GLboolean', ('GLuint', )),
+    ('glIsProgram', 'GLboolean', ('GLuint', )),
+    ('glIsRenderbuffer', 'GLboolean', ('GLuint', )),
+    ('glIsShader', 'GLboolean', ('GLuint', )),
+    ('glIsTexture', 'GLboolean', ('GLuint', )),
+    ('glLineWidth', 'void', ('GLfloat', )),
+    ('glLinkProgram', 'void', ('GLuint', )),
+    ('glPixelStorei', 'void', ('GLenum', 'GLint', )),
+    ('glPolygonOffset', 'void', ('GLfloat', 'GLfloat', )),
+    ('glReadPixels', 'void', ('GLint', 'GLint', 'GLsizei', 'GLsizei', 'GLenum', 'GLenum', 'void*', )),
+    ('glReleaseShaderCompiler', 'void', ()),
+    ('glRenderbufferStorage', 'void', ('GLenum', 'GLenum', 'GLsizei', 'GLsizei', )),
+    ('glSampleCoverage', 'void', ('GLclampf', 'GLboolean', )),
+    ('glScissor', 'void', ('GLint', 'GLint', 'GLsizei', 'GLsizei', )),
+    ('glShaderBinary', 'void', ('GLsizei', 'GLuint*', 'GLenum', 'void*', 'GLsizei', )),
+    ('glShaderSource', 'void', ('GLuint', 'GLsizei', 'GLchar**', 'GLint*', )),
+    ('glStencilFunc', 'void', ('GLenum', 'GLint', 'GLuint', )),
+    ('glStencilFuncSeparate', 'void', ('GLenum', 'GLenum', 'GLint', 'GLuint', )),
+    ('glStencilMask', 'void', ('GLuint', )),
+    ('glStencilMaskSeparate', 'void', ('GLenum', 'GLuint', )),
+    ('glStencilOp', 'void', ('GLenum', 'GLenum', 'GLenum', )),
+    ('glStencilOpSeparate', 'void', ('GLenum', 'GLenum', 'GLenum', 'GLenum', )),
+    ('glTexImage2D', 'void', ('GLenum', 'GLint', 'GLint', 'GLsizei', 'GLsizei', 'GLint', 'GLenum', 'GLenum', 'void*', )),
+    ('glTexParameterf', 'void', ('GLenum', 'GLenum', 'GLfloat', )),
+    ('glTexParameterfv', 'void', ('GLenum', 'GLenum', 'GLfloat*', )),
+    ('glTexParameteri', 'void', ('GLenum', 'GLenum', 'GLint', )),
+    ('glTexParameteriv', 'void', ('GLenum', 'GLenum', 'GLint*', )),
+    ('glTexSubImage2D', 'void', ('GLenum', 'GLint', 'GLint', 'GLint', 'GLsizei', 'GLsizei', 'GLenum', 'GLenum', 'void*', )),
+    ('glUniform1f', 'void', ('GLint', 'GLfloat', )),
+    ('glUniform1fv', 'void', ('GLint', 'GLsizei', 'GLfloat*', )),
+    ('glUniform1i', 'void', ('GLint', 'GLint', )),
+    ('glUniform1iv', 'void', ('GLint', 'GLsizei', 'GLint*', )),
+    ('glUniform2f', 'void', ('GLint', 'GLfloat', 'GLfloat', )),
+    ('glUniform2fv', 'void', ('GLint', 'GLsizei', 'GLfloat*', )),
+    ('glUniform2i', 'void', ('GLint', 'GLint', 'GLint', )),
+    ('glUniform2iv', 'void', ('GLint', 'GLsizei', 'GLint*', )),
+    ('glUniform3f', 'void', ('GLint', 'GLfloat', 'GLfloat', 'GLfloat', )),
+    ('glUniform3fv', 'void', ('GLint', 'GLsizei', 'GLfloat*', )),
+    ('glUniform3i', 'void', ('GLint', 'GLint', 'GLint', 'GLint', )),
+    ('glUniform3iv', 'void', ('GLint', 'GLsizei', 'GLint*', )),
+    ('glUniform4f', 'void', ('GLint', 'GLfloat', 'GLfloat', 'GLfloat', 'GLfloat', )),
+    ('glUniform4fv', 'void', ('GLint', 'GLsizei', 'GLfloat*', )),
+    ('glUniform4i', 'void', ('GLint', 'GLint', 'GLint', 'GLint', 'GLint', )),
+    ('glUniform4iv', 'void', ('GLint', 'GLsizei', 'GLint*', )),
+    ('glUniformMatrix2fv', 'void', ('GLint', 'GLsizei', 'GLboolean', 'GLfloat*', )),
+    ('glUniformMatrix3fv', 'void', ('GLint', 'GLsizei', 'GLboolean', 'GLfloat*', )),
+    ('glUniformMatrix4fv', 'void', ('GLint', 'GLsizei', 'GLboolean', 'GLfloat*', )),
+    ('glUseProgram', 'void', ('GLuint', )),
+    ('glValidateProgram', 'void', ('GLuint', )),
+    ('glVertexAttrib1f', 'void', ('GLuint', 'GLfloat', )),
+    ('glVertexAttrib1fv', 'void', ('GLuint', 'GLfloat*', )),
+    ('glVertexAttrib2f', 'void', ('GLuint', 'GLfloat', 'GLfloat', )),
+    ('glVertexAttrib2fv', 'void', ('GLuint', 'GLfloat*', )),
+    ('glVertexAttrib3f', 'void', ('GLuint', 'GLfloat', 'GLfloat', 'GLfloat', )),
+    ('glVertexAttrib3fv', 'void', ('GLuint', 'GLfloat*', )),
+    ('glVertexAttrib4f', 'void', ('GLuint', 'GLfloat', 'GLfloat', 'GLfloat', 'GLfloat', )),
+    ('glVertexAttrib4fv', 'void', ('GLuint', 'GLfloat*', )),
+    ('glVertexAttribPointer', 'void', ('GLuint', 'GLint', 'GLenum', 'GLboolean', 'GLsizei', 'void*', )),
+    ('glViewport', 'void', ('GLint', 'GLint', 'GLsizei', 'GLsizei', )),
+    ]
+
+_glgroups = {
+    'glTexParameter': ['glTexParameterf', 'glTexParameterfv', 'glTexParameteri', 'glTexParameteriv'],
+    }
+
+
+_ctypeshelper.create_functions(globals(), _glsignatures, _glgroups)
@@ -0,0 +1,37 @@
+""" 
+
+THIS CODE IS AUTO-GENERATED. DO NOT EDIT.
+
+OpenGL ES 2.0 API that calls the OpenGL library via ctypes.
+
+"""
+
+from vispy.gl._constants_ext import *
+from vispy.gl import ctypeshelper as _ctypeshelper
+
+
+_glsignatures = [
+    ('glBindVertexArray', 'void', ('GLuint', )),
+    ('glCompressedTexImage3D', 'void', ('GLenum', 'GLint', 'GLenum', 'GLsizei', 'GLsizei', 'GLsizei', 'GLint', 'GLsizei', 'void*', )),
+    ('glCompressedTexSubImage3D', 'void', ('GLenum', 'GLint', 'GLint', 'GLint', 'GLint', 'GLsizei', 'GLsizei', 'GLsizei', 'GLenum', 'GLsizei', 'void*', )),
+    ('glCopyTexSubImage3D', 'void', ('GLenum', 'GLint', 'GLint', 'GLint', 'GLint', 'GLint', 'GLint', 'GLsizei', 'GLsizei', )),
+    ('glDeleteVertexArrays', 'void', ('GLsizei', 'GLuint*', )),
+    ('glEGLImageTargetRenderbufferStorage', 'void', ('GLenum', 'GLeglImageOES', )),
+    ('glEGLImageTargetTexture2D', 'void', ('GLenum', 'GLeglImageOES', )),
+    ('glFramebufferTexture3D', 'void', ('GLenum', 'GLenum', 'GLenum', 'GLuint', 'GLint', 'GLint', )),
+    ('glGenVertexArrays', 'void', ('GLsizei', 'GLuint*', )),
+    ('glGetBufferPointerv', 'void', ('GLenum', 'GLenum', 'void**', )),
+    ('glGetProgramBinary', 'void', ('GLuint', 'GLsizei', 'GLsizei*', 'GLenum*', 'void*', )),
+    ('glIsVertexArray', 'GLboolean', ('GLuint', )),
+    ('glMapBuffer', 'void*', ('GLenum', 'GLenum', )),
+    ('glProgramBinary', 'void', ('GLuint', 'GLenum', 'void*', 'GLint', )),
+    ('glTexImage3D', 'void', ('GLenum', 'GLint', 'GLenum', 'GLsizei', 'GLsizei', 'GLsizei', 'GLint', 'GLenum', 'GLenum', 'void*', )),
+    ('glTexSubImage3D', 'void', ('GLenum', 'GLint', 'GLint', 'GLint', 'GLint', 'GLsizei', 'GLsizei', 'GLsizei', 'GLenum', 'GLenum', 'void*', )),
+    ('glUnmapBuffer', 'GLboolean', ('GLenum', )),
+    ]
+
+_glgroups = {
+    }
+
+
+_ctypeshelper.create_functions(globals(), _glsignatures, _glgroups)
@@ -0,0 +1,161 @@
+""" 
+
+THIS CODE IS AUTO-GENERATED. DO NOT EDIT.
+
+OpenGL ES 2.0 API that records the calls instead of drawing.
+
+"""
+
+from vispy.gl._constants import *
+from vispy.gl import _record_ext as ext
+from vispy.gl import recorder as _recorder
+
+
+_glfunctions = [
+    "glActiveTexture",
+    "glAttachShader",
+    "glBindAttribLocation",
+    "glBindBuffer",
+    "glBindFramebuffer",
+    "glBindRenderbuffer",
+    "glBindTexture",
+    "glBlendColor",
+    "glBlendEquation",
+    "glBlendEquationSeparate",
+    "glBlendFunc",
+    "glBlendFuncSeparate",
+    "glBufferData",
+    "glBufferSubData",
+    "glCheckFramebufferStatus",
+    "glClear",
+    "glClearColor",
+    "glClearDepthf",
+    "glClearStencil",
+    "glColorMask",
+    "glCompileShader",
+    "glCompressedTexImage2D",
+    "glCompressedTexSubImage2D",
+    "glCopyTexImage2D",
+    "glCopyTexSubImage2D",
+    "glCreateProgram",
+    "glCreateShader",
+    "glCullFace",
+    "glDeleteBuffers",
+    "glDeleteFramebuffers",
+    "glDeleteProgram",
+    "glDeleteRenderbuffers",
+    "glDeleteShader",
+    "glDeleteTextures",
+    "glDepthFunc",
+    "glDepthMask",
+    "glDepthRangef",
+    "glDetachShader",
+    "glDisable",
+    "glDisableVertexAttribArray",
+    "glDrawArrays",
+    "glDrawElements",
+    "glEnable",
+    "glEnableVertexAttribArray",
+    "glFinish",
+    "glFlush",
+    "glFramebufferRenderbuffer",
+    "glFramebufferTexture2D",
+    "glFrontFace",
+    "glGenBuffers",
+    "glGenFramebuffers",
+    "glGenRenderbuffers",
+    "glGenTextures",
+    "glGenerateMipmap",
+    "glGetActiveAttrib",
+    "glGetActiveUniform",
+    "glGetAttachedShaders",
+    "glGetAttribLocation",
+    "glGetBooleanv",
+    "glGetBufferParameteriv",
+    "glGetError",
+    "glGetFloatv",
+    "glGetFramebufferAttachmentParameteriv",
+    "glGetIntegerv",
+    "glGetProgramInfoLog",
+    "glGetProgramiv",
+    "glGetRenderbufferParameteriv",
+    "glGetShaderInfoLog",
+    "glGetShaderPrecisionFormat",
+    "glGetShaderSource",
+    "glGetShaderiv",
+    "glGetString",
+    "glGetTexParameterfv",
+    "glGetTexParameteriv",
+    "glGetUniformLocation",
+    "glGetUniformfv",
+    "glGetUniformiv",
+    "glGetVertexAttribPointerv",
+    "glGetVertexAttribfv",
+    "glGetVertexAttribiv",
+    "glHint",
+    "glIsBuffer",
+    "glIsEnabled",
+    "glIsFramebuffer",
+    "glIsProgram",
+    "glIsRenderbuffer",
+    "glIsShader",
+    "glIsTexture",
+    "glLineWidth",
+    "glLinkProgram",
+    "glPixelStorei",
+    "glPolygonOffset",
+    "glReadPixels",
+    "glReleaseShaderCompiler",
+    "glRenderbufferStorage",
+    "glSampleCoverage",
+    "glScissor",
+    "glShaderBinary",
+    "glShaderSource",
+    "glStencilFunc",
+    "glStencilFuncSeparate",
+    "glStencilMask",
+    "glStencilMaskSeparate",
+    "glStencilOp",
+    "glStencilOpSeparate",
+    "glTexImage2D",
+    "glTexParameter",
+    "glTexParameterf",
+    "glTexParameterfv",
+    "glTexParameteri",
+    "glTexParameteriv",
+    "glTexSubImage2D",
+    "glUniform1f",
+    "glUniform1fv",
+    "glUniform1i",
+    "glUniform1iv",
+    "glUniform2f",
+    "glUniform2fv",
+    "glUniform2i",
+    "glUniform2iv",
+    "glUniform3f",
+    "glUniform3fv",
+    "glUniform3i",
+    "glUniform3iv",
+    "glUniform4f",
+    "glUniform4fv",
+    "glUniform4i",
+    "glUniform4iv",
+    "glUniformMatrix2fv",
+    "glUniformMatrix3fv",
+    "glUniformMatrix4fv",
+    "glUseProgram",
+    "glValidateProgram",
+    "glVertexAttrib1f",
+    "glVertexAttrib1fv",
+    "glVertexAttrib2f",
+    "glVertexAttrib2fv",
+    "glVertexAttrib3f",
+    "glVertexAttrib3fv",
+    "glVertexAttrib4f",
+    "glVertexAttrib4fv",
+    "glVertexAttribPointer",
+    "glViewport",
+    ]
+
+
+_recorder.create_functions(globals(), _glfunctions)
@@ -0,0 +1,34 @@
+""" 
+
+THIS CODE IS AUTO-GENERATED. DO NOT EDIT.
+
+OpenGL ES 2.0 API that records the calls instead of drawing.
+
+"""
+
+from vispy.gl._constants_ext import *
+from vispy.gl import recorder as _recorder
+
+
+_glfunctions = [
+    "glBindVertexArray",
+    "glCompressedTexImage3D",
+    "glCompressedTexSubImage3D",
+    "glCopyTexSubImage3D",
+    "glDeleteVertexArrays",
+    "glEGLImageTargetRenderbufferStorage",
+    "glEGLImageTargetTexture2D",
+    "glFramebufferTexture3D",
+    "glGenVertexArrays",
+    "glGetBufferPointerv",
+    "glGetProgramBinary",
+    "glIsVertexArray",
+    "glMapBuffer",
+    "glProgramBinary",
+    "glTexImage3D",
+    "glTexSubImage3D",
+    "glUnmapBuffer",
+    ]
+
+
+_recorder.create_functions(globals(), _glfunctions)
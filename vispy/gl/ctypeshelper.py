@@ -0,0 +1,473 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2013, Vispy Development Team.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+""" Helper for the vispy.gl._gl_ctypes module: an OpenGL ES 2.0 API that
+calls the OpenGL library directly via ctypes.
+
+PyOpenGL converts the arguments of each call in Python, and calls
+glGetError() after each call, which costs several microseconds per call.
+The functions of this target are ctypes functions with their argtypes set
+(so that ctypes converts the scalar arguments in C), and they do not check
+for errors themselves (see vispy.gl.errorcheck for the options).
+Functions with pointer arguments get a thin wrapper that passes numpy
+arrays without a copy if they are contiguous and of a matching item size,
+and that converts other sequences. The functions that vispy calls
+the PyOpenGL way (e.g. glGenBuffers(1) returns the handle, and
+glGetProgramiv(handle, pname) returns the value) are wrapped to do the
+same; all other functions take the arguments of the C API.
+
+The library is loaded when _gl_ctypes is imported. Use load_library() to
+load another one (e.g. a stub library for testing, see
+build_stub_library()), and then call set_gl_target('ctypes') again.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import os
+import sys
+import ctypes
+import ctypes.util
+import subprocess
+
+import numpy as np
+
+from vispy.gl import _constants as const
+
+
+# The C types of the OpenGL ES 2.0 API
+TYPES = {
+    'void': None,
+    'GLvoid': None,
+    'GLchar': ctypes.c_char,
+    'GLenum': ctypes.c_uint,
+    'GLboolean': ctypes.c_ubyte,
+    'GLbitfield': ctypes.c_uint,
+    'GLbyte': ctypes.c_byte,
+    'GLshort': ctypes.c_short,
+    'GLint': ctypes.c_int,
+    'GLsizei': ctypes.c_int,
+    'GLubyte': ctypes.c_ubyte,
+    'GLushort': ctypes.c_ushort,
+    'GLuint': ctypes.c_uint,
+    'GLfloat': ctypes.c_float,
+    'GLclampf': ctypes.c_float,
+    'GLfixed': ctypes.c_int,
+    'GLintptr': ctypes.c_ssize_t,
+    'GLsizeiptr': ctypes.c_ssize_t,
+    'GLeglImageOES': ctypes.c_void_p,
+    }
+
+# The numpy dtypes for typed pointer arguments
+DTYPES = {
+    'GLboolean': np.uint8,
+    'GLint': np.int32,
+    'GLsizei': np.int32,
+    'GLuint': np.uint32,
+    'GLenum': np.uint32,
+    'GLfloat': np.float32,
+    'GLubyte': np.uint8,
+    }
+
+# The number of values returned by glGet*v for the parameters that have
+# more than one
+GET_SIZES = {
+    const.GL_VIEWPORT: 4,
+    const.GL_SCISSOR_BOX: 4,
+    const.GL_COLOR_CLEAR_VALUE: 4,
+    const.GL_COLOR_WRITEMASK: 4,
+    const.GL_BLEND_COLOR: 4,
+    const.GL_DEPTH_RANGE: 2,
+    const.GL_ALIASED_POINT_SIZE_RANGE: 2,
+    const.GL_ALIASED_LINE_WIDTH_RANGE: 2,
+    const.GL_MAX_VIEWPORT_DIMS: 2,
+    const.GL_CURRENT_VERTEX_ATTRIB: 4,
+    }
+
+# The functions that create and delete objects
+_GEN_FUNCTIONS = ('glGenBuffers', 'glGenTextures', 'glGenFramebuffers',
+                  'glGenRenderbuffers', 'glGenVertexArrays')
+_DELETE_FUNCTIONS = ('glDeleteBuffers', 'glDeleteTextures',
+                     'glDeleteFramebuffers', 'glDeleteRenderbuffers',
+                     'glDeleteVertexArrays')
+
+# The loaded library, and the (NS, signatures, groups) of the modules
+_library = None
+_namespaces = []
+
+
+
+def _make_unavailable_func(funcname):
+    def cb(*args, **kwds):
+        raise RuntimeError('OpenGL API call "%s" is not available.' % funcname)
+    cb.__name__ = funcname
+    return cb
+
+
+def _find_library():
+    """ Get the filename of the OpenGL library of this system, or None.
+    """
+    if sys.platform.startswith('win'):
+        return 'opengl32'
+    elif sys.platform.startswith('darwin'):
+        return '/System/Library/Frameworks/OpenGL.framework/OpenGL'
+    return ctypes.util.find_library('GL') or 'libGL.so.1'
+
+
+def load_library(filename=None):
+    """ Load the OpenGL library with the given filename (default the one of
+    this system), and (re)create the functions of the ctypes target. When
+    this target is the current one, call set_gl_target('ctypes') again
+    to use the new functions.
+    """
+    global _library
+    if filename is None:
+        filename = _find_library()
+    try:
+        if sys.platform.startswith('win'):
+            _library = ctypes.WinDLL(filename)
+        else:
+            _library = ctypes.CDLL(filename)
+    except OSError:
+        print('warning: could not load OpenGL library %r' % filename)
+        _library = None
+    for NS, signatures, groups in _namespaces:
+        _create_functions(NS, signatures, groups)
+
+
+def _get_proc(funcname, restype, argtypes):
+    """ Get the ctypes function for the given name from the library, or
+    via the GetProcAddress function of the platform. Returns None if not
+    available.
+    """
+    if _library is None:
+        return None
+    for name in (funcname, funcname + 'OES'):
+        try:
+            func = _library[name]
+        except (AttributeError, KeyError):
+            continue
+        func.restype, func.argtypes = restype, argtypes
+        return func
+    # Functions beyond OpenGL 1.1 on Windows (which need a current context)
+    getprocaddress = None
+    for name in ('wglGetProcAddress', 'glXGetProcAddressARB'):
+        try:
+            getprocaddress = _library[name]
+        except (AttributeError, KeyError):
+            continue
+        getprocaddress.restype = ctypes.c_void_p
+        getprocaddress.argtypes = [ctypes.c_char_p]
+        break
+    if getprocaddress is not None:
+        for name in (funcname, funcname + 'OES'):
+            address = getprocaddress(name.encode('ascii'))
+            if address:
+                if sys.platform.startswith('win'):
+                    prototype = ctypes.WINFUNCTYPE(restype, *argtypes)
+                else:
+                    prototype = ctypes.CFUNCTYPE(restype, *argtypes)
+                return prototype(address)
+    return None
+
+
+def _ctype(ctypestr):
+    """ Get the ctypes type for a C type (e.g. "GLfloat*").
+    """
+    if ctypestr.endswith('*'):
+        return ctypes.c_void_p
+    return TYPES[ctypestr]
+
+
+## Argument conversion
+
+def _address(x):
+    """ Get an argument for a pointer to the data of a contiguous array.
+    """
+    try:
+        # About three times faster than x.ctypes
+        return ctypes.byref(ctypes.c_char.from_buffer(x))
+    except (TypeError, ValueError):
+        return x.ctypes  # Read-only or empty
+
+
+def _void_pointer(x):
+    """ Convert an argument for a void pointer: data (a numpy array or
+    bytes), None, or an offset.
+    """
+    if isinstance(x, np.ndarray):
+        if not x.flags.c_contiguous:
+            x = np.ascontiguousarray(x)
+        return _address(x)
+    elif x is None or isinstance(x, bytes):
+        return x
+    elif hasattr(x, '__index__'):
+        return int(x)
+    return _address(np.frombuffer(x, np.uint8))
+
+
+def _make_typed_pointer(dtype):
+    """ Make the converter for a pointer to values of the given type.
+    Contiguous arrays of the same item size and kind (signed and unsigned
+    integers are the same kind) are passed as they are, so the function
+    can write in them. Other values are converted.
+    """
+    dtype = np.dtype(dtype)
+    itemsize = dtype.itemsize
+    kinds = 'f' if dtype.kind == 'f' else 'iub'
+    def typed_pointer(x):
+        if isinstance(x, np.ndarray) and x.flags.c_contiguous and \
+                x.dtype.itemsize == itemsize and x.dtype.kind in kinds:
+            return _address(x)
+        elif x is None:
+            return None
+        return _address(np.ascontiguousarray(x, dtype))
+    return typed_pointer
+
+
+def _char_pointer(x):
+    """ Convert an argument for a string.
+    """
+    if isinstance(x, str):
+        return x.encode('utf-8')
+    elif isinstance(x, np.ndarray):
+        return _address(x)
+    return x
+
+
+def _converter(ctypestr):
+    """ Get the converter for an argument of the given C type, or None if
+    ctypes can convert it.
+    """
+    if not ctypestr.endswith('*'):
+        return None
+    base = ctypestr.rstrip('*')
+    if base == 'GLchar' and ctypestr.count('*') == 1:
+        return _char_pointer
+    elif base in DTYPES and ctypestr.count('*') == 1:
+        return _make_typed_pointer(DTYPES[base])
+    return _void_pointer
+
+
+def _wrap(funcname, raw, converters):
+    """ Wrap a ctypes function to convert its pointer arguments.
+    """
+    pointers = tuple((i, c) for i, c in enumerate(converters) if c)
+    if not pointers:
+        return raw
+
+    def wrapped(*args):
+        args = list(args)
+        for i, convert in pointers:
+            if i < len(args):
+                args[i] = convert(args[i])
+        return raw(*args)
+
+    wrapped.__name__ = funcname
+    return wrapped
+
+
+## Functions that are called the PyOpenGL way
+
+def _make_gen(raw):
+    def gen(n=1):
+        handles = (ctypes.c_uint * n)()
+        raw(n, handles)
+        return handles[0] if n == 1 else list(handles)
+    return gen
+
+
+def _make_delete(raw):
+    def delete(*args):
+        # Accept (handles) and (n, handles), and a single handle
+        handles = args[-1]
+        if not isinstance(handles, (list, tuple, np.ndarray)):
+            handles = [handles]
+        handles = np.array(handles, np.uint32).ravel()
+        raw(len(handles), handles.ctypes)
+    return delete
+
+
+def _make_get(raw, nargs, ctypestr, sized):
+    # Returns the value(s) of the output argument, unless it is given
+    dtype = DTYPES[ctypestr.rstrip('*')]
+    wrapped = _wrap('', raw, [None] * (nargs - 1) +
+                    [_make_typed_pointer(dtype)])
+    def get(*args):
+        if len(args) == nargs:
+            return wrapped(*args)
+        values = np.zeros(16, dtype)
+        raw(*(args + (values.ctypes,)))
+        n = GET_SIZES.get(args[-1], 1) if sized else 1
+        values = [v.item() for v in values[:n]]
+        if dtype is np.uint8:
+            values = [bool(v) for v in values]
+        return values[0] if n == 1 else tuple(values)
+    return get
+
+
+def _make_get_log(raw, NS, getivname, lengthname):
+    def get_log(handle):
+        n = NS[getivname](handle, lengthname)
+        if n <= 0:
+            return b''
+        length = ctypes.c_int()
+        text = ctypes.create_string_buffer(n)
+        raw(handle, n, ctypes.byref(length), text)
+        return text.raw[:length.value]
+    return get_log
+
+
+def _make_get_active(raw):
+    def get_active(program, index):
+        length, size, gtype = ctypes.c_int(), ctypes.c_int(), ctypes.c_uint()
+        name = ctypes.create_string_buffer(256)
+        raw(program, index, 256, ctypes.byref(length), ctypes.byref(size),
+            ctypes.byref(gtype), name)
+        return name.value, size.value, gtype.value
+    return get_active
+
+
+def _make_get_attached_shaders(raw):
+    def get_attached_shaders(program):
+        count, shaders = ctypes.c_int(), (ctypes.c_uint * 64)()
+        raw(program, 64, ctypes.byref(count), shaders)
+        return list(shaders[:count.value])
+    return get_attached_shaders
+
+
+def _make_shader_source(raw):
+    def shader_source(shader, source, *args):
+        if len(args) == 2:  # The C API
+            return raw(shader, source, *args)
+        if isinstance(source, (str, bytes)):
+            source = [source]
+        source = [_char_pointer(s) for s in source]
+        strings = (ctypes.c_char_p * len(source))(*source)
+        raw(shader, len(source), strings, None)
+    return shader_source
+
+
+def _make_get_string(raw):
+    raw.restype = ctypes.c_char_p
+    return raw
+
+
+def _make_read_pixels(raw):
+    sizes = {const.GL_ALPHA: 1, const.GL_RGB: 3, const.GL_RGBA: 4}
+    def read_pixels(x, y, width, height, format, type, *args):
+        if args:  # The C API
+            return raw(x, y, width, height, format, type,
+                       _void_pointer(args[0]))
+        n = width * height * sizes.get(format, 4)
+        if type != const.GL_UNSIGNED_BYTE:
+            n *= 2  # The other types are (packed) shorts
+        pixels = ctypes.create_string_buffer(n)
+        raw(x, y, width, height, format, type, pixels)
+        return pixels.raw
+    return read_pixels
+
+
+def _make_get_shader_precision_format(raw):
+    def get_shader_precision_format(shadertype, precisiontype):
+        range, precision = (ctypes.c_int * 2)(), ctypes.c_int()
+        raw(shadertype, precisiontype, range, ctypes.byref(precision))
+        return tuple(range), precision.value
+    return get_shader_precision_format
+
+
+def _make_group(NS, names):
+    # E.g. glTexParameter calls glTexParameterf, glTexParameteri, or the
+    # "v" variants for sequences
+    funcs = {}
+    for name in names:
+        funcs[name[-2:] if name.endswith('v') else name[-1:]] = NS[name]
+    def group(*args):
+        value = args[-1]
+        if isinstance(value, (float, np.floating)):
+            return funcs['f'](*args)
+        elif isinstance(value, (int, np.integer)):
+            return funcs['i'](*args)
+        elif isinstance(value, np.ndarray) and value.dtype.kind == 'f':
+            return funcs['fv'](*args)
+        return funcs['iv'](*args)
+    return group
+
+
+def _create_functions(NS, signatures, groups):
+    for funcname, restype, argtypes in signatures:
+        raw = _get_proc(funcname, _ctype(restype),
+                        [_ctype(t) for t in argtypes])
+        if raw is None:
+            NS[funcname] = _make_unavailable_func(funcname)
+            continue
+        nargs = len(argtypes)
+        if funcname in _GEN_FUNCTIONS:
+            func = _make_gen(raw)
+        elif funcname in _DELETE_FUNCTIONS:
+            func = _make_delete(raw)
+        elif funcname in ('glGetBooleanv', 'glGetIntegerv', 'glGetFloatv',
+                          'glGetVertexAttribfv', 'glGetVertexAttribiv'):
+            func = _make_get(raw, nargs, argtypes[-1], True)
+        elif funcname.startswith('glGet') and funcname.endswith('iv') and \
+                not funcname.startswith('glGetUniform') or \
+                funcname.startswith('glGetTexParameter'):
+            func = _make_get(raw, nargs, argtypes[-1], False)
+        elif funcname in ('glGetShaderInfoLog', 'glGetShaderSource'):
+            lengthname = (const.GL_INFO_LOG_LENGTH if 'Log' in funcname
+                          else const.GL_SHADER_SOURCE_LENGTH)
+            func = _make_get_log(raw, NS, 'glGetShaderiv', lengthname)
+        elif funcname == 'glGetProgramInfoLog':
+            func = _make_get_log(raw, NS, 'glGetProgramiv',
+                                 const.GL_INFO_LOG_LENGTH)
+        elif funcname in ('glGetActiveAttrib', 'glGetActiveUniform'):
+            func = _make_get_active(raw)
+        elif funcname == 'glGetAttachedShaders':
+            func = _make_get_attached_shaders(raw)
+        elif funcname == 'glShaderSource':
+            func = _make_shader_source(raw)
+        elif funcname == 'glGetString':
+            func = _make_get_string(raw)
+        elif funcname == 'glReadPixels':
+            func = _make_read_pixels(raw)
+        elif funcname == 'glGetShaderPrecisionFormat':
+            func = _make_get_shader_precision_format(raw)
+        else:
+            func = _wrap(funcname, raw, [_converter(t) for t in argtypes])
+        NS[funcname] = func
+    for groupname, names in groups.items():
+        NS[groupname] = _make_group(NS, names)
+
+
+def create_functions(NS, signatures, groups=None):
+    """ Create the functions in the namespace NS from their signatures: a
+    list of (name, restype, argtypes) tuples with the C types as strings.
+    groups maps the name of a function that represents a group of
+    functions (e.g. glTexParameter) to the names of these functions.
+    """
+    groups = groups or {}
+    _namespaces.append((NS, signatures, groups))
+    if _library is None:
+        load_library()
+    else:
+        _create_functions(NS, signatures, groups)
+
+
+def build_stub_library(filename):
+    """ Build a shared library that has each function of the ctypes target
+    as a function that does nothing but count the calls (in the global
+    int "stub_calls") and return zero. Useful for tests and benchmarks on
+    systems without a GPU. Needs a C compiler (the CC environment variable,
+    or cc). Returns the filename.
+    """
+    from vispy.gl import _gl_ctypes, _gl_ctypes_ext
+    lines = ['int stub_calls = 0;']
+    for NS, signatures, groups in _namespaces:
+        for funcname, restype, argtypes in signatures:
+            lines.append('long %s() { stub_calls++; return 0; }' % funcname)
+    source = os.path.splitext(filename)[0] + '.c'
+    with open(source, 'w') as f:
+        f.write('\n'.join(sorted(set(lines))) + '\n')
+    cc = os.environ.get('CC', 'cc')
+    subprocess.check_call([cc, '-shared', '-fPIC', '-o', filename, source])
+    return filename
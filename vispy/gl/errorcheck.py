@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2013, Vispy Development Team.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+""" Checking for GL errors, after each call, once per frame, or not at all.
+
+Calling glGetError() after each call (as PyOpenGL does by default) makes
+errors easy to locate, but it costs a round trip to the driver per call.
+The mode is set with the gl_error_check config option, or the error_check
+argument of set_gl_target():
+
+* 'call': check after each call, and raise a GLError from the call that
+  caused the error. For the 'gl' target this is PyOpenGL's own check.
+* 'frame': check once per frame, before the Canvas swaps the buffers
+  (see frame_check()). The GLError lists the most recent GL calls if
+  tracing is enabled (see vispy.gl.tracer), as context for the error.
+* 'off': do not check.
+
+The 'record' target never has errors, so it is never checked.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+from vispy.gl import _constants as const
+
+
+MODES = ('call', 'frame', 'off')
+
+# The names of the error codes
+ERRORS = dict((getattr(const, name), name) for name in
+              ('GL_INVALID_ENUM', 'GL_INVALID_VALUE', 'GL_INVALID_OPERATION',
+               'GL_INVALID_FRAMEBUFFER_OPERATION', 'GL_OUT_OF_MEMORY'))
+
+# glGetError returns at most one error per flag of the implementation; do
+# not loop forever if the context is lost
+MAX_ERRORS = 8
+
+# The current mode
+_mode = 'call'
+
+
+
+class GLError(RuntimeError):
+    """ Raised when glGetError reports an error. The codes attribute has
+    the error codes.
+    """
+    def __init__(self, message, codes=()):
+        RuntimeError.__init__(self, message)
+        self.codes = list(codes)
+
+
+
+def get_errors(getError=None):
+    """ Get the codes of the pending errors (an empty list if there are
+    none). This clears the errors.
+    """
+    if getError is None:
+        from vispy.gl import glGetError as getError
+    codes = []
+    for i in range(MAX_ERRORS):
+        code = getError()
+        if not code:
+            break
+        codes.append(code)
+    return codes
+
+
+def _format_codes(codes):
+    return ', '.join('%s (0x%x)' % (ERRORS.get(code, 'unknown error'), code)
+                     for code in codes)
+
+
+def check_error(when=''):
+    """ Raise a GLError if there are pending errors. The message says
+    when the error occurred (e.g. "in the last frame"), and lists the most
+    recent GL calls if tracing is enabled.
+    """
+    from vispy.gl import tracer
+    codes = get_errors()
+    if not codes:
+        return
+    message = 'GL error %s%s.' % (_format_codes(codes),
+                                 ' ' + when if when else '')
+    calls = tracer.recent_calls()
+    if calls:
+        message += ' The most recent GL calls were:\n  '
+        message += '\n  '.join(calls)
+    else:
+        message += (' Enable tracing (the gl_debug config option) to see '
+                    'the most recent GL calls.')
+    raise GLError(message, codes)
+
+
+def frame_check():
+    """ Check for errors if the mode is 'frame'. Called by the Canvas
+    before it swaps the buffers.
+    """
+    if _mode == 'frame':
+        check_error('in the last frame')
+
+
+def wrap(funcname, func, getError):
+    """ Wrap a GL function to check for errors after each call.
+    """
+    def checked(*args, **kwds):
+        ret = func(*args, **kwds)
+        code = getError()
+        if code:
+            codes = [code] + get_errors(getError)
+            raise GLError('GL error %s in %s.' % (_format_codes(codes),
+                                                 funcname), codes)
+        return ret
+
+    checked.__name__ = funcname
+    checked.__doc__ = func.__doc__
+    checked.__wrapped__ = func
+    return checked
+
+
+def _set_mode(mode, target):
+    """ Called by set_gl_target(). PyOpenGL's own error checking (for the
+    'gl' target) is set when the functions are resolved, so that PyOpenGL
+    is not imported here.
+    """
+    global _mode
+    if mode not in MODES:
+        raise ValueError('Invalid GL error check mode %r, use one of %s.'
+                         % (mode, ', '.join(MODES)))
+    _mode = 'off' if target == 'record' else mode
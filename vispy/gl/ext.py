@@ -4,4 +4,14 @@ OpenGL ES 2.0 extensions.
 
 from ._constants_ext import *
 
-# Filled with functions when vispy.gl is imported
+# Filled with functions when vispy.gl resolves the functions of its target
+
+
+def __getattr__(name):
+    # Called for names that are not in this namespace (Python 3.7+)
+    if name.startswith('gl'):
+        from vispy import gl
+        gl._resolve_functions()
+        if name in globals():
+            return globals()[name]
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
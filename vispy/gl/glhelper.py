@@ -50,6 +50,18 @@ def get_gl_functions_from_pyopengl(NS, funcnames):
         NS[funcname] = func
 
 
+def set_error_checking(enabled):
+    """ Enable or disable the glGetError() call that PyOpenGL does after
+    each call. This uses the switch that PyOpenGL uses between glBegin and
+    glEnd, so it can be changed at any time.
+    """
+    from OpenGL.raw.GL._errors import _error_checker
+    if enabled:
+        _error_checker.onEnd()
+    else:
+        _error_checker.onBegin()
+
+
 def fix(NS):
     """ Apply some fixes and patches.
     """
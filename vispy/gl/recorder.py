@@ -0,0 +1,437 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2013, Vispy Development Team.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+""" Helper for the vispy.gl._record module: a "null" OpenGL ES 2.0
+implementation that does not draw anything, but records the calls.
+
+It allocates fake handles, keeps track of the bound objects and enabled
+capabilities, emulates shader compilation and program linking (using the
+declarations in the shader source), and appends each call to a compact
+command log. This makes it possible to run vispy.oogl and the visuals
+without a context, e.g. to count the GL calls that a frame issues::
+
+    gl.set_gl_target('record')
+    start = len(default_recorder.commands)
+    ... draw a frame ...
+    print(default_recorder.stats(start))
+
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import re
+
+from vispy.gl import _constants as const
+from vispy.gl.tracer import UPLOAD_FUNCTIONS, _nbytes
+
+
+# The object kinds, by the suffix of the glGenXxx, glDeleteXxx, glIsXxx
+# and glBindXxx functions
+KINDS = {
+    'Buffer': 'buffer',
+    'Texture': 'texture',
+    'Framebuffer': 'framebuffer',
+    'Renderbuffer': 'renderbuffer',
+    'VertexArray': 'vertexarray',
+    'Program': 'program',
+    'Shader': 'shader',
+    }
+
+# Values returned by glGetIntegerv and friends for the implementation limits
+LIMITS = {
+    const.GL_MAX_TEXTURE_SIZE: 4096,
+    const.GL_MAX_CUBE_MAP_TEXTURE_SIZE: 4096,
+    const.GL_MAX_RENDERBUFFER_SIZE: 4096,
+    const.GL_MAX_VIEWPORT_DIMS: (4096, 4096),
+    const.GL_MAX_VERTEX_ATTRIBS: 16,
+    const.GL_MAX_VERTEX_UNIFORM_VECTORS: 256,
+    const.GL_MAX_FRAGMENT_UNIFORM_VECTORS: 256,
+    const.GL_MAX_VARYING_VECTORS: 8,
+    const.GL_MAX_TEXTURE_IMAGE_UNITS: 16,
+    const.GL_MAX_VERTEX_TEXTURE_IMAGE_UNITS: 16,
+    const.GL_MAX_COMBINED_TEXTURE_IMAGE_UNITS: 32,
+    }
+
+# Values returned by glGetString
+STRINGS = {
+    const.GL_VENDOR: b'vispy',
+    const.GL_RENDERER: b'vispy record',
+    const.GL_VERSION: b'OpenGL ES 2.0 (vispy record)',
+    const.GL_SHADING_LANGUAGE_VERSION: b'OpenGL ES GLSL ES 1.00',
+    const.GL_EXTENSIONS: b'',
+    }
+
+# The glGetXxx parameters that query a binding
+BINDING_QUERIES = {
+    const.GL_ARRAY_BUFFER_BINDING: const.GL_ARRAY_BUFFER,
+    const.GL_ELEMENT_ARRAY_BUFFER_BINDING: const.GL_ELEMENT_ARRAY_BUFFER,
+    const.GL_FRAMEBUFFER_BINDING: const.GL_FRAMEBUFFER,
+    const.GL_RENDERBUFFER_BINDING: const.GL_RENDERBUFFER,
+    const.GL_CURRENT_PROGRAM: 'program',
+    }
+
+GL_COMPLETION_STATUS = 0x91B1
+
+# This matches the name of an element of an array, e.g. "name[3]"
+_array_element = re.compile(r'^(?P<name>.+)\[(?P<index>\d+)\]$')
+
+
+
+def _describe(arg):
+    """ Get a compact representation of an argument for the command log:
+    data is replaced by its size.
+    """
+    if hasattr(arg, 'nbytes'):
+        return '<%i bytes>' % arg.nbytes
+    elif isinstance(arg, bytes) and len(arg) > 32:
+        return '<%i bytes>' % len(arg)
+    return arg
+
+
+def _to_str(name):
+    if isinstance(name, bytes):
+        return name.decode('utf-8')
+    return name
+
+
+def _active_variables(declarations):
+    """ Turn the (name, gtype) tuples of parse_declarations() into the
+    active variables as the GL reports them: a list of (name, size, gtype),
+    in which arrays are a single "name[0]" entry, and a dict that maps
+    each name (including the array elements) to its location.
+    """
+    variables, arrays, locations = [], {}, {}
+    for name, gtype in declarations:
+        locations[name] = len(locations)
+        m = _array_element.match(name)
+        if m:
+            base, index = m.group('name'), int(m.group('index'))
+            if base not in arrays:
+                arrays[base] = len(variables)
+                variables.append([base + '[0]', 0, gtype])
+                locations[base] = locations[name]
+            variables[arrays[base]][1] = index + 1
+        else:
+            variables.append([name, 1, gtype])
+    return [tuple(v) for v in variables], locations
+
+
+
+class Recorder(object):
+    """ State and command log of the "record" GL target.
+
+    Attributes
+    ----------
+    commands : list
+        The command log: a (name, args) tuple for each call, in which data
+        arguments (arrays, long byte strings) are replaced by a string
+        with their size.
+    bindings : dict
+        The handle of the bound object per target (e.g. GL_ARRAY_BUFFER),
+        with (target, unit) for textures, and 'program' for the current
+        program.
+    capabilities : set
+        The enabled capabilities (glEnable).
+    """
+
+    def __init__(self):
+        self.commands = []
+        self._nbytes = []
+        self.reset()
+
+
+    def reset(self):
+        """ Forget all objects and state, and clear the command log.
+        """
+        del self.commands[:]
+        del self._nbytes[:]
+        self.bindings = {}
+        self.capabilities = set([const.GL_DITHER])
+        self.viewport = (0, 0, 0, 0)
+        self._unit = 0
+        self._last_handle = 0
+        self._objects = {}  # handle -> kind
+        self._shaders = {}  # handle -> dict(type, source)
+        self._programs = {}  # handle -> dict(shaders, linked, log, ...)
+
+
+    def stats(self, start=0):
+        """ Get the number of calls, the number of bytes uploaded to
+        buffers and textures, and the calls per function, for the commands
+        from index start in the command log. Returns a dict with "calls",
+        "bytes" and "functions".
+        """
+        functions = {}
+        for name, args in self.commands[start:]:
+            functions[name] = functions.get(name, 0) + 1
+        return dict(calls=len(self.commands) - start,
+                    bytes=sum(self._nbytes[start:]),
+                    functions=functions)
+
+
+    def objects(self, kind=None):
+        """ Get the handles of the live objects, optionally of one kind
+        (e.g. 'buffer' or 'program').
+        """
+        return sorted(handle for handle, k in self._objects.items()
+                      if kind is None or k == kind)
+
+
+    def function(self, funcname):
+        """ Create the function with the given name, which records its
+        calls and emulates its effect.
+        """
+        handler = self._get_handler(funcname)
+        index = UPLOAD_FUNCTIONS.get(funcname)
+        commands, nbytes = self.commands, self._nbytes
+
+        def func(*args):
+            commands.append((funcname, tuple(_describe(a) for a in args)))
+            if index is not None and len(args) > index:
+                nbytes.append(_nbytes(args[index]))
+            else:
+                nbytes.append(0)
+            if handler is not None:
+                return handler(*args)
+
+        func.__name__ = funcname
+        return func
+
+
+    def _get_handler(self, funcname):
+        handler = getattr(self, '_' + funcname, None)
+        if handler is not None:
+            return handler
+        for prefix, method in [('glGen', self._gen),
+                               ('glDelete', self._delete),
+                               ('glIs', self._is),
+                               ('glBind', self._bind)]:
+            if funcname.startswith(prefix):
+                suffix = funcname[len(prefix):]
+                if suffix.endswith('s'):
+                    suffix = suffix[:-1]
+                if suffix in KINDS:
+                    return lambda *args: method(KINDS[suffix], *args)
+        if funcname.startswith('glGet') and funcname[-1] == 'v' and \
+                funcname[5:-1] in ('Integer', 'Float', 'Boolean'):
+            return self._get
+
+
+    ## Objects
+
+    def _new_handle(self, kind):
+        self._last_handle += 1
+        self._objects[self._last_handle] = kind
+        return self._last_handle
+
+
+    def _gen(self, kind, n=1, *args):
+        handles = [self._new_handle(kind) for i in range(n)]
+        return handles[0] if n == 1 else handles
+
+
+    def _delete(self, kind, *args):
+        # Accept (handle), (handles) and (n, handles)
+        handles = args[-1]
+        if not isinstance(handles, (list, tuple)):
+            handles = [handles]
+        for handle in handles:
+            if self._objects.get(handle) == kind:
+                del self._objects[handle]
+                self._shaders.pop(handle, None)
+                self._programs.pop(handle, None)
+                for key, value in list(self.bindings.items()):
+                    if value == handle:
+                        del self.bindings[key]
+
+
+    def _is(self, kind, handle):
+        return self._objects.get(handle) == kind
+
+
+    def _bind(self, kind, *args):
+        if kind == 'vertexarray':
+            self.bindings['vertexarray'] = args[0]
+        elif kind == 'texture':
+            self.bindings[(args[0], self._unit)] = args[1]
+        elif len(args) == 2:
+            self.bindings[args[0]] = args[1]
+
+
+    def _glUseProgram(self, handle):
+        self.bindings['program'] = handle
+
+
+    def _glActiveTexture(self, unit):
+        self._unit = unit - const.GL_TEXTURE0
+
+
+    ## State
+
+    def _glEnable(self, cap):
+        self.capabilities.add(cap)
+
+
+    def _glDisable(self, cap):
+        self.capabilities.discard(cap)
+
+
+    def _glIsEnabled(self, cap):
+        return cap in self.capabilities
+
+
+    def _glViewport(self, x, y, w, h):
+        self.viewport = (x, y, w, h)
+
+
+    def _get(self, pname, *args):
+        if pname in LIMITS:
+            return LIMITS[pname]
+        elif pname in BINDING_QUERIES:
+            return self.bindings.get(BINDING_QUERIES[pname], 0)
+        elif pname == const.GL_VIEWPORT:
+            return self.viewport
+        elif pname == const.GL_ACTIVE_TEXTURE:
+            return const.GL_TEXTURE0 + self._unit
+        elif pname == const.GL_TEXTURE_BINDING_2D:
+            return self.bindings.get((const.GL_TEXTURE_2D, self._unit), 0)
+        return 0
+
+
+    def _glGetString(self, name):
+        return STRINGS.get(name, b'')
+
+
+    def _glGetError(self):
+        return const.GL_NO_ERROR
+
+
+    def _glCheckFramebufferStatus(self, target):
+        return const.GL_FRAMEBUFFER_COMPLETE
+
+
+    ## Shaders and programs
+
+    def _glCreateShader(self, type):
+        handle = self._new_handle('shader')
+        self._shaders[handle] = dict(type=type, source='')
+        return handle
+
+
+    def _glShaderSource(self, handle, source, *args):
+        if isinstance(source, (list, tuple)):
+            source = ''.join(_to_str(s) for s in source)
+        self._shaders[handle]['source'] = _to_str(source)
+
+
+    def _glGetShaderiv(self, handle, pname):
+        if pname == const.GL_COMPILE_STATUS:
+            return True
+        elif pname == const.GL_SHADER_TYPE:
+            return self._shaders[handle]['type']
+        return 0
+
+
+    def _glGetShaderInfoLog(self, handle):
+        return b''
+
+
+    def _glCreateProgram(self):
+        handle = self._new_handle('program')
+        self._programs[handle] = dict(shaders=[], linked=False, log=b'',
+                                      attributes=[], uniforms=[],
+                                      attribute_locations={},
+                                      uniform_locations={})
+        return handle
+
+
+    def _glAttachShader(self, program, shader):
+        shaders = self._programs[program]['shaders']
+        if shader not in shaders:
+            shaders.append(shader)
+
+
+    def _glDetachShader(self, program, shader):
+        shaders = self._programs[program]['shaders']
+        if shader in shaders:
+            shaders.remove(shader)
+
+
+    def _glGetAttachedShaders(self, program):
+        return list(self._programs[program]['shaders'])
+
+
+    def _glLinkProgram(self, handle):
+        # Get the active variables from the declarations in the source
+        from vispy.oogl.shader import ShaderError, parse_declarations
+        program = self._programs[handle]
+        attributes, uniforms, seen = [], [], set()
+        try:
+            for shader in program['shaders']:
+                shader = self._shaders[shader]
+                a, u = parse_declarations(shader['source'])
+                if shader['type'] == const.GL_VERTEX_SHADER:
+                    attributes.extend(a)
+                uniforms.extend(v for v in u if v[0] not in seen)
+                seen.update(v[0] for v in u)
+        except ShaderError as err:
+            program['linked'], program['log'] = False, str(err).encode()
+            return
+        program['attributes'], program['attribute_locations'] = \
+            _active_variables(attributes)
+        program['uniforms'], program['uniform_locations'] = \
+            _active_variables(uniforms)
+        program['linked'], program['log'] = True, b''
+
+
+    def _glGetProgramiv(self, handle, pname):
+        program = self._programs[handle]
+        if pname == const.GL_LINK_STATUS:
+            return program['linked']
+        elif pname in (const.GL_VALIDATE_STATUS, GL_COMPLETION_STATUS):
+            return True
+        elif pname == const.GL_ACTIVE_ATTRIBUTES:
+            return len(program['attributes'])
+        elif pname == const.GL_ACTIVE_UNIFORMS:
+            return len(program['uniforms'])
+        elif pname == const.GL_ATTACHED_SHADERS:
+            return len(program['shaders'])
+        return 0
+
+
+    def _glGetProgramInfoLog(self, handle):
+        return self._programs[handle]['log']
+
+
+    def _glGetActiveAttrib(self, handle, index):
+        name, size, gtype = self._programs[handle]['attributes'][index]
+        return name.encode('utf-8'), size, gtype
+
+
+    def _glGetActiveUniform(self, handle, index):
+        name, size, gtype = self._programs[handle]['uniforms'][index]
+        return name.encode('utf-8'), size, gtype
+
+
+    def _glGetAttribLocation(self, handle, name):
+        locations = self._programs[handle]['attribute_locations']
+        return locations.get(_to_str(name), -1)
+
+
+    def _glGetUniformLocation(self, handle, name):
+        locations = self._programs[handle]['uniform_locations']
+        return locations.get(_to_str(name), -1)
+
+
+
+# The recorder that is used by the functions of the "record" target
+default_recorder = Recorder()
+
+
+def create_functions(NS, funcnames):
+    """ Create the recording functions with the given names in the
+    namespace NS.
+    """
+    for funcname in funcnames:
+        NS[funcname] = default_recorder.function(funcname)
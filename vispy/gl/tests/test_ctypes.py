@@ -0,0 +1,161 @@
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team
+# All rights reserved.
+# -----------------------------------------------------------------------------
+import os
+import ctypes
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from vispy import gl
+from vispy.gl import ctypeshelper
+
+
+def _pointer_value(arg, ctype):
+    # Get the first value pointed to by a converted pointer argument
+    if not isinstance(arg, ctypes.c_void_p):
+        arg = ctypes.c_void_p.from_param(arg)
+    return ctypes.cast(arg, ctypes.POINTER(ctype))[0]
+
+
+
+# -----------------------------------------------------------------------------
+class ConversionTest(unittest.TestCase):
+
+    def test_typed_pointer(self):
+        convert = ctypeshelper._make_typed_pointer(np.float32)
+        # Arrays of the same kind and size are passed as they are
+        a = np.zeros(4, np.float32)
+        ctypes.memset(ctypes.c_void_p.from_param(convert(a)), 0xff, 4)
+        assert np.isnan(a[0])
+        # Others are converted
+        for value in ([3, 2], np.array([3, 2], np.int32),
+                      np.array([3, 2], np.float64)):
+            assert _pointer_value(convert(value), ctypes.c_float) == 3.0
+        assert convert(None) is None
+        convert = ctypeshelper._make_typed_pointer(np.uint32)
+        a = np.array([5], np.int32)
+        assert _pointer_value(convert(a), ctypes.c_uint) == 5
+
+    def test_void_pointer(self):
+        convert = ctypeshelper._void_pointer
+        assert convert(None) is None
+        assert convert(12) == 12
+        assert convert(np.int64(12)) == 12
+        assert convert(b'abc') == b'abc'
+        a = np.arange(6, dtype=np.uint8).reshape(2, 3)
+        assert _pointer_value(convert(a[:, 1:]), ctypes.c_ubyte) == 1
+        readonly = np.frombuffer(b'\x07', np.uint8)
+        assert _pointer_value(convert(readonly), ctypes.c_ubyte) == 7
+        assert _pointer_value(convert(bytearray(b'\x08')),
+                              ctypes.c_ubyte) == 8
+
+    def test_pyopengl_conventions(self):
+        def gen(n, handles):
+            for i in range(n):
+                ctypes.cast(handles, ctypes.POINTER(ctypes.c_uint))[i] = i + 1
+        gen = ctypeshelper._make_gen(gen)
+        assert gen(1) == 1
+        assert gen(2) == [1, 2]
+        
+        deleted = []
+        def delete(n, handles):
+            handles = ctypes.c_void_p.from_param(handles)
+            p = ctypes.cast(handles, ctypes.POINTER(ctypes.c_uint))
+            deleted.append([p[i] for i in range(n)])
+        delete = ctypeshelper._make_delete(delete)
+        delete(1, [3])
+        delete([4, 5])
+        delete(6)
+        assert deleted == [[3], [4, 5], [6]]
+        
+        def get(pname, values):
+            values = ctypes.c_void_p.from_param(values)
+            p = ctypes.cast(values, ctypes.POINTER(ctypes.c_int))
+            for i in range(4):
+                p[i] = i + 10
+        get = ctypeshelper._make_get(get, 2, 'GLint*', True)
+        assert get(gl.GL_MAX_TEXTURE_SIZE) == 10
+        assert get(gl.GL_VIEWPORT) == (10, 11, 12, 13)
+        values = np.zeros(4, np.int32)
+        get(gl.GL_VIEWPORT, values)
+        assert list(values) == [10, 11, 12, 13]
+
+    def test_group(self):
+        calls = []
+        NS = {}
+        for name in ('glTexParameterf', 'glTexParameterfv',
+                     'glTexParameteri', 'glTexParameteriv'):
+            NS[name] = (lambda name: lambda *args: calls.append(name))(name)
+        group = ctypeshelper._make_group(NS, sorted(NS))
+        group(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
+        group(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_S, 1.0)
+        group(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_S, np.zeros(1))
+        assert calls == ['glTexParameteri', 'glTexParameterf',
+                         'glTexParameterfv']
+
+
+
+# -----------------------------------------------------------------------------
+class StubLibraryTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._dirname = tempfile.mkdtemp()
+        filename = os.path.join(cls._dirname, 'glstub.so')
+        try:
+            ctypeshelper.build_stub_library(filename)
+        except Exception as err:
+            shutil.rmtree(cls._dirname)
+            raise unittest.SkipTest('Cannot build stub library: %s' % err)
+        ctypeshelper.load_library(filename)
+        gl.set_gl_target('ctypes', error_check='off')
+
+    @classmethod
+    def tearDownClass(cls):
+        gl.set_gl_target('gl')
+        ctypeshelper.load_library()
+        shutil.rmtree(cls._dirname)
+
+    def test_namespace(self):
+        from vispy.gl import _gl_ctypes, _gl
+        for name in dir(_gl):
+            if name.startswith('gl') and name != 'glhelper':
+                assert hasattr(_gl_ctypes, name), name
+        assert gl.glClear is _gl_ctypes.glClear
+
+    def test_calls(self):
+        calls = ctypes.c_int.in_dll(ctypeshelper._library, 'stub_calls')
+        n = calls.value
+        gl.glClear(gl.GL_COLOR_BUFFER_BIT)
+        gl.glClearColor(0, 0.5, 1.0, 1)
+        gl.glUniformMatrix4fv(0, 1, False, np.eye(4))
+        gl.glBufferData(gl.GL_ARRAY_BUFFER, 16, None, gl.GL_STATIC_DRAW)
+        gl.glBufferSubData(gl.GL_ARRAY_BUFFER, 0, 16, np.zeros(4))
+        gl.glVertexAttribPointer(0, 2, gl.GL_FLOAT, False, 8, 0)
+        gl.glShaderSource(1, 'void main() {}')
+        assert gl.glGetAttribLocation(1, 'a_position') == 0
+        assert gl.glGetShaderiv(1, gl.GL_COMPILE_STATUS) == 0
+        assert gl.glGetShaderInfoLog(1) == b''
+        assert gl.glGetIntegerv(gl.GL_VIEWPORT) == (0, 0, 0, 0)
+        assert gl.glGetActiveUniform(1, 0) == (b'', 0, 0)
+        gl.glTexParameter(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER,
+                          gl.GL_LINEAR)
+        gl.ext.glProgramBinary(1, 0, np.zeros(4, np.uint8), 4)
+        assert calls.value - n == 14
+
+    def test_error_check(self):
+        calls = ctypes.c_int.in_dll(ctypeshelper._library, 'stub_calls')
+        try:
+            gl.set_gl_target('ctypes', error_check='call')
+            n = calls.value
+            gl.glClear(gl.GL_COLOR_BUFFER_BIT)
+            assert calls.value - n == 2  # glClear and glGetError
+        finally:
+            gl.set_gl_target('ctypes', error_check='off')
+
+
+if __name__ == "__main__":
+    unittest.main()
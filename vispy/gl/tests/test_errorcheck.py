@@ -0,0 +1,94 @@
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team
+# All rights reserved.
+# -----------------------------------------------------------------------------
+import unittest
+
+import vispy
+from vispy import gl
+from vispy.gl import errorcheck, tracer
+
+
+class FakeGetError(object):
+    """ Replacement for glGetError that reports the given errors once.
+    """
+    def __init__(self, *codes):
+        self.codes = list(codes)
+    def __call__(self):
+        return self.codes.pop(0) if self.codes else gl.GL_NO_ERROR
+
+
+
+# -----------------------------------------------------------------------------
+class ErrorCheckTest(unittest.TestCase):
+
+    def tearDown(self):
+        gl.set_gl_target('gl')
+        tracer._set_enabled(False)
+        tracer.reset_stats()
+
+    def test_wrap(self):
+        getError = FakeGetError()
+        func = errorcheck.wrap('glFoo', lambda a: a * 2, getError)
+        assert func.__name__ == 'glFoo'
+        assert func(2) == 4
+        getError.codes = [gl.GL_INVALID_ENUM, gl.GL_INVALID_VALUE]
+        try:
+            func(2)
+        except errorcheck.GLError as err:
+            assert err.codes == [gl.GL_INVALID_ENUM, gl.GL_INVALID_VALUE]
+            assert 'GL_INVALID_ENUM' in str(err) and 'glFoo' in str(err)
+        else:
+            raise AssertionError('No GLError raised')
+        assert func(3) == 6  # The errors were cleared
+
+    def test_frame(self):
+        errorcheck._set_mode('frame', 'ctypes')
+        gl.glGetError = getError = FakeGetError()
+        errorcheck.frame_check()
+        # Without tracing
+        getError.codes = [gl.GL_INVALID_OPERATION]
+        self.assertRaises(gl.GLError, errorcheck.frame_check)
+        # With tracing, the message has the most recent calls
+        tracer._set_enabled(True)
+        func = tracer.wrap('glBindBuffer', lambda *args: None)
+        func(gl.GL_ARRAY_BUFFER, 3)
+        getError.codes = [gl.GL_INVALID_OPERATION]
+        try:
+            errorcheck.frame_check()
+        except gl.GLError as err:
+            assert 'in the last frame' in str(err)
+            assert 'glBindBuffer(GL_ARRAY_BUFFER, 3)' in str(err)
+        else:
+            raise AssertionError('No GLError raised')
+        # No check in the other modes
+        getError.codes = [gl.GL_INVALID_OPERATION]
+        errorcheck._set_mode('off', 'ctypes')
+        errorcheck.frame_check()
+        errorcheck._set_mode('call', 'ctypes')
+        errorcheck.frame_check()
+
+    def test_modes(self):
+        from OpenGL.raw.GL._errors import _error_checker
+        gl.set_gl_target('gl', error_check='off')
+        assert _error_checker._currentChecker == _error_checker.nullGetError
+        gl.set_gl_target('gl', error_check='call')
+        assert _error_checker._currentChecker != _error_checker.nullGetError
+        gl.set_gl_target('record', error_check='frame')
+        assert errorcheck._mode == 'off'
+        self.assertRaises(ValueError, gl.set_gl_target, 'gl', None, 'often')
+
+    def test_config(self):
+        from OpenGL.raw.GL._errors import _error_checker
+        try:
+            vispy.config['gl_error_check'] = 'frame'
+            assert errorcheck._mode == 'frame'
+            assert _error_checker._currentChecker == \
+                _error_checker.nullGetError
+        finally:
+            vispy.config['gl_error_check'] = 'call'
+        assert errorcheck._mode == 'call'
+
+
+if __name__ == "__main__":
+    unittest.main()
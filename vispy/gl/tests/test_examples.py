@@ -0,0 +1,163 @@
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team
+# All rights reserved.
+# -----------------------------------------------------------------------------
+""" Regression tests for the number of GL calls and the bytes uploaded per
+frame by each example, using the 'record' GL target and the 'null' app
+backend. When an optimization lowers the numbers, lower the budget too.
+"""
+import gc
+import os
+import sys
+import glob
+import unittest
+
+import vispy
+from vispy import gl
+from vispy import app
+from vispy.app.backends import null
+from vispy.gl.recorder import default_recorder
+from vispy.oogl.context import set_current_context
+
+try:
+    from importlib.machinery import SourceFileLoader
+    def load_source(name, path):
+        return SourceFileLoader(name, path).load_module()
+except ImportError:
+    from imp import load_source
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(__file__),
+                            '..', '..', '..', 'examples')
+
+# The number of frames that are drawn after the first
+FRAMES = 4
+
+# Budget per example: (calls, bytes) of the first frame (including the
+# initialize and resize events), and the maximum (calls, bytes) of the
+# frames after that.
+BUDGETS = {
+    'app/app-event.py': ((1, 0), (1, 0)),
+    'app/simple.py': ((2, 0), (2, 0)),
+    'benchmark/program-cache.py': ((1452, 1200), (0, 0)),
+    'benchmark/streaming-texture.py': ((59, 2764864), (27, 2764800)),
+    'demo/atom.py': ((63, 500000), (17, 500000)),
+    'demo/game_of_life.py': ((101, 36080), (37, 0)),
+    'demo/show-markers.py': ((76, 28080), (19, 0)),
+    'howto/animate-images.py': ((87, 6208), (20, 3072)),
+    'howto/animate-shape.py': ((67, 30092), (16, 0)),
+    'howto/display-lines.py': ((56, 1600), (10, 0)),
+    'howto/display-points.py': ((56, 240000), (13, 0)),
+    'howto/display-square.py': ((35, 48), (7, 0)),
+    'howto/hello-fbo.py': ((100, 128), (24, 0)),
+    'howto/start.py': ((2, 0), (2, 0)),
+    'rawgl/rawgl-cube.py': ((40, 196608), (18, 0)),
+    'spinning-cube2.py': ((78, 197160), (16, 0)),
+    'texturing.py': ((96, 197988), (19, 0)),
+    }
+
+# Examples that are not run, and why
+SKIP = {
+    'app/app-glut.py': 'selects the glut backend',
+    'app/app-pyglet.py': 'selects the pyglet backend',
+    'app/app-qt.py': 'selects the qt backend',
+    'benchmark/gl-call-overhead.py': 'does not draw',
+    'benchmark/import-time.py': 'does not draw',
+    'benchmark/matrix-utils.py': 'does not draw',
+    'benchmark/simple-glut.py': 'uses GLUT and PyOpenGL directly',
+    'benchmark/simple-vispy.py': 'runs the event loop on import',
+    'benchmark/transform-chain.py': 'does not draw',
+    'demo/boids.py': 'needs scipy',
+    'demo/cloud.py': 'uses (type, 1) fields, which need numpy < 1.17',
+    'demo/fireworks.py': 'uses (type, 1) fields, which need numpy < 1.17',
+    'demo/galaxy.py': 'uses (type, 1) fields, which need numpy < 1.17',
+    'demo/markers.py': 'module with shaders for show-markers.py',
+    'howto/client-buffers.py': 'needs scipy',
+    'howto/rotate-cube.py': 'adds int64 to uint32 in place, which needs '
+                            'numpy < 1.10',
+    'rawgl/rawgl-fireworks.py': 'uses (type, 1) fields, which need '
+                                'numpy < 1.17',
+    }
+
+
+def run_example(path, frames=FRAMES):
+    """ Load the example, create its canvas, and draw the given number of
+    frames after the first. Returns the (calls, bytes) of each frame.
+    """
+    name = 'example_' + os.path.splitext(os.path.basename(path))[0]
+    name = name.replace('-', '_')
+    sys.path.insert(0, os.path.dirname(path))
+    try:
+        module = load_source(name, path)
+    finally:
+        sys.path.pop(0)
+        sys.modules.pop(name, None)
+    if hasattr(module, 'Canvas'):
+        canvas = module.Canvas()
+    else:
+        canvas = [c for c in vars(module).values()
+                  if isinstance(c, app.Canvas)][0]
+    # Do not hide errors in the event handlers
+    for event in ('initialize', 'resize', 'paint'):
+        getattr(canvas.events, event).ignore_callback_errors = False
+    canvas.show()
+    result = []
+    for i in range(frames + 1):
+        # Objects of previous frames are queued for deletion now, and
+        # deleted at the end of the frame; those of previous examples
+        # are never deleted, because their canvas does not draw anymore
+        gc.collect()
+        start = len(default_recorder.commands)
+        canvas.update()
+        canvas.app.process_events()
+        stats = default_recorder.stats(start)
+        result.append((stats['calls'], stats['bytes']))
+    canvas.close()
+    for timer in list(null.ALL_TIMERS):
+        timer._vispy_timer.stop()
+    return result
+
+
+
+# -----------------------------------------------------------------------------
+class ExamplesTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._default_app = vispy.app.default_app
+        vispy.app.default_app = app.Application()
+        vispy.app.default_app.use('null')
+        gl.set_gl_target('record')
+
+    @classmethod
+    def tearDownClass(cls):
+        # Queue the objects of the examples for deletion (the queues are
+        # not drained, so no GL calls are made)
+        set_current_context(None)
+        gc.collect()
+        gl.set_gl_target('gl')
+        vispy.app.default_app = cls._default_app
+        del null.ALL_CANVASES[:]
+        del null.ALL_TIMERS[:]
+
+    def test_all_examples_listed(self):
+        paths = glob.glob(os.path.join(EXAMPLES_DIR, '*.py'))
+        paths += glob.glob(os.path.join(EXAMPLES_DIR, '*', '*.py'))
+        for path in paths:
+            example = os.path.relpath(path, EXAMPLES_DIR).replace('\\', '/')
+            assert example in BUDGETS or example in SKIP, example
+
+    def test_budgets(self):
+        errors = []
+        for example, (first, frame) in sorted(BUDGETS.items()):
+            path = os.path.join(EXAMPLES_DIR, example)
+            result = run_example(path)
+            budgets = [first] + [frame] * (len(result) - 1)
+            for i, (r, budget) in enumerate(zip(result, budgets)):
+                if r[0] > budget[0] or r[1] > budget[1]:
+                    errors.append('%s, frame %i: (calls, bytes) %r exceeds '
+                                  '%r' % (example, i, r, budget))
+        assert not errors, '\n'.join(errors)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team
+# All rights reserved.
+# -----------------------------------------------------------------------------
+import os
+import sys
+import subprocess
+import unittest
+
+from vispy import gl
+
+VISPY_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..')
+
+# Modules that should only be imported when drawing
+HEAVY = ('OpenGL', 'PyQt4', 'PyQt5', 'PySide', 'pyglet')
+
+
+def imported_modules(code):
+    """ Run the code in a fresh process and return the top level names of
+    the modules that it imported.
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([os.path.abspath(VISPY_DIR),
+                                         env.get('PYTHONPATH', '')])
+    code += '\nimport sys; print(" ".join(sys.modules))'
+    out = subprocess.check_output([sys.executable, '-c', code], env=env)
+    return set(name.split('.')[0] for name in out.decode().split())
+
+
+
+# -----------------------------------------------------------------------------
+@unittest.skipIf(not gl._LAZY, 'needs module __getattr__ (Python 3.7)')
+class LazyTest(unittest.TestCase):
+
+    def tearDown(self):
+        gl.set_gl_target('gl')
+
+    def test_import(self):
+        modules = imported_modules('import vispy, vispy.gl, vispy.oogl, '
+                                   'vispy.app')
+        assert not modules.intersection(HEAVY), modules.intersection(HEAVY)
+
+    def test_first_use(self):
+        modules = imported_modules('import vispy.gl; vispy.gl.glClear')
+        assert 'OpenGL' in modules
+
+    def test_resolve(self):
+        gl.set_gl_target('record')
+        assert 'glClear' not in vars(gl)
+        assert 'glTexImage3D' not in vars(gl.ext)
+        assert gl.glClear.__module__ == 'vispy.gl.recorder'
+        assert 'glClear' in vars(gl)
+        assert 'glTexImage3D' in vars(gl.ext)
+        # Submodules and misspelled names are not resolved
+        self.assertRaises(AttributeError, getattr, gl, 'glFoo')
+        self.assertRaises(AttributeError, getattr, gl, 'notamodule')
+        # dir() lists the functions
+        gl.set_gl_target('record')
+        assert 'glClear' in dir(gl)
@@ -0,0 +1,81 @@
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team
+# All rights reserved.
+# -----------------------------------------------------------------------------
+import unittest
+import numpy as np
+
+from vispy import gl
+from vispy.gl import _record as rgl
+from vispy.gl.recorder import default_recorder
+
+
+
+# -----------------------------------------------------------------------------
+class RecorderTest(unittest.TestCase):
+
+    def setUp(self):
+        default_recorder.reset()
+
+    def test_namespace(self):
+        for name in dir(gl):
+            if name.startswith('gl') and name != 'glhelper':
+                assert hasattr(rgl, name), name
+
+    def test_objects(self):
+        buffers = rgl.glGenBuffers(2)
+        texture = rgl.glGenTextures(1)
+        assert len(set(buffers + [texture])) == 3
+        assert rgl.glIsBuffer(buffers[0])
+        assert not rgl.glIsTexture(buffers[0])
+        rgl.glBindBuffer(gl.GL_ARRAY_BUFFER, buffers[0])
+        assert rgl.glGetIntegerv(gl.GL_ARRAY_BUFFER_BINDING) == buffers[0]
+        rgl.glDeleteBuffers(2, buffers)
+        assert not rgl.glIsBuffer(buffers[0])
+        assert rgl.glGetIntegerv(gl.GL_ARRAY_BUFFER_BINDING) == 0
+        assert default_recorder.objects() == [texture]
+        rgl.glEnable(gl.GL_BLEND)
+        assert rgl.glIsEnabled(gl.GL_BLEND)
+
+    def test_program(self):
+        vert = rgl.glCreateShader(gl.GL_VERTEX_SHADER)
+        rgl.glShaderSource(vert, """
+            attribute vec2 a_position;
+            uniform vec4 u_colors[3];
+            uniform float u_scale;
+            void main() {}""")
+        rgl.glCompileShader(vert)
+        assert rgl.glGetShaderiv(vert, gl.GL_COMPILE_STATUS)
+        program = rgl.glCreateProgram()
+        rgl.glAttachShader(program, vert)
+        rgl.glLinkProgram(program)
+        assert rgl.glGetProgramiv(program, gl.GL_LINK_STATUS)
+        assert rgl.glGetProgramiv(program, gl.GL_ACTIVE_ATTRIBUTES) == 1
+        assert rgl.glGetProgramiv(program, gl.GL_ACTIVE_UNIFORMS) == 2
+        assert rgl.glGetActiveUniform(program, 0) == (
+            b'u_colors[0]', 3, gl.GL_FLOAT_VEC4)
+        locs = [rgl.glGetUniformLocation(program, b'u_colors[%i]' % i)
+                for i in range(3)]
+        assert len(set(locs)) == 3
+        assert rgl.glGetUniformLocation(program, 'u_colors') == locs[0]
+        assert rgl.glGetUniformLocation(program, 'u_foo') == -1
+        assert rgl.glGetAttribLocation(program, 'a_position') >= 0
+
+    def test_log(self):
+        data = np.zeros(100, np.float32)
+        rgl.glClear(gl.GL_COLOR_BUFFER_BIT)
+        start = len(default_recorder.commands)
+        rgl.glBufferData(gl.GL_ARRAY_BUFFER, data.nbytes, data,
+                         gl.GL_STATIC_DRAW)
+        rgl.glBufferSubData(gl.GL_ARRAY_BUFFER, 0, 40, data[:10])
+        assert default_recorder.commands[-1] == (
+            'glBufferSubData', (gl.GL_ARRAY_BUFFER, 0, 40, '<40 bytes>'))
+        stats = default_recorder.stats(start)
+        assert stats['calls'] == 2
+        assert stats['bytes'] == 440
+        assert stats['functions'] == {'glBufferData': 1,
+                                      'glBufferSubData': 1}
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team
+# All rights reserved.
+# -----------------------------------------------------------------------------
+import unittest
+import numpy as np
+
+from vispy import gl
+from vispy.gl import tracer
+
+
+
+# -----------------------------------------------------------------------------
+class TracerTest(unittest.TestCase):
+
+    def setUp(self):
+        tracer.reset_stats()
+        tracer._set_enabled(True)
+
+    def tearDown(self):
+        tracer._set_enabled(False)
+        tracer.reset_stats()
+
+    def test_wrap(self):
+        func = tracer.wrap('glFoo', lambda a, b: a + b)
+        assert func.__name__ == 'glFoo'
+        assert func(1, 2) == 3
+        assert func(b=1, a=2) == 3
+        functions = tracer.stats()['functions']
+        assert functions['glFoo']['calls'] == 2
+        assert functions['glFoo']['time'] >= 0
+        assert functions['glFoo']['bytes'] == 0
+
+    def test_bytes(self):
+        func = tracer.wrap('glBufferSubData', lambda *args: None)
+        data = np.zeros(100, np.float32)
+        func(gl.GL_ARRAY_BUFFER, 0, data.nbytes, data)
+        func(gl.GL_ARRAY_BUFFER, 0, 4, b'abcd')
+        func(gl.GL_ARRAY_BUFFER, 0, 0, None)
+        assert tracer.stats()['functions']['glBufferSubData']['bytes'] == 404
+
+    def test_frames(self):
+        func = tracer.wrap('glFoo', lambda: None)
+        upload = tracer.wrap('glBufferData', lambda *args: None)
+        assert tracer.stats()['last_frame'] is None
+        for i in range(3):
+            func()
+            func()
+            upload(gl.GL_ARRAY_BUFFER, 8, np.zeros(2, np.float32), 0)
+            tracer.frame_end()
+        func()  # In the current frame
+        stats = tracer.stats()
+        assert stats['frames'] == 3
+        assert stats['per_frame']['calls'] == 3
+        assert stats['per_frame']['bytes'] == 8
+        assert stats['last_frame']['calls'] == 3
+        assert stats['last_frame']['functions']['glFoo'][0] == 2
+        assert stats['functions']['glFoo']['calls'] == 7
+        assert stats['functions']['glBufferData']['bytes'] == 24
+
+    def test_ring_buffer(self):
+        for i in range(tracer.MAX_FRAMES + 10):
+            tracer.frame_end()
+        assert tracer.stats()['frames'] == tracer.MAX_FRAMES
+
+    def test_disabled(self):
+        tracer._set_enabled(False)
+        tracer.frame_end()
+        assert tracer.stats()['frames'] == 0
+
+    def test_set_gl_target(self):
+        raw = gl.glClear
+        try:
+            gl.set_gl_target('trace')
+            assert gl.glClear is not raw
+            assert gl.glClear.__wrapped__ is raw
+            assert gl.stats()['enabled']
+        finally:
+            gl.set_gl_target('gl', trace=False)
+        assert gl.glClear is raw
+        assert not gl.stats()['enabled']
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2013, Vispy Development Team.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+""" Counters for the calls to the GL functions.
+
+When tracing is enabled (with set_gl_target(trace=True), or the gl_debug
+config option), each function in vispy.gl is wrapped to count its calls,
+the wall time spent in it, and for the functions that upload buffer or
+texture data, the number of bytes passed. At the end of each frame (the
+Canvas calls frame_end() after the paint event), the counts of that frame
+are stored in a ring buffer of recent frames. stats() gives a summary.
+The most recent calls (with their arguments) are kept as well, to give
+context to GL errors, see recent_calls().
+
+When tracing is disabled, the functions are not wrapped, so there is no
+overhead at all.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import time
+from collections import deque
+
+from vispy.util import ptime
+
+# The most precise clock available
+clock = getattr(time, 'perf_counter', ptime.time)
+
+# The functions for which the bytes of the data argument are counted,
+# and the index of that argument
+UPLOAD_FUNCTIONS = {
+    'glBufferData': 2,
+    'glBufferSubData': 3,
+    'glTexImage2D': 8,
+    'glTexSubImage2D': 8,
+    'glCompressedTexImage2D': 7,
+    'glCompressedTexSubImage2D': 8,
+    'glTexImage3D': 9,
+    'glTexSubImage3D': 10,
+    'glCompressedTexImage3D': 8,
+    'glCompressedTexSubImage3D': 10,
+    }
+
+# Number of frames kept in the ring buffer
+MAX_FRAMES = 120
+
+# Number of calls kept for recent_calls()
+MAX_RECENT = 16
+
+# name -> [calls, time, bytes] since the end of the last frame. These
+# lists are shared with the wrappers, so they are updated in place.
+_counters = {}
+
+# name -> [calls, time, bytes] of all finished frames
+_totals = {}
+
+# Per-frame summaries of recent frames, see frame_end()
+_frames = deque(maxlen=MAX_FRAMES)
+
+# (name, args) of the most recent calls
+_recent = deque(maxlen=MAX_RECENT)
+
+# Whether the functions in vispy.gl are wrapped
+_enabled = False
+
+
+
+def _nbytes(data):
+    """ Get the size in bytes of the data passed to an upload function.
+    """
+    try:
+        return data.nbytes
+    except AttributeError:
+        if isinstance(data, bytes):
+            return len(data)
+        return 0
+
+
+def wrap(funcname, func):
+    """ Wrap a GL function to count its calls, time, and (for upload
+    functions) bytes. Returns the wrapper.
+    """
+    counter = _counters.setdefault(funcname, [0, 0.0, 0])
+    index = UPLOAD_FUNCTIONS.get(funcname)
+    recent = _recent
+
+    if index is None:
+        def traced(*args, **kwds):
+            recent.append((funcname, args))
+            t0 = clock()
+            ret = func(*args, **kwds)
+            counter[1] += clock() - t0
+            counter[0] += 1
+            return ret
+    else:
+        def traced(*args, **kwds):
+            recent.append((funcname, args))
+            t0 = clock()
+            ret = func(*args, **kwds)
+            counter[1] += clock() - t0
+            counter[0] += 1
+            if len(args) > index:
+                counter[2] += _nbytes(args[index])
+            return ret
+
+    traced.__name__ = funcname
+    traced.__doc__ = func.__doc__
+    traced.__wrapped__ = func
+    return traced
+
+
+def frame_end():
+    """ Mark the end of a frame: move the counts since the previous call
+    to the ring buffer of frames. Does nothing if tracing is disabled.
+    """
+    if not _enabled:
+        return
+    functions = {}
+    calls, elapsed, nbytes = 0, 0.0, 0
+    for name, counter in _counters.items():
+        if counter[0]:
+            functions[name] = tuple(counter)
+            calls += counter[0]
+            elapsed += counter[1]
+            nbytes += counter[2]
+            total = _totals.setdefault(name, [0, 0.0, 0])
+            total[0] += counter[0]
+            total[1] += counter[1]
+            total[2] += counter[2]
+            counter[:] = [0, 0.0, 0]
+    _frames.append(dict(calls=calls, time=elapsed, bytes=nbytes,
+                        functions=functions))
+
+
+def stats():
+    """ Get a summary of the GL calls. Returns a dict with:
+
+    * enabled: whether tracing is enabled.
+    * frames: the number of frames in the ring buffer.
+    * per_frame: dict with the mean calls, time (in seconds) and bytes
+      per frame, over the frames in the ring buffer.
+    * last_frame: dict with the calls, time, bytes and functions (a dict
+      that maps each name to a tuple (calls, time, bytes)) of the last
+      frame, or None.
+    * functions: dict that maps the name of each function that was called
+      to a dict with its calls, time and bytes, in total (including the
+      current frame).
+    """
+    n = len(_frames)
+    per_frame = {}
+    for key in ('calls', 'time', 'bytes'):
+        per_frame[key] = sum(f[key] for f in _frames) / n if n else 0
+    functions = {}
+    for name in set(_totals) | set(_counters):
+        calls, elapsed, nbytes = _totals.get(name, (0, 0.0, 0))
+        counter = _counters.get(name, (0, 0.0, 0))
+        if calls or counter[0]:
+            functions[name] = dict(calls=calls + counter[0],
+                                   time=elapsed + counter[1],
+                                   bytes=nbytes + counter[2])
+    return dict(enabled=_enabled, frames=n, per_frame=per_frame,
+                last_frame=_frames[-1] if n else None,
+                functions=functions)
+
+
+def recent_calls():
+    """ Get a description of the most recent calls (the last one last),
+    e.g. "glBindBuffer(GL_ARRAY_BUFFER, 3)". Data arguments are replaced
+    by their size. Empty if tracing is disabled.
+    """
+    calls = []
+    for name, args in _recent:
+        args = [_describe(arg) for arg in args]
+        calls.append('%s(%s)' % (name, ', '.join(args)))
+    return calls
+
+
+def _describe(arg):
+    if hasattr(arg, 'nbytes'):
+        return '<%i bytes>' % arg.nbytes
+    elif isinstance(arg, bytes) and len(arg) > 32:
+        return '<%i bytes>' % len(arg)
+    return repr(arg)
+
+
+def reset_stats():
+    """ Reset all counters and clear the ring buffer of frames and the
+    recent calls.
+    """
+    for counter in _counters.values():
+        counter[:] = [0, 0.0, 0]
+    _totals.clear()
+    _frames.clear()
+    _recent.clear()
+
+
+def _set_enabled(enabled):
+    """ Called by set_gl_target().
+    """
+    global _enabled
+    _enabled = enabled
@@ -48,10 +48,9 @@ Most common oogl classes:
     
       * TextureCubeMap is not yet implemented
       * FBO's can only do 2D textures (not 3D textures or cube maps)
-      * Sharing of Shaders and RenderBuffers (between multiple ShaderProgram and
-        FrameBuffers, respecitively) is not well supported.
+      * Sharing of RenderBuffers (between multiple FrameBuffers) is not
+        well supported.
       * There is no support for texture mipmapping yet
-      * No support for compressed textures.
       * Besides the above, there might be the occasional bug, please report!
     
 """
@@ -59,10 +58,56 @@ Most common oogl classes:
 from __future__ import print_function, division, absolute_import
 
 from vispy import gl
+from .context import get_context_object
+
+
+# Extensions of OpenGL ES 2.0 whose functionality is part of desktop
+# OpenGL, so that desktop drivers do not necessarily report them
+_DESKTOP_CORE = ('texture_3D', 'element_index_uint', 'texture_float',
+                 'texture_half_float')
+
+
+def _get_extensions():
+    """ Get the names of the extensions of the current context as a set
+    (including the names without the GL_ and vendor prefix), or None if
+    they cannot be obtained (e.g. because there is no context yet). The
+    result is cached per context.
+    """
+    cache = get_context_object('extensions', dict)
+    if 'names' not in cache:
+        try:
+            extensions = gl.glGetString(gl.GL_EXTENSIONS)
+            version = gl.glGetString(gl.GL_VERSION)
+        except Exception:
+            return None
+        if not version:
+            return None
+        if not isinstance(extensions, bytes):
+            extensions = (extensions or '').encode('utf-8')
+        if not isinstance(version, bytes):
+            version = version.encode('utf-8')
+        names = set(extensions.decode('utf-8', 'replace').split())
+        names.update([name.split('_', 2)[-1] for name in list(names)])
+        if not version.startswith(b'OpenGL ES'):
+            names.update(_DESKTOP_CORE)
+        cache['names'] = names
+    return cache['names']
 
 
 def ext_available(extension_name):
-    return True # for now
+    """ Get whether the given extension is available in the current
+    context. The name can be given without the vendor prefix, e.g.
+    'texture_float' matches GL_OES_texture_float and GL_ARB_texture_float.
+    Returns True if the extensions cannot be queried (e.g. because there
+    is no context yet).
+    """
+    names = _get_extensions()
+    if names is None:
+        return True
+    if extension_name in names:
+        return True
+    # Also without the GL_ prefix, e.g. GL_texture_3D
+    return extension_name.startswith('GL_') and extension_name[3:] in names
 
 
 from .globject import GLObject
@@ -71,6 +116,16 @@ from .buffer import VertexBuffer, ElementBuffer
 from .buffer import ClientVertexBuffer, ClientElementBuffer
 from .data import Data
 from .texture import Texture, Texture2D, Texture3D, TextureCubeMap
+from .texture import StreamingTexture2D, CompressedTexture2D
+from .atlas import TextureAtlas
+from .uploader import UploadScheduler
 from .shader import VertexShader, FragmentShader
 from .framebuffer import FrameBuffer, RenderBuffer
 from .program import Program
+from .variable import UniformGroup
+from .variable import get_uniform_stats, reset_uniform_stats
+from .context import set_current_context, get_current_context
+from .cache import ShaderCache, get_shader_cache
+from .cache import ProgramBinaryCache, get_program_binary_cache
+from .commandlist import CommandList, CommandListError
+from .deletion import DeletionQueue, get_deletion_queue
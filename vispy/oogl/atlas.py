@@ -0,0 +1,417 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2013, Vispy Development Team.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+""" Definition of the TextureAtlas class.
+
+A texture atlas packs many small images (glyphs, markers, icons) into
+a single large Texture2D. Drawing many of them then requires only one
+texture bind; each image is addressed through its UV rectangle.
+
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+
+from .texture import Texture2D
+
+
+
+class AtlasError(RuntimeError):
+    """ Raised when an image cannot be placed in a TextureAtlas.
+    """
+    pass
+
+
+
+class SkylinePacker(object):
+    """ Bottom-left skyline bin packer.
+
+    The skyline is a list of horizontal segments (x, y, width) that
+    describe the top edge of the packed area. A new rectangle is placed
+    at the position where it ends up lowest (ties are broken by the
+    narrowest fit), after which the skyline is updated.
+
+    Parameters
+    ----------
+    width : int
+        The width of the bin.
+    height : int
+        The height of the bin.
+    """
+
+    def __init__(self, width, height):
+        self._width = int(width)
+        self._height = int(height)
+        self.reset()
+
+
+    def reset(self):
+        """ Remove all packed rectangles. """
+        self._skyline = [[0, 0, self._width]]
+
+
+    @property
+    def width(self):
+        """ The width of the bin. """
+        return self._width
+
+
+    @property
+    def height(self):
+        """ The height of the bin. """
+        return self._height
+
+
+    def _fit(self, index, w, h):
+        """ Return the y position at which a rectangle of size (w, h)
+        fits when its left edge is placed at skyline node index, or
+        None if it does not fit.
+        """
+        x, y, _ = self._skyline[index]
+        if x + w > self._width:
+            return None
+        remaining = w
+        i = index
+        while remaining > 0:
+            if i >= len(self._skyline):
+                return None
+            y = max(y, self._skyline[i][1])
+            if y + h > self._height:
+                return None
+            remaining -= self._skyline[i][2]
+            i += 1
+        return y
+
+
+    def pack(self, w, h):
+        """ Find a place for a rectangle of size (w, h).
+
+        Returns the (x, y) position of the rectangle, or None if
+        it does not fit.
+        """
+        w, h = int(w), int(h)
+        if w <= 0 or h <= 0:
+            raise ValueError('Rectangle to pack must have a positive size.')
+
+        # Find the node that gives the lowest top edge
+        best = None
+        best_key = None
+        for index in range(len(self._skyline)):
+            y = self._fit(index, w, h)
+            if y is None:
+                continue
+            key = (y + h, self._skyline[index][2])
+            if best_key is None or key < best_key:
+                best_key = key
+                best = index, self._skyline[index][0], y
+        if best is None:
+            return None
+
+        # Insert new node and shrink the nodes it covers
+        index, x, y = best
+        self._skyline.insert(index, [x, y + h, w])
+        i = index + 1
+        while i < len(self._skyline):
+            node, prev = self._skyline[i], self._skyline[i-1]
+            shrink = prev[0] + prev[2] - node[0]
+            if shrink <= 0:
+                break
+            node[0] += shrink
+            node[2] -= shrink
+            if node[2] <= 0:
+                self._skyline.pop(i)
+            else:
+                break
+
+        # Merge neighbouring nodes at the same height
+        i = 0
+        while i < len(self._skyline) - 1:
+            if self._skyline[i][1] == self._skyline[i+1][1]:
+                self._skyline[i][2] += self._skyline[i+1][2]
+                self._skyline.pop(i+1)
+            else:
+                i += 1
+
+        return x, y
+
+
+
+class _AtlasEntry(object):
+    """ Bookkeeping for one image in the atlas. """
+
+    __slots__ = ['data', 'region', 'refcount']
+
+    def __init__(self, data, region):
+        self.data = data
+        self.region = region  # (x, y, w, h), without padding
+        self.refcount = 1
+
+
+
+class TextureAtlas(object):
+    """ A large Texture2D in which many small images are packed.
+
+    Images are added incrementally; each addition results in a
+    single set_subdata() call on the underlying texture. Images are
+    reference counted: adding an image under a key that is already
+    present only increases its count, and release() decreases it.
+    Images with a zero count stay in the atlas (and can be revived
+    by add()) until their space is needed, at which point they are
+    evicted. If evicting is not enough, the atlas is defragmented by
+    repacking all live images, which changes their UV rectangles; the
+    generation property is then increased, so that users of the atlas
+    can see that they need to get the UV rectangles again.
+
+    Parameters
+    ----------
+    shape : tuple
+        The shape of the atlas texture, e.g. (1024, 1024, 4). Note that
+        shape[0] is height.
+    padding : int
+        The number of texels around each image, to avoid that
+        neighbouring images bleed into each other when sampling with
+        linear interpolation. The padding is filled with the edge
+        texels of the image. Default 1.
+
+    Example
+    -------
+
+        atlas = TextureAtlas((512, 512, 4))
+        uv = atlas.add('disc', disc_image)
+        program['u_atlas'] = atlas.texture
+        data['a_texcoord'] = uv
+        
+        # Later, after adding more images
+        if atlas.generation != generation:
+            data['a_texcoord'] = atlas.uvs(keys)
+    """
+
+    def __init__(self, shape=(1024, 1024, 4), padding=1):
+
+        # Check shape
+        shape = tuple([int(i) for i in shape])
+        if len(shape) not in (2, 3):
+            raise ValueError('Atlas shape must be 2D or 3D.')
+        self._shape = shape
+        self._padding = int(padding)
+
+        # The texture in which we pack
+        self._texture = Texture2D(shape)
+
+        # Packer and its free list; the free list holds regions of
+        # evicted images (including padding) that can be reused.
+        self._packer = SkylinePacker(shape[1], shape[0])
+        self._free = []
+
+        # key -> _AtlasEntry
+        self._entries = {}
+
+        # Increased each time that the images are repacked
+        self._generation = 0
+
+
+    @property
+    def texture(self):
+        """ The Texture2D object that holds the packed images. """
+        return self._texture
+
+
+    @property
+    def shape(self):
+        """ The shape of the atlas texture. """
+        return self._shape
+
+
+    @property
+    def generation(self):
+        """ The number of times that the atlas was defragmented. When
+        this changes, the UV rectangles of all images have changed.
+        Note that add() may defragment the atlas.
+        """
+        return self._generation
+
+
+    def __contains__(self, key):
+        return key in self._entries
+
+
+    def __len__(self):
+        return len(self._entries)
+
+
+    def keys(self):
+        """ Return a list of the keys of all images in the atlas. """
+        return list(self._entries.keys())
+
+
+    def add(self, key, data):
+        """ Add an image to the atlas and return its UV rectangle.
+
+        If an image with the given key is already present, its
+        reference count is increased and no data is uploaded. If the
+        image does not fit, the atlas may be defragmented, which changes
+        the UV rectangles of the other images (see generation).
+
+        Parameters
+        ----------
+        key : hashable
+            The name under which to store the image.
+        data : numpy array
+            The image data. Must have the same number of channels
+            as the atlas.
+        """
+
+        # Already here?
+        entry = self._entries.get(key, None)
+        if entry is not None:
+            entry.refcount += 1
+            return self.uv(key)
+
+        # Check data
+        if not isinstance(data, np.ndarray):
+            raise ValueError('Data should be a numpy array.')
+        if data.ndim == 3 and len(self._shape) == 2 and data.shape[2] == 1:
+            data = data[:, :, 0]
+        if data.shape[2:] != self._shape[2:]:
+            raise ValueError('Image data does not match atlas channels.')
+        h, w = data.shape[:2]
+
+        # Find a place for it
+        region = self._allocate(w, h)
+        if region is None:
+            raise AtlasError('Could not fit image of shape %r in atlas.' %
+                             (data.shape,))
+
+        # Store and upload
+        self._entries[key] = entry = _AtlasEntry(data, region)
+        self._upload(entry)
+        return self.uv(key)
+
+
+    def release(self, key):
+        """ Decrease the reference count of an image. Images without
+        references are evicted when their space is needed.
+        """
+        entry = self._entries[key]
+        entry.refcount = max(0, entry.refcount - 1)
+
+
+    def remove(self, key):
+        """ Remove an image from the atlas now, regardless of its
+        reference count. Its space is reused for new images.
+        """
+        entry = self._entries.pop(key)
+        self._free.append(self._padded(entry.region))
+
+
+    def evict_unused(self):
+        """ Remove all images that have a reference count of zero.
+        Returns the number of evicted images.
+        """
+        keys = [k for k, e in self._entries.items() if e.refcount == 0]
+        for key in keys:
+            self.remove(key)
+        return len(keys)
+
+
+    def defragment(self):
+        """ Repack all images in the atlas, largest first, to reclaim
+        fragmented space. All images are uploaded again and thus get
+        a new UV rectangle, and the generation is increased.
+        """
+        entries = sorted(self._entries.values(),
+                         key=lambda e: (e.region[3], e.region[2]),
+                         reverse=True)
+        self._packer.reset()
+        self._free = []
+        for entry in entries:
+            w, h = entry.region[2:]
+            region = self._pack(w, h)
+            if region is None:
+                raise AtlasError('Could not repack atlas (should not happen).')
+            entry.region = region
+            self._upload(entry)
+        self._generation += 1
+
+
+    def uv(self, key):
+        """ The UV rectangle (u0, v0, u1, v1) of an image, as a float32
+        array. u runs along the width and v along the height of the
+        atlas texture.
+        """
+        x, y, w, h = self._entries[key].region
+        H, W = self._shape[:2]
+        return np.array([x / W, y / H, (x + w) / W, (y + h) / H], np.float32)
+
+
+    def uvs(self, keys):
+        """ The UV rectangles for a sequence of keys, as an (N, 4)
+        float32 array. Useful to fill an attribute for many instances.
+        """
+        result = np.empty((len(keys), 4), np.float32)
+        for i, key in enumerate(keys):
+            result[i] = self.uv(key)
+        return result
+
+
+    def _padded(self, region):
+        x, y, w, h = region
+        p = self._padding
+        return x - p, y - p, w + 2*p, h + 2*p
+
+
+    def _pack(self, w, h):
+        """ Find a region for an image of size (w, h), using first the
+        free list and then the skyline.
+        """
+        p = self._padding
+        pw, ph = w + 2*p, h + 2*p
+
+        # Best fit (smallest area) in the free list
+        best = None
+        for i, (fx, fy, fw, fh) in enumerate(self._free):
+            if fw >= pw and fh >= ph:
+                if best is None or fw*fh < self._free[best][2]*self._free[best][3]:
+                    best = i
+        if best is not None:
+            fx, fy, fw, fh = self._free.pop(best)
+            # Return what is left, guillotine style (split along longer side)
+            if fw - pw > fh - ph:
+                rest = [(fx+pw, fy, fw-pw, fh), (fx, fy+ph, pw, fh-ph)]
+            else:
+                rest = [(fx, fy+ph, fw, fh-ph), (fx+pw, fy, fw-pw, ph)]
+            self._free.extend([r for r in rest if r[2] > 0 and r[3] > 0])
+            return fx + p, fy + p, w, h
+
+        # Otherwise ask the skyline
+        pos = self._packer.pack(pw, ph)
+        if pos is None:
+            return None
+        return pos[0] + p, pos[1] + p, w, h
+
+
+    def _allocate(self, w, h):
+        """ Find a region, evicting and defragmenting if necessary.
+        """
+        region = self._pack(w, h)
+        if region is None and self.evict_unused():
+            region = self._pack(w, h)
+        if region is None and self._entries:
+            self.defragment()
+            region = self._pack(w, h)
+        return region
+
+
+    def _upload(self, entry):
+        # Upload the image with its padding, filled with the edge texels,
+        # so that the padding does not hold the texels of an image that
+        # was here before.
+        x, y, w, h = entry.region
+        p = self._padding
+        data = entry.data
+        if p:
+            pad = [(p, p), (p, p)] + [(0, 0)] * (data.ndim - 2)
+            data = np.pad(data, pad, mode='edge')
+        self._texture.set_subdata((y - p, x - p), data)
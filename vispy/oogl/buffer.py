@@ -133,8 +133,20 @@ class Buffer(GLObject):
     def nbytes(self):
         """Buffer size (in bytes). """
         return self._nbytes
+    
+    
+    @property
+    def pending_nbytes(self):
+        """ The number of bytes that have been set but are not yet 
+        uploaded to the GPU (including data held by an UploadScheduler).
+        """
+        pending = sum([item[1] for item in self._pending_data])
+        return self._scheduled_nbytes + pending
 
     
+    _gl_delete = 'glDeleteBuffers'
+    
+    
     def _create(self):
         """ Create buffer on GPU """
         if not self._handle:
@@ -670,9 +682,13 @@ class VertexBufferView(VertexBuffer):
         return self._base
 
 
+    # The base buffer owns the GL object
+    _gl_delete = None
+    
+    
     def _create(self):
         """ Create buffer on GPU """
-        self._base._create()
+        self._base._create_object()
         self._handle = self._base._handle
     
     
@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2013, Vispy Development Team.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+""" Sharing of compiled shaders and linked programs.
+
+Visuals that use the same GLSL code each create their own Program
+and Shader objects. The ShaderCache makes sure that identical shaders
+are compiled only once, and that programs with the same set of
+shaders are linked only once (per context). The GL objects are
+reference counted and deleted when the last oogl object that uses
+them is deleted.
+
+If vispy.config['program_binary_cache'] is set, linked programs are
+also stored on disk by the ProgramBinaryCache (if the driver supports
+the get_program_binary extension), so that later sessions do not have
+to compile and link them again.
+
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import struct
+import weakref
+
+import numpy as np
+
+from vispy import gl
+from vispy.util.diskcache import DiskCache, hash_key
+from .context import get_context_object
+
+
+def get_shader_cache():
+    """ Get the ShaderCache for the current context.
+    """
+    return get_context_object('shader_cache', ShaderCache)
+
+
+def get_program_binary_cache():
+    """ Get the ProgramBinaryCache for the current context.
+    """
+    return get_context_object('program_binary_cache', ProgramBinaryCache)
+
+
+def shader_key(target, code):
+    """ Get the key for a shader with the given target and source code.
+    The source is normalized, so that differences in whitespace at the
+    end of lines and around the code do not matter.
+    """
+    lines = [line.rstrip() for line in code.strip().splitlines()]
+    return int(target), hash_key('\n'.join(lines))
+
+
+
+class ShaderCache(object):
+    """ Cache of compiled shaders and linked programs for one OpenGL
+    context. Use get_shader_cache() to obtain the cache for the current
+    context.
+
+    Shaders are keyed by their (normalized) source, and programs by the
+    keys of their shaders. Shader and Program objects use the cache
+    automatically; there is normally no need to use it directly, except
+    to inspect the stats.
+    """
+
+    def __init__(self):
+        # key -> [handle, refcount]
+        self._shaders = {}
+        # key -> [handle, refcount, active_attributes, active_uniforms, user]
+        self._programs = {}
+        self._stats = {'shader_hits': 0, 'shader_misses': 0,
+                       'program_hits': 0, 'program_misses': 0}
+        self.enabled = True
+
+
+    @property
+    def stats(self):
+        """ A dict with the hits and misses for shaders and programs, and
+        the number of shaders and programs in the cache.
+        """
+        stats = dict(self._stats)
+        stats['shaders'] = len(self._shaders)
+        stats['programs'] = len(self._programs)
+        return stats
+
+
+    def reset_stats(self):
+        """ Reset the hit and miss counters.
+        """
+        for key in self._stats:
+            self._stats[key] = 0
+
+
+    ## Shaders
+
+    def acquire_shader(self, key):
+        """ Get the handle of the compiled shader with the given key and
+        increase its reference count. Returns None if the shader is not
+        in the cache.
+        """
+        entry = self._shaders.get(key) if self.enabled else None
+        if entry is None:
+            self._stats['shader_misses'] += 1
+            return None
+        self._stats['shader_hits'] += 1
+        entry[1] += 1
+        return entry[0]
+
+
+    def add_shader(self, key, handle):
+        """ Add a compiled shader, with a reference count of one. Returns
+        False if the key is already taken (the caller then owns handle).
+        """
+        if not self.enabled or key in self._shaders:
+            return False
+        self._shaders[key] = [handle, 1]
+        return True
+
+
+    def release_shader(self, key, queue=None):
+        """ Decrease the reference count of a shader. The GL shader is
+        deleted when it is no longer used, or pushed into the given
+        DeletionQueue.
+        """
+        entry = self._shaders.get(key)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            self._shaders.pop(key)
+            if queue is not None:
+                queue.push('glDeleteShader', entry[0])
+            else:
+                gl.glDeleteShader(entry[0])
+
+
+    ## Programs
+
+    def acquire_program(self, key):
+        """ Get the handle of the linked program with the given key and
+        increase its reference count. Returns a tuple (handle,
+        active_attributes, active_uniforms), or None if the program is
+        not in the cache.
+        """
+        entry = self._programs.get(key) if self.enabled else None
+        if entry is None:
+            self._stats['program_misses'] += 1
+            return None
+        self._stats['program_hits'] += 1
+        entry[1] += 1
+        return entry[0], entry[2], entry[3]
+
+
+    def add_program(self, key, handle, active_attributes, active_uniforms):
+        """ Add a linked program, with a reference count of one. Returns
+        False if the key is already taken (the caller then owns handle).
+        """
+        if not self.enabled or key in self._programs:
+            return False
+        self._programs[key] = [handle, 1, active_attributes,
+                               active_uniforms, None]
+        return True
+
+
+    def release_program(self, key, queue=None):
+        """ Decrease the reference count of a program. The GL program is
+        deleted when it is no longer used, or pushed into the given
+        DeletionQueue.
+        """
+        entry = self._programs.get(key)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            self._programs.pop(key)
+            if queue is not None:
+                queue.push('glDeleteProgram', entry[0])
+            else:
+                gl.glDeleteProgram(entry[0])
+
+
+    def set_program_user(self, key, user):
+        """ Set the object (e.g. a Program) that last used the program
+        with the given key. Returns True if this is a different object
+        than before, in which case the uniforms that are stored in the
+        GL program object need to be set again.
+        """
+        entry = self._programs.get(key)
+        if entry is None:
+            return False
+        if entry[4] is not None and entry[4]() is user:
+            return False
+        entry[4] = weakref.ref(user)
+        return True
+
+
+    def get_program_user(self, key):
+        """ Get the object that last used the program with the given key,
+        or None.
+        """
+        entry = self._programs.get(key)
+        if entry is None or entry[4] is None:
+            return None
+        return entry[4]()
+
+
+
+
+class ProgramBinaryCache(object):
+    """ Persistent (on disk) cache of linked program binaries, using the
+    get_program_binary extension. Use get_program_binary_cache() to
+    obtain the cache for the current context.
+
+    Binaries are keyed by the source of the shaders and the vendor,
+    renderer and version of the driver. If the driver rejects a binary
+    (e.g. because it was updated), the binary is removed and the
+    program should be compiled and linked as usual.
+
+    Parameters
+    ----------
+    path : str or None
+        The directory to store the binaries. By default a subdirectory
+        of the vispy cache directory is used.
+    """
+
+    def __init__(self, path=None):
+        self._disk = DiskCache('program_binaries', path)
+        self._driver = None
+        self._stats = {'hits': 0, 'misses': 0, 'rejected': 0, 'saved': 0}
+
+
+    @property
+    def path(self):
+        """ The directory that contains the binaries. """
+        return self._disk.path
+
+
+    @property
+    def stats(self):
+        """ A dict with the number of hits, misses, binaries that were
+        rejected by the driver, and binaries saved.
+        """
+        return dict(self._stats)
+
+
+    def _get_key(self, program_key):
+        """ Get the key on disk for a program (as used by ShaderCache).
+        """
+        if self._driver is None:
+            strings = []
+            for name in (gl.GL_VENDOR, gl.GL_RENDERER, gl.GL_VERSION):
+                value = gl.glGetString(name) or b''
+                if not isinstance(value, bytes):
+                    value = value.encode('utf-8')
+                strings.append(value)
+            self._driver = tuple(strings)
+        parts = list(self._driver)
+        for target, code_hash in program_key:
+            parts.extend([str(target), code_hash])
+        return hash_key(*parts)
+
+
+    def load(self, handle, program_key):
+        """ Load the binary for the program with the given key into the
+        GL program with the given handle. Returns True if the program is
+        now linked.
+        """
+        try:
+            key = self._get_key(program_key)
+        except Exception:
+            return False
+        data = self._disk.get(key)
+        if data is None or len(data) < 4:
+            self._stats['misses'] += 1
+            return False
+
+        # Load, the driver may reject it (or not support it at all)
+        format = struct.unpack('<I', data[:4])[0]
+        binary = np.frombuffer(data[4:], np.uint8)
+        try:
+            gl.ext.glProgramBinary(handle, format, binary, binary.nbytes)
+            ok = gl.glGetProgramiv(handle, gl.GL_LINK_STATUS)
+        except Exception:
+            ok = False
+        if not ok:
+            self._stats['rejected'] += 1
+            self._disk.remove(key)
+            return False
+        self._stats['hits'] += 1
+        return True
+
+
+    def save(self, handle, program_key):
+        """ Save the binary of the linked GL program with the given
+        handle. Returns whether the binary was saved.
+        """
+        try:
+            key = self._get_key(program_key)
+            n = gl.glGetProgramiv(handle, gl.ext.GL_PROGRAM_BINARY_LENGTH)
+            if not n:
+                return False
+            length = np.zeros(1, np.int32)
+            format = np.zeros(1, np.uint32)
+            binary = np.zeros(n, np.uint8)
+            gl.ext.glGetProgramBinary(handle, n, length, format, binary)
+        except Exception:
+            return False
+        data = struct.pack('<I', int(format[0])) + binary[:length[0]].tobytes()
+        if not self._disk.set(key, data):
+            return False
+        self._stats['saved'] += 1
+        return True
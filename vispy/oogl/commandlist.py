@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2013, Vispy Development Team.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+""" Capture and replay of the GL calls of a paint.
+
+For a static scene, each paint issues the same GL calls, but going
+through Program.draw_*(), the variable uploads and the activation of the
+objects costs much more Python time than the calls themselves. A
+CommandList captures the calls of one paint (through the functions in
+vispy.gl) as a list of (function, args), and replays that list on later
+paints.
+
+The objects that are activated during the capture are remembered. When
+any of them becomes dirty (e.g. new data is set to a buffer, or a uniform
+gets a new value) the capture is invalidated, and the next paint is
+captured again. For GL programs that are shared by several Programs
+(see vispy.oogl.cache), the sequence of Programs that used each one in
+the capture is remembered, and the capture is invalidated when it
+relies on uniform values that another Program replaced in the meantime.
+
+Replay relies on the GL state that the calls do not set themselves, in
+particular on uniform values persisting in the GL program: a uniform
+that was uploaded before the capture (or in an earlier capture) is not
+uploaded again when replaying. Code that sets uniforms without going
+through a Program (e.g. by calling glUniform directly) should call
+invalidate().
+
+Example::
+
+    commands = CommandList()
+
+    def on_paint(event):
+        commands.draw(draw_scene)  # Captures or replays
+
+"""
+
+from __future__ import print_function, division, absolute_import
+
+from vispy import gl
+from vispy.oogl.globject import GLObject
+
+
+class CommandListError(RuntimeError):
+    """ Raised when a CommandList is used incorrectly.
+    """
+    pass
+
+
+# Functions that are not captured, because they only query state
+_QUERY_PREFIXES = ('glGet', 'glIs', 'glCheck')
+
+# Functions that create or delete objects, compile or link, or upload
+# data. A capture that calls these is of a paint that did more than
+# drawing, and is not kept.
+_SETUP_PREFIXES = ('glGen', 'glCreate', 'glDelete', 'glShaderSource',
+                   'glCompileShader', 'glAttachShader', 'glDetachShader',
+                   'glLinkProgram', 'glProgramBinary', 'glBufferData',
+                   'glBufferSubData', 'glTexImage', 'glTexSubImage',
+                   'glCompressedTex', 'glCopyTex', 'glGenerateMipmap',
+                   'glRenderbufferStorage', 'glMapBuffer', 'glUnmapBuffer')
+
+
+class CommandList(object):
+    """ Captures the GL calls of a paint, and replays them on later paints
+    as long as none of the objects involved changed.
+
+    The capture does not know about anything but the activated GLObjects
+    and their variables: when the paint function would draw something
+    else for another reason (e.g. the user hid an object), call
+    invalidate().
+    """
+
+    def __init__(self):
+        self._commands = []
+        self._objects = []
+        # Key of shared GL program -> [cache, user before, first, last]
+        self._program_users = {}
+        self._valid = False
+        self._setup = False
+        self._stats = {'captures': 0, 'replays': 0}
+
+
+    @property
+    def valid(self):
+        """ Whether there is a capture that can be replayed.
+        """
+        if not self._valid:
+            return False
+        for ob, handle in self._objects:
+            if ob._handle != handle or ob._is_dirty():
+                self._valid = False
+                return False
+        # If the first user of a shared GL program in the capture did not
+        # upload its uniforms, because it was the last user before the
+        # capture, it must still be the last user
+        for key, (cache, before, first, last) in self._program_users.items():
+            if before is first and cache.get_program_user(key) is not first:
+                self._valid = False
+                return False
+        return True
+
+
+    @property
+    def commands(self):
+        """ The captured (function, args) tuples.
+        """
+        return list(self._commands)
+
+
+    @property
+    def stats(self):
+        """ Dict with the number of captures and replays.
+        """
+        return dict(self._stats)
+
+
+    def invalidate(self):
+        """ Discard the capture, so that the next paint is captured again.
+        """
+        self._valid = False
+
+
+    def draw(self, func, *args):
+        """ Replay the capture if it is valid, or else call func(*args)
+        while capturing.
+        """
+        if not self.replay():
+            self.capture(func, *args)
+
+
+    def replay(self):
+        """ Issue the captured GL calls. Returns False (and does nothing)
+        if the capture is not valid.
+        """
+        if not self.valid:
+            return False
+        for func, args in self._commands:
+            func(*args)
+        # The shared GL programs now have the uniforms of the last users
+        for key, (cache, before, first, last) in self._program_users.items():
+            cache.set_program_user(key, last)
+        self._stats['replays'] += 1
+        return True
+
+
+    def capture(self, func, *args):
+        """ Call func(*args) and capture the GL calls that it issues. The
+        capture is only kept if no objects were created or deleted and no
+        data was uploaded, so a static scene is usually captured in its
+        second paint.
+        """
+        if GLObject._capture is not None:
+            raise CommandListError('Another CommandList is capturing.')
+        self._commands, self._objects = [], []
+        self._program_users = {}
+        self._valid, self._setup = False, False
+        gl._resolve_functions()
+        namespaces = gl.__dict__, gl.ext.__dict__
+        originals = [self._install(NS) for NS in namespaces]
+        GLObject._capture = self
+        try:
+            func(*args)
+        finally:
+            GLObject._capture = None
+            for NS, functions in zip(namespaces, originals):
+                NS.update(functions)
+        self._stats['captures'] += 1
+        self._valid = not self._setup
+
+
+    def _install(self, NS):
+        """ Replace the GL functions in the namespace with capturing ones.
+        Returns the original functions.
+        """
+        originals = {}
+        for name, func in list(NS.items()):
+            if name.startswith('gl') and callable(func):
+                originals[name] = func
+                NS[name] = self._make_capturing(name, func)
+        return originals
+
+
+    def _make_capturing(self, name, func):
+        commands = self._commands
+        if name.startswith(_QUERY_PREFIXES):
+            return func
+        elif name.startswith(_SETUP_PREFIXES):
+            def capturing(*args):
+                self._setup = True
+                return func(*args)
+        else:
+            def capturing(*args):
+                commands.append((func, args))
+                return func(*args)
+        return capturing
+
+
+    def _add_program_user(self, cache, key, program):
+        # Called by Program.activate() during capture, before it uses a
+        # shared GL program. A Program uploads all its uniforms when it
+        # was not the last user, and the capture contains these uploads,
+        # so only the user before the capture can matter for replaying.
+        # The last user is restored after replaying.
+        if key not in self._program_users:
+            before = cache.get_program_user(key)
+            self._program_users[key] = [cache, before, program, program]
+        self._program_users[key][3] = program
+
+
+    def _add_object(self, ob):
+        # Called by GLObject.activate() during capture
+        self._objects.append((ob, ob._handle))
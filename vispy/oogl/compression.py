@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2013, Vispy Development Team.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+""" Block compression of RGB(A) images for compressed textures.
+
+This module implements vectorized (numpy) encoders and decoders for
+two common block compression formats that use 8 bytes per 4x4 block
+of pixels (i.e. 4 bits per pixel, a factor 6 compared to RGB and 8
+compared to RGBA):
+
+  * DXT1 (S3TC), widely available on desktop hardware via the
+    GL_EXT_texture_compression_s3tc extension.
+  * ETC1, available on most mobile (OpenGL ES 2.0) hardware via the
+    GL_OES_compressed_ETC1_RGB8_texture extension.
+
+Both are lossy and drop the alpha channel. The encoders favor speed
+over quality, but compressing is still relatively expensive. Use
+compress() with cache=True to store the results on disk, keyed by a
+hash of the image content.
+
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+
+from vispy import gl
+from vispy.util.diskcache import DiskCache, hash_key
+
+
+# Internal formats
+GL_COMPRESSED_RGB_S3TC_DXT1 = gl.ext.GL_COMPRESSED_RGB_S3TC_DXT1
+GL_ETC1_RGB8 = gl.ext.GL_ETC1_RGB8
+
+# Increase when the output of an encoder changes, to invalidate the cache
+CODEC_VERSION = 1
+
+# ETC1 modifier tables; the pixel index (msb*2 + lsb) selects
+# +a, +b, -a, -b respectively.
+_ETC1_TABLES = np.array([[2, 8], [5, 17], [9, 29], [13, 42],
+                         [18, 60], [24, 80], [33, 106], [47, 183]])
+_ETC1_MODIFIERS = np.concatenate([_ETC1_TABLES, -_ETC1_TABLES], 1)
+
+# Process this many blocks at a time, to limit memory use
+_CHUNK = 4096
+
+_cache = None
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        _cache = DiskCache('compressed_textures')
+    return _cache
+
+
+
+## Helper functions
+
+
+def _to_blocks(image):
+    """ Turn an (H, W, 3+) image into (N, 4, 4, 3) float32 blocks, padding
+    the image (by edge replication) to a multiple of four.
+    """
+    image = np.asarray(image)
+    if image.ndim == 2:
+        image = np.dstack([image] * 3)
+    if image.ndim != 3 or image.shape[2] < 3:
+        raise ValueError('Image to compress must be (H, W), or (H, W, 3+).')
+    if image.dtype != np.uint8:
+        raise ValueError('Image to compress must be uint8.')
+    image = image[:, :, :3]
+    h, w = image.shape[:2]
+    ph, pw = (-h) % 4, (-w) % 4
+    if ph or pw:
+        image = np.pad(image, ((0, ph), (0, pw), (0, 0)), 'edge')
+    H, W = image.shape[:2]
+    blocks = image.reshape(H//4, 4, W//4, 4, 3).swapaxes(1, 2)
+    return blocks.reshape(-1, 4, 4, 3).astype(np.float32), (H//4, W//4)
+
+
+def _from_blocks(blocks, nblocks, shape):
+    """ Turn (N, 4, 4, 3) blocks into an image of the given shape.
+    """
+    by, bx = nblocks
+    image = blocks.reshape(by, bx, 4, 4, 3).swapaxes(1, 2)
+    image = image.reshape(by*4, bx*4, 3)
+    return image[:shape[0], :shape[1]]
+
+
+def _pack565(colors):
+    c = np.clip(np.round(colors), 0, 255).astype(np.uint16)
+    return ((c[..., 0] >> 3) << 11) | ((c[..., 1] >> 2) << 5) | (c[..., 2] >> 3)
+
+
+def _unpack565(c):
+    c = c.astype(np.uint32)
+    r = (c >> 11) & 31
+    g = (c >> 5) & 63
+    b = c & 31
+    rgb = np.stack([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)], -1)
+    return rgb.astype(np.float32)
+
+
+def _dxt1_palette(c0, c1):
+    """ Get the (N, 4, 3) palette from two (N,) uint16 colors. In the
+    three color mode (c0 <= c1) the fourth color is black.
+    """
+    p0, p1 = _unpack565(c0), _unpack565(c1)
+    four = (c0 > c1)[:, None]
+    p2 = np.where(four, (2*p0 + p1) / 3.0, (p0 + p1) / 2.0)
+    p3 = np.where(four, (p0 + 2*p1) / 3.0, 0.0)
+    return np.stack([p0, p1, np.floor(p2), np.floor(p3)], 1)
+
+
+
+## DXT1
+
+
+def _encode_dxt1(blocks):
+    """ Encode (N, 4, 4, 3) float blocks to (N, 8) uint8.
+    """
+    pixels = blocks.reshape(-1, 16, 3)
+
+    # Endpoints: bounding box of the block, inset a bit to reduce the
+    # error for the bulk of the colors.
+    lo, hi = pixels.min(1), pixels.max(1)
+    inset = (hi - lo) / 16.0
+    c0 = _pack565(hi - inset)
+    c1 = _pack565(lo + inset)
+
+    # We want four-color mode: c0 > c1. Swap if needed.
+    swap = c0 < c1
+    c0, c1 = np.where(swap, c1, c0), np.where(swap, c0, c1)
+
+    # Find best palette entry for each pixel
+    palette = _dxt1_palette(c0, c1)
+    dist = ((pixels[:, :, None, :] - palette[:, None, :, :])**2).sum(-1)
+    indices = dist.argmin(-1).astype(np.uint32)
+    # Solid blocks (c0 == c1): three color mode, always use index 0
+    indices[c0 == c1] = 0
+
+    # Pack
+    shifts = np.arange(16, dtype=np.uint32) * 2
+    bits = (indices << shifts).sum(1, dtype=np.uint64).astype('<u4')
+    out = np.empty((len(pixels), 8), np.uint8)
+    out[:, 0:2] = c0.astype('<u2').view(np.uint8).reshape(-1, 2)
+    out[:, 2:4] = c1.astype('<u2').view(np.uint8).reshape(-1, 2)
+    out[:, 4:8] = bits.view(np.uint8).reshape(-1, 4)
+    return out
+
+
+def _decode_dxt1(data):
+    """ Decode (N, 8) uint8 to (N, 4, 4, 3) float blocks.
+    """
+    c0 = data[:, 0:2].copy().view('<u2')[:, 0]
+    c1 = data[:, 2:4].copy().view('<u2')[:, 0]
+    bits = data[:, 4:8].copy().view('<u4')[:, 0]
+    palette = _dxt1_palette(c0, c1)
+    shifts = np.arange(16, dtype=np.uint32) * 2
+    indices = (bits[:, None] >> shifts) & 3
+    pixels = np.take_along_axis(palette, indices[:, :, None].astype(np.intp), 1)
+    return pixels.reshape(-1, 4, 4, 3)
+
+
+
+## ETC1
+
+
+def _etc1_subblock_masks():
+    """ Get (2, 16) boolean masks that select the first sub-block for
+    flip=0 (2x4, left) and flip=1 (4x2, top). Pixels in row-major order.
+    """
+    y, x = np.mgrid[0:4, 0:4]
+    return np.array([(x < 2).ravel(), (y < 2).ravel()])
+
+
+def _etc1_fit(pixels, mask):
+    """ Fit an ETC1 sub-block (individual mode) for the pixels selected
+    by mask. Returns base colors (N, 3) in 4 bits, table indices (N,),
+    pixel indices (N, 16) and error (N,).
+    """
+    n = len(pixels)
+    sub = pixels[:, mask]
+    base4 = np.clip(np.round(sub.mean(1) / 17.0), 0, 15)
+    base = base4 * 17.0
+
+    # Try all modifiers of all tables: (N, 8, 4, 3)
+    candidates = base[:, None, None, :] + _ETC1_MODIFIERS[None, :, :, None]
+    candidates = np.clip(candidates, 0, 255)
+    # Error per pixel, table and modifier: (N, 16, 8, 4)
+    err = ((pixels[:, :, None, None, :] - candidates[:, None])**2).sum(-1)
+    best_mod = err.argmin(-1)
+    best_err = err.min(-1)
+    # Only count the pixels of this sub-block to select the table
+    table_err = (best_err * mask[None, :, None]).sum(1)
+    table = table_err.argmin(1)
+    indices = best_mod[np.arange(n), :, table]
+    return base4.astype(np.uint8), table, indices, table_err[np.arange(n), table]
+
+
+def _encode_etc1(blocks):
+    """ Encode (N, 4, 4, 3) float blocks to (N, 8) uint8, using the
+    individual mode with the best of both flip orientations.
+    """
+    pixels = blocks.reshape(-1, 16, 3)
+    n = len(pixels)
+    masks = _etc1_subblock_masks()
+
+    best = None
+    for flip in (0, 1):
+        fits = [_etc1_fit(pixels, masks[flip]), _etc1_fit(pixels, ~masks[flip])]
+        err = fits[0][3] + fits[1][3]
+        if best is None:
+            best = flip, fits, err
+            choice = np.zeros(n, bool)
+        else:
+            choice = err < best[2]
+            merged = []
+            for new, old in zip(fits, best[1]):
+                merged.append([np.where(choice.reshape((-1,) + (1,)*(a.ndim-1)), a, b)
+                               for a, b in zip(new, old)])
+            best = np.where(choice, 1, 0), merged, np.where(choice, err, best[2])
+    flip, (fit1, fit2), err = best
+    flip = np.asarray(flip) * np.ones(n, np.uint32)
+
+    # Pixel indices: use those of the sub-block each pixel belongs to
+    in_first = np.where(flip[:, None] == 1, masks[1][None], masks[0][None])
+    indices = np.where(in_first, fit1[2], fit2[2]).astype(np.uint32)
+
+    # High word: colors, tables, diff bit (0) and flip bit
+    b1, b2 = fit1[0].astype(np.uint32), fit2[0].astype(np.uint32)
+    high = ((b1[:, 0] << 28) | (b2[:, 0] << 24) | (b1[:, 1] << 20) |
+            (b2[:, 1] << 16) | (b1[:, 2] << 12) | (b2[:, 2] << 8) |
+            (fit1[1].astype(np.uint32) << 5) |
+            (fit2[1].astype(np.uint32) << 2) | flip)
+
+    # Low word: pixel p = x*4 + y (column-major) has its msb at bit
+    # p+16 and its lsb at bit p.
+    y, x = np.mgrid[0:4, 0:4]
+    p = (x*4 + y).ravel().astype(np.uint32)
+    msb = ((indices >> 1) << (p + 16)).sum(1, dtype=np.uint64)
+    lsb = ((indices & 1) << p).sum(1, dtype=np.uint64)
+    low = (msb | lsb).astype(np.uint32)
+
+    out = np.empty((n, 8), np.uint8)
+    out[:, 0:4] = high.astype('>u4').view(np.uint8).reshape(-1, 4)
+    out[:, 4:8] = low.astype('>u4').view(np.uint8).reshape(-1, 4)
+    return out
+
+
+def _decode_etc1(data):
+    """ Decode (N, 8) uint8 to (N, 4, 4, 3) float blocks. Only the
+    individual mode (as produced by the encoder) is supported.
+    """
+    high = data[:, 0:4].copy().view('>u4')[:, 0].astype(np.uint32)
+    low = data[:, 4:8].copy().view('>u4')[:, 0].astype(np.uint32)
+    if (high & 2).any():
+        raise ValueError('ETC1 differential mode is not supported.')
+    flip = high & 1
+    b1 = np.stack([(high >> 28) & 15, (high >> 20) & 15, (high >> 12) & 15], -1)
+    b2 = np.stack([(high >> 24) & 15, (high >> 16) & 15, (high >> 8) & 15], -1)
+    t1, t2 = (high >> 5) & 7, (high >> 2) & 7
+
+    y, x = np.mgrid[0:4, 0:4]
+    p = (x*4 + y).ravel().astype(np.uint32)
+    indices = (((low[:, None] >> (p + 16)) & 1) << 1) | ((low[:, None] >> p) & 1)
+
+    masks = _etc1_subblock_masks()
+    in_first = np.where(flip[:, None] == 1, masks[1][None], masks[0][None])
+    base = np.where(in_first[..., None], b1[:, None], b2[:, None]) * 17.0
+    table = np.where(in_first, t1[:, None], t2[:, None])
+    modifier = _ETC1_MODIFIERS[table, indices]
+    pixels = np.clip(base + modifier[..., None], 0, 255)
+    return pixels.reshape(-1, 4, 4, 3)
+
+
+
+## Public API
+
+_CODECS = {
+    'dxt1': (_encode_dxt1, _decode_dxt1, GL_COMPRESSED_RGB_S3TC_DXT1,
+             'GL_EXT_texture_compression_s3tc'),
+    'etc1': (_encode_etc1, _decode_etc1, GL_ETC1_RGB8,
+             'GL_OES_compressed_ETC1_RGB8_texture'),
+    }
+
+
+def get_internalformat(codec):
+    """ Get the GL internal format for the given codec ('dxt1' or 'etc1').
+    """
+    if codec.lower() not in _CODECS:
+        raise ValueError('Unknown texture compression codec %r.' % codec)
+    return _CODECS[codec.lower()][2]
+
+
+def get_extension(codec):
+    """ Get the name of the GL extension that is needed for the given
+    codec ('dxt1' or 'etc1').
+    """
+    if codec.lower() not in _CODECS:
+        raise ValueError('Unknown texture compression codec %r.' % codec)
+    return _CODECS[codec.lower()][3]
+
+
+def compress(image, codec='dxt1', cache=False):
+    """ Compress an RGB(A) image.
+
+    Parameters
+    ----------
+    image : numpy array
+        The uint8 image data, (H, W), (H, W, 3) or (H, W, 4). Alpha is
+        dropped. The image is padded to a multiple of four pixels.
+    codec : str
+        The compression format: 'dxt1' or 'etc1'.
+    cache : bool or DiskCache
+        Whether to cache the result on disk (keyed by a hash of the
+        image content). A DiskCache instance can be given to use
+        a specific cache.
+
+    Returns
+    -------
+    data : numpy array
+        An (N, 8) uint8 array with one row per 4x4 block. Blocks are in
+        row-major order.
+    """
+    codec = codec.lower()
+    if codec not in _CODECS:
+        raise ValueError('Unknown texture compression codec %r.' % codec)
+    encode = _CODECS[codec][0]
+
+    # Look in cache
+    key = None
+    if cache:
+        cache = _get_cache() if cache is True else cache
+        image = np.ascontiguousarray(image)
+        key = hash_key(codec, str(CODEC_VERSION), str(image.shape),
+                       str(image.dtype), image)
+        data = cache.get(key)
+        if data is not None:
+            return np.frombuffer(data, np.uint8).reshape(-1, 8)
+
+    # Compress in chunks
+    blocks, nblocks = _to_blocks(image)
+    result = np.empty((len(blocks), 8), np.uint8)
+    for i in range(0, len(blocks), _CHUNK):
+        result[i:i+_CHUNK] = encode(blocks[i:i+_CHUNK])
+
+    # Store
+    if key is not None:
+        cache.set(key, result)
+    return result
+
+
+def decompress(data, shape, codec='dxt1'):
+    """ Decompress data produced by compress() into a uint8 RGB image
+    of the given shape (H, W).
+    """
+    decode = _CODECS[codec.lower()][1]
+    h, w = shape[:2]
+    nblocks = (h + 3) // 4, (w + 3) // 4
+    data = np.asarray(data, np.uint8).reshape(-1, 8)
+    if len(data) != nblocks[0] * nblocks[1]:
+        raise ValueError('Compressed data does not match shape.')
+    blocks = decode(data)
+    image = _from_blocks(blocks, nblocks, (h, w))
+    return np.clip(np.round(image), 0, 255).astype(np.uint8)
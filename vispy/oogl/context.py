@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2013, Vispy Development Team.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+""" Keep track of the current OpenGL context.
+
+OpenGL objects (such as compiled shaders) belong to the context in
+which they were created. Oogl objects that share such objects (e.g.
+the ShaderCache) store them per context, using the functions in this
+module. A Canvas makes itself the current context right before its
+initialize and paint events are emitted. If no context was ever set,
+all objects are stored under a single default context.
+
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import weakref
+
+
+# The current context (e.g. a Canvas), or None
+_current_context = None
+
+# Objects stored per context: context -> {name: object}
+_context_objects = weakref.WeakKeyDictionary()
+_default_objects = {}
+
+
+def set_current_context(context):
+    """ Set the object that represents the current OpenGL context (e.g.
+    a Canvas). Can be None to select the default context.
+    """
+    global _current_context
+    _current_context = context
+
+
+def get_current_context():
+    """ Get the object that represents the current OpenGL context, or
+    None if no context was set.
+    """
+    return _current_context
+
+
+def get_context_object(name, factory):
+    """ Get an object that is stored for the current context under the
+    given name. If there is no such object, it is created by calling
+    factory().
+    """
+    if _current_context is None:
+        objects = _default_objects
+    else:
+        objects = _context_objects.setdefault(_current_context, {})
+    try:
+        return objects[name]
+    except KeyError:
+        ob = objects[name] = factory()
+        return ob
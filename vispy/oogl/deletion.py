@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2013, Vispy Development Team.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+""" Deferred deletion of GL objects.
+
+When a GLObject is garbage collected, its GL object cannot be deleted
+right away: the garbage collector may run in another thread, while
+another context is current, or in the middle of a frame. Instead, the
+handle is pushed into the DeletionQueue of the context in which the
+object was created. The Canvas drains the queue at the end of each
+frame, when its context is current, deleting the objects of each type
+with a single call (e.g. one glDeleteBuffers for all buffers).
+
+The queue also counts the live GLObjects of each type in its context, so
+that leaks become visible::
+
+    print(get_deletion_queue().live_objects())
+
+Calling delete() on an object still deletes it immediately.
+
+"""
+
+from __future__ import print_function, division, absolute_import
+
+from vispy import gl
+from .context import get_context_object
+
+
+# The delete functions that take a list of handles; the others
+# (glDeleteShader and glDeleteProgram) take one handle
+_BATCHED = ('glDeleteBuffers', 'glDeleteTextures', 'glDeleteRenderbuffers',
+            'glDeleteFramebuffers')
+
+
+def get_deletion_queue():
+    """ Get the DeletionQueue for the current context.
+    """
+    return get_context_object('deletion_queue', DeletionQueue)
+
+
+
+class DeletionQueue(object):
+    """ Queue of GL objects to delete in one OpenGL context, and the
+    number of live GLObjects per type. Use get_deletion_queue() to obtain
+    the queue for the current context.
+    """
+
+    def __init__(self):
+        # Name of delete function -> list of handles
+        self._pending = {}
+        # Name of GLObject class -> number of live objects
+        self._live = {}
+        self._stats = {'deleted': 0, 'calls': 0}
+
+
+    @property
+    def stats(self):
+        """ A dict with the number of objects deleted and of delete calls
+        made by drain(), and the number of objects in the queue.
+        """
+        stats = dict(self._stats)
+        stats['queued'] = sum(len(handles) for handles in
+                              self._pending.values())
+        return stats
+
+
+    def push(self, funcname, handle):
+        """ Queue a GL object for deletion, by the name of the GL function
+        that deletes it (e.g. 'glDeleteBuffers') and its handle.
+        """
+        self._pending.setdefault(funcname, []).append(handle)
+
+
+    def drain(self):
+        """ Delete the queued GL objects. The context of this queue must
+        be current. Returns the number of objects deleted.
+        """
+        pending, self._pending = self._pending, {}
+        count = 0
+        for funcname, handles in pending.items():
+            func = getattr(gl, funcname)
+            if funcname in _BATCHED:
+                func(len(handles), handles)
+                self._stats['calls'] += 1
+            else:
+                for handle in handles:
+                    func(handle)
+                self._stats['calls'] += len(handles)
+            count += len(handles)
+        self._stats['deleted'] += count
+        return count
+
+
+    def live_objects(self):
+        """ Get a dict with the number of live GLObjects (that have a GL
+        object in this context) per class name.
+        """
+        return dict((name, n) for name, n in self._live.items() if n)
+
+
+    def _created(self, ob):
+        # Called by GLObject when it created its GL object
+        name = ob.__class__.__name__
+        self._live[name] = self._live.get(name, 0) + 1
+
+
+    def _deleted(self, ob):
+        # Called by GLObject when its GL object is deleted or queued
+        name = ob.__class__.__name__
+        self._live[name] = self._live.get(name, 0) - 1
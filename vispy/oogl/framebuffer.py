@@ -109,6 +109,9 @@ class RenderBuffer(GLObject):
         self._need_update = True
     
     
+    _gl_delete = 'glDeleteRenderbuffers'
+    
+    
     def _create(self):
         self._handle = gl.glGenRenderbuffers(1)
     
@@ -278,6 +281,9 @@ class FrameBuffer(GLObject):
                 attachment.set_storage(shape)
     
     
+    _gl_delete = 'glDeleteFramebuffers'
+    
+    
     def _create(self):
         self._handle = gl.glGenFramebuffers(1)
     
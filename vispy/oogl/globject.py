@@ -5,6 +5,8 @@
 """ Definition of the base class for all oogl objects.
 """
 
+from .deletion import get_deletion_queue
+
 
 class GLObject(object):
     """ Base class for classes that wrap an OpenGL object.
@@ -19,12 +21,21 @@ class GLObject(object):
     There are a few exceptions, most notably when enabling an object
     by using it as a context manager, and the delete method. In these
     cases, the called should ensure that the proper OpenGL context is
-    current.
+    current. When an object is garbage collected, its GL object is
+    deleted later, by the DeletionQueue of its context (see deletion.py).
     """
     
     # Internal id counter to keep track of created objects
     _idcount = 0
     
+    # The CommandList that is capturing, which wants to know about all
+    # activated objects (see commandlist.py)
+    _capture = None
+    
+    # The GL function that deletes objects of this type (see
+    # deletion.py), or None if the object does not own a GL object
+    _gl_delete = None
+    
     def __init__(self):
         
         # The type of object (e.g. GL_TEXTURE_2D or GL_ARRAY_BUFFER)
@@ -43,6 +54,12 @@ class GLObject(object):
         # Is set to True if _update() returns without errors
         self._valid = False
         
+        # Number of bytes held for this object by an UploadScheduler
+        self._scheduled_nbytes = 0
+        
+        # The DeletionQueue of the context in which the GL object was
+        # created (set in activate())
+        self._deletion_queue = None
         
         # Error counters (only used here)
         self._error_enter = 0  # Track error on __enter__
@@ -83,9 +100,14 @@ class GLObject(object):
     
     
     def __del__(self):
-        """ Delete the object from OpenGl memory. """
+        """ Queue the object for deletion from OpenGl memory, in the
+        context in which it was created. """
         
-        self.delete()
+        queue = getattr(self, '_deletion_queue', None)
+        if getattr(self, '_handle', 0) and queue is not None:
+            self._queue_delete(queue)
+            queue._deleted(self)
+        self._deletion_queue = None
     
     
     def delete(self):
@@ -94,6 +116,7 @@ class GLObject(object):
         # Only delete object if it was created on GPU
         if self._handle:
             self._delete()
+            self._unregister()
         # Reset
         self._handle = 0
         self._valid = False
@@ -105,7 +128,7 @@ class GLObject(object):
         # Ensure that the GPU equivalent of this object exists 
         if not self.handle:
             try:
-                self._create()
+                self._create_object()
             except Exception:
                 raise RuntimeError('Could not create %r, perhaps there is no OpenGL context?' % self)
         # Perform an update if necessary
@@ -115,6 +138,8 @@ class GLObject(object):
             self._valid = True
         # Activate
         self._activate()
+        if GLObject._capture is not None:
+            GLObject._capture._add_object(self)
     
     
     def deactivate(self):
@@ -123,6 +148,14 @@ class GLObject(object):
         return self._deactivate()
     
     
+    def _is_dirty(self):
+        """ Whether activating the object would issue other GL calls
+        than last time, e.g. because new data was set. Used by the
+        CommandList to invalidate a capture.
+        """
+        return self._need_update
+    
+    
     @property
     def handle(self):
         """ Name of this object in GPU """
@@ -130,6 +163,33 @@ class GLObject(object):
         return self._handle
     
     
+    def _create_object(self):
+        """ Create the GL object with _create(), and register it with
+        the DeletionQueue of the current context. All code that creates
+        the GL object should use this method.
+        """
+        self._create()
+        if self._handle and self._gl_delete and self._deletion_queue is None:
+            self._deletion_queue = get_deletion_queue()
+            self._deletion_queue._created(self)
+    
+    
+    def _unregister(self):
+        """ Unregister the GL object from its DeletionQueue, after it
+        was deleted.
+        """
+        if self._deletion_queue is not None:
+            self._deletion_queue._deleted(self)
+            self._deletion_queue = None
+    
+    
+    def _queue_delete(self, queue):
+        """ Push the GL object into the DeletionQueue, instead of
+        deleting it right away like _delete().
+        """
+        queue.push(self._gl_delete, self._handle)
+    
+    
     # Subclasses may need to overload methods below
 
     def _create(self):     pass
@@ -16,12 +16,15 @@ import weakref
 
 import numpy as np
 
+import vispy
 from vispy import gl
 from . import GLObject, ext_available
 from . import VertexBuffer, ElementBuffer
 from .variable import Attribute, Uniform
 from .shader import VertexShader, FragmentShader
-from vispy.util import is_string
+from .cache import get_shader_cache, get_program_binary_cache, shader_key
+from .context import get_context_object
+from vispy.util import is_string, ptime
 
 
 
@@ -33,6 +36,25 @@ class ProgramError(RuntimeError):
 
 
 
+# From the KHR_parallel_shader_compile extension (not in ES 2.0)
+GL_COMPLETION_STATUS = 0x91B1
+
+
+def _parallel_compile_available():
+    """ Get whether the driver can compile and link in the background,
+    for the current context.
+    """
+    def check():
+        extensions = gl.glGetString(gl.GL_EXTENSIONS) or b''
+        if not isinstance(extensions, bytes):
+            extensions = extensions.encode('utf-8')
+        names = extensions.split()
+        return (b'GL_KHR_parallel_shader_compile' in names or 
+                b'GL_ARB_parallel_shader_compile' in names)
+    return get_context_object('parallel_compile', check)
+
+
+
 class Program(GLObject):
     """ Representation of a shader program. It combines (links) a 
     vertex and a fragment shaders to compose a complete program.
@@ -76,6 +98,9 @@ class Program(GLObject):
         self._attributes = {}
         self._uniforms = {}
         
+        # Shared uniform values, as a list of [UniformGroup, version]
+        self._uniform_groups = []
+        
         # Keep track of which names are active (queried after linking)
         # name -> location
         self._active_attributes = {}
@@ -84,6 +109,16 @@ class Program(GLObject):
         # Keep track of number of vertices
         self._vertex_count = None
         
+        # The ShaderCache, and our key in it if our handle is shared
+        self._cache = None
+        self._cache_key = None
+        
+        # Whether we are compiling/linking in the background, the 
+        # shaders being compiled, and the time spent
+        self._linking = False
+        self._compiling = []
+        self._timings = {}
+        
         shaders = []
         
         # Get all vertex shaders
@@ -147,6 +182,10 @@ class Program(GLObject):
         self._verts = list(set(self._verts))
         self._frags = list(set(self._frags))
 
+        # Stop using the shared (linked) program
+        if self._cache_key is not None and self._handle:
+            self.delete()
+        
         # Update dirty flag to induce a new build when necessary
         self._need_update = True
 
@@ -183,6 +222,10 @@ class Program(GLObject):
             else:
                 ValueError('Invalid value for shader "%r"' % shader)
         
+        # Stop using the shared (linked) program
+        if self._cache_key is not None and self._handle:
+            self.delete()
+        
         # Update dirty flag to induce a new build when necessary
         self._need_update = True
         
@@ -198,6 +241,66 @@ class Program(GLObject):
         return self._verts + self._frags
     
     
+    @property
+    def timings(self):
+        """ A dict with the time (in seconds) spent to 'compile' the
+        shaders and 'link' the program, and the 'total' time until the
+        program was ready. Empty if this program did not link itself 
+        (e.g. when it was obtained from the cache). When compiling in the
+        background, 'compile' is the time to issue the compile calls, 
+        and 'link' includes the time that the driver needed to compile.
+        """
+        return dict(self._timings)
+    
+    
+    def prepare(self, wait=True):
+        """ Compile the shaders and link the program now, rather than
+        on the first draw. The OpenGL context must be current.
+        
+        If wait is False, and the driver supports the 
+        KHR_parallel_shader_compile extension, the driver is asked to
+        compile and link in the background, and this method returns
+        without waiting for it. Call prepare() again (e.g. each frame) 
+        until it returns True. Without the extension, this method always 
+        waits.
+        
+        Returns True if the program is ready to be used.
+        """
+        # Already linked?
+        if self._valid and not self._need_update:
+            return True
+        
+        # Ensure that the GPU equivalent of this object exists 
+        if not self._handle:
+            self._create_object()
+        
+        # Start in the background (unless the program is shared)
+        if not wait and not self._linking and self._cache_key is None:
+            if (not vispy.config['program_binary_cache'] and 
+                    _parallel_compile_available()):
+                self._link(wait=False)
+        
+        # Poll
+        if self._linking and not wait:
+            if not gl.glGetProgramiv(self._handle, GL_COMPLETION_STATUS):
+                return False
+        
+        # Finish
+        self._update()
+        self._need_update = False
+        self._valid = True
+        return True
+    
+    
+    def _get_key(self):
+        """ Get the key for this program in the ShaderCache, based on
+        the source of its shaders.
+        """
+        keys = [shader_key(shader._target, shader.code or '')
+                for shader in self.shaders]
+        return tuple(sorted(keys))
+    
+    
     def __setitem__(self, name, data):
         """ Behave a bit like a dict to assign attributes and uniforms.
         This is the preferred way for the user to set uniforms and attributes.
@@ -209,10 +312,57 @@ class Program(GLObject):
         elif name in self._attributes.keys():
             # Set data
             self._attributes[name].set_data(data)
+        elif self._get_array_element(name) is not None:
+            # Set element of a uniform array
+            uniform, index = self._get_array_element(name)
+            uniform.set_data(data, index)
         else:
             raise NameError("Unknown uniform or attribute: %s" % name)
     
     
+    def add_uniform_group(self, group):
+        """ Use the values of the given UniformGroup for the uniforms
+        of this program with the same names. The values are set on
+        each draw for which the group has changed since the last draw.
+        """
+        for item in self._uniform_groups:
+            if item[0] is group:
+                return
+        self._uniform_groups.append([group, None])
+    
+    
+    def remove_uniform_group(self, group):
+        """ Stop using the values of the given UniformGroup.
+        """
+        self._uniform_groups = [item for item in self._uniform_groups 
+                                if item[0] is not group]
+    
+    
+    def _apply_uniform_groups(self):
+        """ Set the values of the uniform groups that changed since they 
+        were last applied.
+        """
+        for item in self._uniform_groups:
+            group, version = item
+            if group.version == version:
+                continue
+            for name, value in group.items():
+                if name in self._uniforms:
+                    self._uniforms[name].set_data(value)
+            item[1] = group.version
+    
+    
+    def _get_array_element(self, name):
+        """ Get (uniform, index) for a name of the form "name[index]"
+        that refers to an element of a uniform array, or None.
+        """
+        m = re.match("""(?P<name>.+)\[(?P<index>\d+)\]$""", name)
+        if m:
+            uniform = self._uniforms.get(m.group('name'), None)
+            if uniform is not None and uniform.count is not None:
+                return uniform, int(m.group('index'))
+    
+    
     def set_vars(self, vars=None, **keyword_vars):
         """ Set variables from a dict-like object. vars can be a dict
         or a structured numpy array. This is a convenience function
@@ -256,7 +406,8 @@ class Program(GLObject):
             # Dict
             for k in vars:
                 if not (k in self._attributes.keys() or 
-                        k in self._uniforms.keys() ):
+                        k in self._uniforms.keys() or
+                        self._get_array_element(k) is not None):
                     print('Dropping "%s" item; '
                             'it is not a known attribute/uniform.' % k)
                 else:
@@ -339,11 +490,26 @@ class Program(GLObject):
             f_uniforms.extend(shader._get_uniforms())
         uniforms = list(set(v_uniforms + f_uniforms))
         
-        # Create Uniform ojects for each one
+        # This match the name of an array element "name[index]"
+        regex = re.compile("""(?P<name>.+)\[(?P<index>\d+)\]$""")
+        
+        # Create Uniform ojects for each one, except for the elements
+        # of arrays, which are grouped in one Uniform (samplers excepted)
         self._uniforms = {}
+        for item in self._uniform_groups:
+            item[1] = None  # Apply groups to the new uniforms
+        arrays = {}
         for (name, gtype) in uniforms:
-            uniform = Uniform(name, gtype)
-            self._uniforms[name] = uniform
+            m = regex.match(name)
+            if m and gtype not in (gl.GL_SAMPLER_2D, gl.GL_SAMPLER_CUBE,
+                                   gl.ext.GL_SAMPLER_3D):
+                key = m.group('name'), gtype
+                index = int(m.group('index'))
+                arrays[key] = max(arrays.get(key, 0), index + 1)
+            else:
+                self._uniforms[name] = Uniform(name, gtype)
+        for (name, gtype), count in arrays.items():
+            self._uniforms[name] = Uniform(name, gtype, count)
         
     
     def _mark_active_attributes(self):
@@ -374,22 +540,18 @@ class Program(GLObject):
                         self._active_attributes[name] = loc
             else:
                 self._active_attributes[name] = loc
-        
-        # Mark these as active (loc non-None means active)
-        for attribute in self._attributes.values():
-            attribute._loc = self._active_attributes.get(attribute.name, None)
     
     
     def _mark_active_uniforms(self):
-        """ Mark which uniforms are actve and set the location, 
-        for textures also set texture unit.
+        """ Mark which uniforms are actve and set the location.
         Called after linking. 
         """
 
         count = gl.glGetProgramiv(self.handle, gl.GL_ACTIVE_UNIFORMS)
         
-        # This match a name of the form "name[size]" (= array)
-        regex = re.compile("""(?P<name>\w+)\s*(\[(?P<size>\d+)\])\s*""")
+        # This match a name of the form "name[0]" (= array)
+        # (but not "name[0].member", the member of an array of structs)
+        regex = re.compile("""(?P<name>.+)\[0\]\s*$""")
         
         # Find active uniforms
         self._active_uniforms = {}
@@ -400,20 +562,39 @@ class Program(GLObject):
             # This checks if the uniform is an array
             # Name will be something like xxx[0] instead of xxx
             m = regex.match(name)
-            # When uniform is an array, size corresponds to the highest used index
+            # When uniform is an array, size corresponds to the highest used 
+            # index. The GL does not guarantee that the locations of the
+            # elements are consecutive, so we query each one.
             if m:
-                name = m.group('name')
-                if size >= 1:
-                    for i in range(size):
-                        name = '%s[%d]' % (m.group('name'),i)
-                        self._active_uniforms[name] = loc
+                self._active_uniforms[name] = loc
+                for j in range(1, size):
+                    name = '%s[%d]' % (m.group('name'), j)
+                    self._active_uniforms[name] = gl.glGetUniformLocation(
+                        self._handle, name.encode('utf-8'))
             else:
                 self._active_uniforms[name] = loc
+    
+    
+    def _set_locations(self):
+        """ Set the location of our attributes and uniforms, and the
+        texture unit of texture uniforms. Called after linking, or after
+        obtaining a linked program from the ShaderCache.
+        """
+        # Mark these as active (loc non-None means active)
+        for attribute in self._attributes.values():
+            attribute._loc = self._active_attributes.get(attribute.name, None)
         
         # Mark these as active (loc non-None means active)
         texture_count = 0
         for uniform in self._uniforms.values():
-            uniform._loc = self._active_uniforms.get(uniform.name, None)
+            if uniform.count is not None:
+                # Arrays: the location of each element
+                uniform._locs = [self._active_uniforms.get(
+                    '%s[%d]' % (uniform.name, i), None) 
+                    for i in range(uniform.count)]
+                uniform._loc = uniform._locs[0]
+            else:
+                uniform._loc = self._active_uniforms.get(uniform.name, None)
             if uniform._loc is not None:
                 if uniform._textureClass:
                     uniform._texture_unit = texture_count
@@ -423,12 +604,37 @@ class Program(GLObject):
     
     ## Behaver like a GLObject
     
+    _gl_delete = 'glDeleteProgram'
+    
     def _create(self):
+        # Use a linked program from the cache if possible
+        self._cache = get_shader_cache()
+        if self._verts and self._frags:
+            key = self._get_key()
+            cached = self._cache.acquire_program(key)
+            if cached is not None:
+                self._handle, self._cache_key = cached[0], key
+                self._active_attributes = dict(cached[1])
+                self._active_uniforms = dict(cached[2])
+                self._need_update = True  # To set locations
+                return
         self._handle = gl.glCreateProgram()
     
     
     def _delete(self):
-        gl.glDeleteProgram(self._handle)
+        if self._cache_key is not None:
+            self._cache.release_program(self._cache_key)
+            self._cache_key = None
+        else:
+            gl.glDeleteProgram(self._handle)
+    
+    
+    def _queue_delete(self, queue):
+        if self._cache_key is not None:
+            self._cache.release_program(self._cache_key, queue)
+            self._cache_key = None
+        else:
+            queue.push('glDeleteProgram', self._handle)
     
     
     def _activate(self):
@@ -441,11 +647,41 @@ class Program(GLObject):
         # Use this program!
         gl.glUseProgram(self._handle)
         
+        # If our GL program is shared and was last used by another 
+        # Program, the uniform values in it are not ours.
+        if self._cache_key is not None:
+            if GLObject._capture is not None:
+                GLObject._capture._add_program_user(self._cache, 
+                                                    self._cache_key, self)
+            if self._cache.set_program_user(self._cache_key, self):
+                for uniform in self._uniforms.values():
+                    uniform._dirty = True
+                    uniform._dirty_range = None
+        
         # Mark as enabled, prepare to enable other objects
         self._active = True
         self._activated_objects = []
     
     
+    def _is_dirty(self):
+        """ Whether drawing would upload variables (or relink).
+        """
+        if self._need_update:
+            return True
+        for variable in self._attributes.values():
+            if variable._dirty and variable.active:
+                return True
+        for variable in self._uniforms.values():
+            if variable._dirty and variable.active:
+                return True
+        for group, version in self._uniform_groups:
+            if group.version != version:
+                return True
+        # Whether the uniform values in a shared program are ours is
+        # checked by the CommandList, see _add_program_user()
+        return False
+    
+    
     def _deactivate(self):
         """ Deactivate any objects that were activated on our behalf,
         and then deactivate ourself.
@@ -461,39 +697,109 @@ class Program(GLObject):
         flag is set
         """
         
+        # Shared program that is already linked
+        if self._cache_key is not None:
+            self._set_locations()
+            return
+        
         # Check if we have something to link
         if not self._verts:
             raise ProgramError("No vertex shader has been given")
         if not self._frags:
             raise ProgramError("No fragment shader has been given")
         
+        # Load the linked program from disk, or link (and save) it
+        key = self._get_key()
+        binary_cache = None
+        if vispy.config['program_binary_cache']:
+            binary_cache = get_program_binary_cache()
+        loaded = False
+        if binary_cache and not self._linking:
+            loaded = binary_cache.load(self._handle, key)
+        if not loaded:
+            # Link (unless this was started by prepare()) and check
+            if not self._linking:
+                self._link()
+            self._check_link()
+            if binary_cache:
+                binary_cache.save(self._handle, key)
+        
+        # Mark all active attributes and uniforms
+        self._mark_active_attributes()
+        self._mark_active_uniforms()
+        self._set_locations()
+        
+        # Share the linked program
+        if self._cache.add_program(key, self._handle, 
+                                   self._active_attributes, 
+                                   self._active_uniforms):
+            self._cache_key = key
+    
+    
+    def _link(self, wait=True):
+        """ Compile the shaders and link the program. The link status
+        is checked in _check_link(). If wait is False, the compile status
+        of the shaders is not checked either, so that the driver can do
+        all work in the background.
+        """
+        t0 = ptime.time()
+        
         # Detach any attached shaders
         attached = gl.glGetAttachedShaders(self._handle)
         for handle in attached:
             gl.glDetachShader(self._handle, handle)
         
-        # Attach and activate vertex and fragment shaders
+        # Attach and activate (i.e. compile) vertex and fragment shaders
+        self._compiling = []
         for shader in self.shaders:
-            shader.activate()
+            if wait:
+                shader.activate()
+            else:
+                if not shader.handle:
+                    shader._create_object()
+                if shader._need_update:
+                    shader._compile()
+                    self._compiling.append(shader)
             gl.glAttachShader(self._handle, shader.handle)
         
         # Only proceed if all shaders compiled ok
-        oks = [shader._valid for shader in self.shaders]
-        if not (oks and all(oks)):
-            raise ProgramErrorr('Shaders did not compile.')
+        if wait:
+            oks = [shader._valid for shader in self.shaders]
+            if not (oks and all(oks)):
+                raise ProgramError('Shaders did not compile.')
         
         # Link the program
         # todo: should there be a try-except around this?
+        t1 = ptime.time()
         gl.glLinkProgram(self._handle)
+        self._timings = {'compile': t1 - t0}
+        self._link_started = t0, t1
+        self._linking = True
+    
+    
+    def _check_link(self):
+        """ Check the compile status of the shaders that were compiled
+        in the background, and the link status of the program.
+        """
+        self._linking = False
+        
+        # Check shaders
+        compiling, self._compiling = self._compiling, []
+        for shader in compiling:
+            shader._check_compile()
+            shader._need_update = False
+            shader._valid = True
+        
+        # Check link status
         if not gl.glGetProgramiv(self._handle, gl.GL_LINK_STATUS):
             errors = gl.glGetProgramInfoLog(self._handle)
             print(errors)
             #parse_shader_errors(errors)
             raise ProgramError('Linking error')
         
-        # Mark all active attributes and uniforms
-        self._mark_active_attributes()
-        self._mark_active_uniforms()
+        # Timings
+        t, (t0, t1) = ptime.time(), self._link_started
+        self._timings.update(link=t - t1, total=t - t0)
     
     
     ## Drawing and enabling
@@ -530,6 +836,7 @@ class Program(GLObject):
             raise ProgramError('ShaderProgram must be active when drawing.')
         
         # Upload any attributes and uniforms if necessary
+        self._apply_uniform_groups()
         for variable in (self.attributes + self.uniforms):
             if variable.active:
                 variable.upload(self)
@@ -593,6 +900,7 @@ class Program(GLObject):
             raise ProgramError('Program must be active for drawing.')
         
         # Upload any attributes and uniforms if necessary
+        self._apply_uniform_groups()
         for variable in (self.attributes + self.uniforms):
             if variable.active:
                 variable.upload(self)
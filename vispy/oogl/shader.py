@@ -20,13 +20,15 @@ Example
 from __future__ import print_function, division
 
 import re
+import operator
 import os.path
 import numpy as np
-import OpenGL.GL as gl
 
 from vispy import gl
 from vispy.util import is_string
 from vispy.oogl.globject import GLObject
+from vispy.oogl.cache import get_shader_cache, shader_key
+from vispy.util.diskcache import hash_key
 
 
 
@@ -38,6 +40,366 @@ class ShaderError(RuntimeError):
 
 
 
+# ------------------------------------------------------------ GLSL parsing ---
+
+# Comments, and a backslash at the end of a line
+_comment_regex = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+_continuation_regex = re.compile(r'\\\s*\n')
+
+# Identifiers, numbers, operators and single characters
+_token_regex = re.compile(r'[A-Za-z_]\w*|\d+(\.\d*)?([eE][+-]?\d+)?|'
+                          r'==|!=|<=|>=|&&|\|\||<<|>>|\S')
+
+# Qualifiers that can precede the type in a declaration
+_qualifiers = set(['const', 'lowp', 'mediump', 'highp', 'invariant'])
+
+# Memoized declarations: hash of the source -> (attributes, uniforms)
+_declarations = {}
+
+# Macros that are defined by the GLSL compiler, with values that depend
+# on the implementation (e.g. GL_ES is only defined by OpenGL ES). The
+# branches of conditions that depend on them are all kept. __VERSION__
+# is known if the code has a #version directive.
+_builtin_macros = set(['GL_ES', '__VERSION__', 'GL_FRAGMENT_PRECISION_HIGH'])
+
+# The binary operators of the preprocessor, by precedence
+_binary_operators = {'||': 1, '&&': 2, '|': 3, '^': 4, '&': 5, 
+                     '==': 6, '!=': 6, '<': 7, '>': 7, '<=': 7, '>=': 7, 
+                     '<<': 8, '>>': 8, '+': 9, '-': 9, 
+                     '*': 10, '/': 10, '%': 10}
+_operator_functions = {'|': operator.or_, '^': operator.xor, 
+                       '&': operator.and_, '==': operator.eq, 
+                       '!=': operator.ne, '<': operator.lt, '>': operator.gt,
+                       '<=': operator.le, '>=': operator.ge, 
+                       '+': operator.add, '-': operator.sub, 
+                       '*': operator.mul}
+
+
+def _strip_comments(code):
+    """ Remove comments and line continuations. Block comments are 
+    replaced by their newlines, so that preprocessor lines stay intact.
+    """
+    def replace(m):
+        return '\n' * m.group(0).count('\n') or ' '
+    code = _continuation_regex.sub('', code)
+    return _comment_regex.sub(replace, code)
+
+
+def _binary(op, a, b):
+    """ Apply a binary operator of the preprocessor to two integers.
+    """
+    if op in ('/', '%'):
+        if b == 0:
+            raise ValueError('Division by zero.')
+        # C division truncates towards zero
+        q = abs(a) // abs(b) * (1 if (a < 0) == (b < 0) else -1)
+        return q if op == '/' else a - b * q
+    elif op in ('<<', '>>'):
+        if not 0 <= b < 64:
+            raise ValueError('Invalid shift.')
+        return a << b if op == '<<' else a >> b
+    elif op == '||':
+        return int(bool(a or b))
+    elif op == '&&':
+        return int(bool(a and b))
+    return int(_operator_functions[op](a, b))
+
+
+def _evaluate_integer(tokens):
+    """ Evaluate an integer expression of the preprocessor, given as a 
+    list of tokens. Only (decimal and octal) integers, operators and 
+    parentheses are allowed; raises ValueError otherwise.
+    """
+    pos = [0]
+    
+    def next_token():
+        if pos[0] >= len(tokens):
+            raise ValueError('Unexpected end of expression.')
+        pos[0] += 1
+        return tokens[pos[0] - 1]
+    
+    def operand():
+        token = next_token()
+        if token == '(':
+            value = expression(1)
+            if next_token() != ')':
+                raise ValueError('Missing ")".')
+            return value
+        elif token in ('-', '+', '!', '~'):
+            value = operand()
+            return {'-': -value, '+': value, '!': int(not value), 
+                    '~': ~value}[token]
+        elif token.isdigit():
+            return int(token, 8) if token.startswith('0') else int(token)
+        raise ValueError('Invalid token "%s".' % token)
+    
+    def expression(precedence):
+        # Precedence climbing: operators are left associative
+        value = operand()
+        while pos[0] < len(tokens):
+            op = tokens[pos[0]]
+            op_precedence = _binary_operators.get(op, 0)
+            if op_precedence < precedence:
+                break
+            pos[0] += 1
+            value = _binary(op, value, expression(op_precedence + 1))
+        return value
+    
+    value = expression(1)
+    if pos[0] != len(tokens):
+        raise ValueError('Invalid token "%s".' % tokens[pos[0]])
+    return value
+
+
+def _evaluate(expression, defines):
+    """ Evaluate a preprocessor expression (as used in #if and #elif)
+    for the given defines. Returns None if the value is not known: if the
+    expression depends on an implementation-defined macro (e.g. GL_ES), 
+    or cannot be evaluated. The caller then keeps all branches, so that
+    no declarations are lost.
+    """
+    for name in _builtin_macros.intersection(_tokenize(expression)):
+        if name not in defines:
+            return None
+    # Resolve defined(NAME) and defined NAME
+    def replace(m):
+        return ' 1 ' if m.group(1) in defines else ' 0 '
+    expression = re.sub(r'defined\s*\(\s*(\w+)\s*\)', replace, expression)
+    expression = re.sub(r'defined\s+(\w+)', replace, expression)
+    # Replace macros by their values, undefined names by 0
+    tokens = _expand_macros(_tokenize(expression), defines)
+    tokens = [('0' if (t[0].isalpha() or t[0] == '_') else t) for t in tokens]
+    try:
+        return bool(_evaluate_integer(tokens))
+    except ValueError:
+        return None
+
+
+def _preprocess(code):
+    """ Remove the code in inactive #if/#ifdef/#ifndef branches. Returns 
+    the remaining code and a dict with the (object-like) macros.
+    """
+    defines = {}
+    # [active, any_branch_taken] for each nested #if; for a condition
+    # with an unknown value, all branches are active
+    stack = []
+    lines = []
+    for line in code.split('\n'):
+        stripped = line.strip()
+        active = all([branch[0] for branch in stack])
+        if not stripped.startswith('#'):
+            if active:
+                lines.append(line)
+            continue
+        # Preprocessor directive
+        parts = stripped[1:].strip().split(None, 1)
+        directive = parts[0] if parts else ''
+        arg = parts[1].strip() if len(parts) > 1 else ''
+        if directive in ('if', 'ifdef', 'ifndef'):
+            if directive == 'if':
+                condition = _evaluate(arg, defines)
+            else:
+                condition = _evaluate('defined ' + arg, defines) if arg else 0
+                if directive == 'ifndef' and condition is not None:
+                    condition = not condition
+            if condition is None:
+                stack.append([True, False])
+            else:
+                stack.append([condition, condition])
+        elif directive == 'elif' and stack:
+            taken = stack[-1][1]
+            condition = False if taken else _evaluate(arg, defines)
+            if condition is None:
+                stack[-1] = [True, False]
+            else:
+                stack[-1] = [condition, taken or condition]
+        elif directive == 'else' and stack:
+            stack[-1] = [not stack[-1][1], True]
+        elif directive == 'endif' and stack:
+            stack.pop()
+        elif directive == 'define' and active and arg:
+            m = re.match(r'(\w+)(\()?\s*(.*)', arg)
+            if m and not m.group(2):  # Function-like macros are ignored
+                defines[m.group(1)] = m.group(3).strip()
+        elif directive == 'undef' and active and arg:
+            defines.pop(arg.split()[0], None)
+        elif directive == 'version' and arg:
+            defines['__VERSION__'] = arg.split()[0]
+    return '\n'.join(lines), defines
+
+
+def _tokenize(code):
+    """ Split (preprocessed) code in tokens.
+    """
+    return [m.group(0) for m in _token_regex.finditer(code)]
+
+
+def _expand_macros(tokens, defines, depth=0):
+    """ Replace object-like macros in a list of tokens by their value.
+    """
+    if depth > 16:  # Recursive macro
+        return tokens
+    result = []
+    for token in tokens:
+        if token in defines:
+            value = _tokenize(defines[token])
+            result.extend(_expand_macros(value, defines, depth+1))
+        else:
+            result.append(token)
+    return result
+
+
+def _parse_declarators(tokens, defines):
+    """ Parse "name[size], name2" into a list of (name, size) tuples.
+    Size is None for non-arrays.
+    """
+    declarators = []
+    i = 0
+    while i < len(tokens):
+        name, size = tokens[i], None
+        i += 1
+        if i < len(tokens) and tokens[i] == '[':
+            end = tokens.index(']', i)
+            try:
+                size = _evaluate_integer(tokens[i+1:end])
+            except ValueError:
+                raise ShaderError('Cannot determine array size "%s".' % 
+                                  ' '.join(tokens[i+1:end]))
+            i = end + 1
+        declarators.append((name, size))
+        # Skip initializer (e.g. for const) up to the next comma
+        while i < len(tokens) and tokens[i] != ',':
+            i += 1
+        i += 1
+    return declarators
+
+
+def _parse_declaration(tokens, defines):
+    """ Parse a declaration (without storage qualifier and semicolon)
+    into the type and a list of (name, size) tuples.
+    """
+    while tokens and tokens[0] in _qualifiers:
+        tokens = tokens[1:]
+    if len(tokens) < 2:
+        raise ShaderError('Invalid declaration "%s".' % ' '.join(tokens))
+    return tokens[0], _parse_declarators(tokens[1:], defines)
+
+
+def _parse_struct(tokens, i, structs, defines):
+    """ Parse the struct definition that starts at tokens[i] ('struct'),
+    and add its members to structs. Returns the name of the struct (a
+    made up one for anonymous structs) and the index of the token after
+    the closing brace.
+    """
+    i += 1
+    if i < len(tokens) and tokens[i] != '{':
+        name = tokens[i]
+        i += 1
+    else:
+        name = '<struct %d>' % len(structs)
+    if i >= len(tokens) or tokens[i] != '{':
+        raise ShaderError('Invalid struct definition "%s".' % name)
+    members = []
+    statement = []
+    i += 1
+    while i < len(tokens) and tokens[i] != '}':
+        if tokens[i] == 'struct':
+            # Struct defined in the declaration of a member
+            member_type, i = _parse_struct(tokens, i, structs, defines)
+            statement.append(member_type)
+            continue
+        if tokens[i] == ';':
+            type, declarators = _parse_declaration(statement, defines)
+            members.extend([(type, n, s) for n, s in declarators])
+            statement = []
+        else:
+            statement.append(tokens[i])
+        i += 1
+    structs[name] = members
+    return name, i + 1
+
+
+def _expand_variable(type, name, size, structs, result):
+    """ Expand a variable into (name, gtype) tuples, one for each array
+    element and struct member, named as OpenGL reports them. Variables
+    of unknown types are skipped.
+    """
+    if size is None:
+        names = [name]
+    else:
+        names = ['%s[%d]' % (name, i) for i in range(size)]
+    for name in names:
+        if type in structs:
+            for member_type, member_name, member_size in structs[type]:
+                _expand_variable(member_type, name + '.' + member_name, 
+                                 member_size, structs, result)
+        elif type in Shader._gtypes:
+            result.append((name, Shader._gtypes[type]))
+
+
+def parse_declarations(code):
+    """ Get the attributes and uniforms declared in the given GLSL code.
+    
+    Comments and code in inactive preprocessor branches are ignored,
+    and macros are expanded. Arrays and structs are expanded into their
+    elements and members (e.g. "lights[0].color"). The result is
+    memoized, so each source is parsed only once.
+    
+    Returns
+    -------
+    attributes : tuple
+        Tuple of (name, gtype) tuples.
+    uniforms : tuple
+        Tuple of (name, gtype) tuples.
+    """
+    key = hash_key(code)
+    try:
+        return _declarations[key]
+    except KeyError:
+        pass
+    
+    # Prepare tokens
+    code, defines = _preprocess(_strip_comments(code))
+    tokens = _expand_macros(_tokenize(code), defines)
+    
+    # Walk over all statements at global scope
+    structs = {}  # name -> list of (type, name, size)
+    variables = {'attribute': [], 'uniform': []}
+    depth, i = 0, 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == '{':
+            depth += 1
+        elif token == '}':
+            depth -= 1
+        elif depth == 0 and token == 'struct':
+            # Struct definition: parse members
+            name, i = _parse_struct(tokens, i, structs, defines)
+            continue
+        elif depth == 0 and token in variables:
+            # Attribute or uniform declaration, the struct of which may
+            # be defined inline (e.g. "uniform struct S {...} s;")
+            statement = []
+            i += 1
+            while i < len(tokens) and tokens[i] != ';':
+                if tokens[i] == 'struct':
+                    name, i = _parse_struct(tokens, i, structs, defines)
+                    statement.append(name)
+                else:
+                    statement.append(tokens[i])
+                    i += 1
+            type, declarators = _parse_declaration(statement, defines)
+            for name, size in declarators:
+                _expand_variable(type, name, size, structs, variables[token])
+        i += 1
+    
+    result = tuple(variables['attribute']), tuple(variables['uniform'])
+    _declarations[key] = result
+    return result
+
+
+
+
 
 # ------------------------------------------------------------ class Shader ---
 class Shader(GLObject):
@@ -79,6 +441,10 @@ class Shader(GLObject):
             raise ValueError('Target must be vertex or fragment shader.')
         self._target = target
         
+        # The ShaderCache, and our key in it if our handle is shared
+        self._cache = None
+        self._cache_key = None
+        
         # Set code
         self._code = None
         self._source = None
@@ -102,6 +468,9 @@ class Shader(GLObject):
 
         if not is_string(code):
             raise TypeError('code must be a string (%s)' % type(code))
+        # Stop using the shared (compiled) shader
+        if self._cache_key is not None and self._handle:
+            self.delete()
         # Set code and source
         if os.path.exists(code):
             with open(code) as file:
@@ -129,22 +498,7 @@ class Shader(GLObject):
         Extract attributes (name and type) from code.
         """
 
-        attributes = []
-        regex = re.compile("""\s*attribute\s+(?P<type>\w+)\s+"""
-                           """(?P<name>\w+)\s*(\[(?P<size>\d+)\])?\s*;""")
-        for m in re.finditer(regex,self._code):
-            size = -1
-            gtype = Shader._gtypes[m.group('type')]
-            if m.group('size'):
-                size = int(m.group('size'))
-            if size >= 1:
-                for i in range(size):
-                    name = '%s[%d]' % (m.group('name'),i)
-                    attributess.append((name, gtype))
-            else:
-                attributes.append((m.group('name'), gtype))
-
-        return attributes
+        return list(parse_declarations(self._code or '')[0])
     
     
     def _get_uniforms(self):
@@ -152,37 +506,51 @@ class Shader(GLObject):
         Extract uniforms (name and type) from code.
         """
 
-        uniforms = []
-        regex = re.compile("""\s*uniform\s+(?P<type>\w+)\s+"""
-                           """(?P<name>\w+)\s*(\[(?P<size>\d+)\])?\s*;""")
-        for m in re.finditer(regex,self._code):
-            size = -1
-            gtype = Shader._gtypes[m.group('type')]
-            if m.group('size'):
-                size = int(m.group('size'))
-            if size >= 1:
-                for i in range(size):
-                    name = '%s[%d]' % (m.group('name'),i)
-                    uniforms.append((name, gtype))
-            else:
-                uniforms.append((m.group('name'), gtype))
-
-        return uniforms
+        return list(parse_declarations(self._code or '')[1])
+    
+    
+    _gl_delete = 'glDeleteShader'
     
     
     def _create(self):
         """
-        Create the shader.
+        Create the shader, or use a compiled one from the ShaderCache.
         """
+        self._cache = get_shader_cache()
+        if self._code:
+            key = shader_key(self._target, self._code)
+            handle = self._cache.acquire_shader(key)
+            if handle:
+                # Already compiled, no need to update
+                self._handle, self._cache_key = handle, key
+                self._need_update = False
+                self._valid = True
+                return
         self._handle = gl.glCreateShader(self._target)
     
     
     def _delete(self):
         """
-        Delete the shader.
+        Delete the shader (or release it, if it is shared).
         """
 
-        gl.glDeleteShader(self._handle)
+        if self._cache_key is not None:
+            self._cache.release_shader(self._cache_key)
+            self._cache_key = None
+        else:
+            gl.glDeleteShader(self._handle)
+    
+    
+    def _queue_delete(self, queue):
+        """
+        Queue the shader for deletion (or release it, if it is shared).
+        """
+
+        if self._cache_key is not None:
+            self._cache.release_shader(self._cache_key, queue)
+            self._cache_key = None
+        else:
+            queue.push('glDeleteShader', self._handle)
 
     
     def _update(self):
@@ -190,6 +558,17 @@ class Shader(GLObject):
         Compile the shader.
         """
 
+        self._compile()
+        self._check_compile()
+
+
+    def _compile(self):
+        """
+        Start compiling the shader. The status is checked in
+        _check_compile(), so that the driver can compile in the
+        background (KHR_parallel_shader_compile).
+        """
+
         # Check if we have source code
         if not self._code:
             raise ShaderError('No source code given for shader.')
@@ -201,6 +580,12 @@ class Shader(GLObject):
         # todo: can this raise exception?
         gl.glCompileShader(self._handle)
 
+
+    def _check_compile(self):
+        """
+        Check the compile status of the shader, and share it.
+        """
+
         # Check the compile status
         status = gl.glGetShaderiv(self._handle, gl.GL_COMPILE_STATUS)
         if not status:
@@ -208,6 +593,11 @@ class Shader(GLObject):
             errors = gl.glGetShaderInfoLog(self._handle)
             self._parse_shader_errors(errors, self._code)
             raise ShaderError("Shader compilation error")
+        
+        # Share the compiled shader
+        key = shader_key(self._target, self._code)
+        if self._cache.add_shader(key, self._handle):
+            self._cache_key = key
 
 
     def _parse_error(self, error):
@@ -0,0 +1,109 @@
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team
+# All rights reserved.
+# -----------------------------------------------------------------------------
+import unittest
+import numpy as np
+
+from vispy.oogl.atlas import SkylinePacker
+from vispy.oogl.atlas import TextureAtlas
+from vispy.oogl.atlas import AtlasError
+
+
+def overlap(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    return ax < bx+bw and bx < ax+aw and ay < by+bh and by < ay+ah
+
+
+# -----------------------------------------------------------------------------
+class SkylinePackerTest(unittest.TestCase):
+
+    def test_pack_no_overlap(self):
+        packer = SkylinePacker(64, 64)
+        rects = []
+        for w, h in [(10,20), (30,5), (16,16), (8,40), (20,20), (5,5)]:
+            x, y = packer.pack(w, h)
+            assert x >= 0 and y >= 0 and x+w <= 64 and y+h <= 64
+            rects.append((x, y, w, h))
+        for i in range(len(rects)):
+            for j in range(i+1, len(rects)):
+                assert not overlap(rects[i], rects[j])
+
+    def test_pack_full(self):
+        packer = SkylinePacker(16, 16)
+        for i in range(4):
+            assert packer.pack(8, 8) is not None
+        assert packer.pack(1, 1) is None
+        packer.reset()
+        assert packer.pack(16, 16) == (0, 0)
+
+
+# -----------------------------------------------------------------------------
+class TextureAtlasTest(unittest.TestCase):
+
+    def test_add(self):
+        atlas = TextureAtlas((64, 64, 4))
+        im = np.zeros((8, 16, 4), np.uint8)
+        uv = atlas.add('a', im)
+        assert uv.dtype == np.float32
+        assert np.allclose(uv[2]-uv[0], 16/64.)
+        assert np.allclose(uv[3]-uv[1], 8/64.)
+        assert len(atlas.texture._pending_subdata) == 1
+        # Adding again only increases the count
+        uv2 = atlas.add('a', im)
+        assert (uv == uv2).all()
+        assert len(atlas.texture._pending_subdata) == 1
+        assert atlas.uvs(['a', 'a']).shape == (2, 4)
+
+    def test_wrong_channels(self):
+        atlas = TextureAtlas((64, 64, 4))
+        with self.assertRaises(ValueError):
+            atlas.add('a', np.zeros((8, 8, 3), np.uint8))
+
+    def test_evict(self):
+        atlas = TextureAtlas((32, 32), padding=0)
+        atlas.add('a', np.zeros((32, 16), np.uint8))
+        atlas.add('b', np.zeros((32, 16), np.uint8))
+        with self.assertRaises(AtlasError):
+            atlas.add('c', np.zeros((32, 16), np.uint8))
+        atlas.release('a')
+        atlas.add('c', np.zeros((32, 16), np.uint8))
+        assert 'a' not in atlas
+        assert 'b' in atlas and 'c' in atlas
+
+    def test_defragment(self):
+        atlas = TextureAtlas((32, 32), padding=0)
+        for key in 'abcd':
+            atlas.add(key, np.zeros((16, 16), np.uint8))
+        atlas.remove('a')
+        atlas.remove('d')
+        # Free space is fragmented; a 32x16 image needs a repack
+        uv = atlas.add('e', np.zeros((16, 32), np.uint8))
+        assert len(atlas) == 3
+        regions = [atlas._entries[k].region for k in atlas.keys()]
+        for i in range(len(regions)):
+            for j in range(i+1, len(regions)):
+                assert not overlap(regions[i], regions[j])
+        assert np.allclose(uv[2]-uv[0], 1.0)
+        assert atlas.generation == 1
+
+    def test_padding(self):
+        atlas = TextureAtlas((32, 32), padding=2)
+        atlas.add('a', np.full((4, 4), 9, np.uint8))
+        atlas.remove('a')
+        im = np.arange(6, dtype=np.uint8).reshape(2, 3)
+        atlas.add('b', im)
+        assert atlas.generation == 0
+        # The padding is uploaded too, with the edge texels of the image
+        data, offset = atlas.texture._pending_subdata[-1][:2]
+        x, y, w, h = atlas._entries['b'].region
+        assert tuple(offset) == (y-2, x-2)
+        assert data.shape == (6, 7)
+        assert (data[2:4, 2:5] == im).all()
+        assert (data[0] == [0, 0, 0, 1, 2, 2, 2]).all()
+        assert (data[:, -1] == [2, 2, 2, 5, 5, 5]).all()
+
+
+if __name__ == "__main__":
+    unittest.main()
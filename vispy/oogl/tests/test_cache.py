@@ -0,0 +1,280 @@
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team
+# All rights reserved.
+# -----------------------------------------------------------------------------
+import shutil
+import tempfile
+import unittest
+
+import vispy
+from vispy import gl
+from vispy.oogl.program import Program
+from vispy.oogl.shader import VertexShader
+from vispy.oogl.context import set_current_context
+from vispy.oogl.cache import get_shader_cache, get_program_binary_cache
+from vispy.oogl.cache import ProgramBinaryCache
+from vispy.oogl import context
+
+
+VERT = """
+uniform float u_scale;
+attribute vec2 a_position;
+void main() { gl_Position = vec4(a_position*u_scale, 0.0, 1.0); }
+"""
+
+FRAG = """
+void main() { gl_FragColor = vec4(1.0); }
+"""
+
+
+class FakeGL(object):
+    """ Replaces the vispy.gl functions used by shaders and programs, and
+    counts compiles, links and deletions.
+    """
+
+    NAMES = ['glCreateShader', 'glShaderSource', 'glCompileShader',
+             'glGetShaderiv', 'glDeleteShader', 'glCreateProgram',
+             'glDeleteProgram', 'glGetAttachedShaders', 'glAttachShader',
+             'glLinkProgram', 'glGetProgramiv', 'glGetActiveAttrib',
+             'glGetAttribLocation', 'glGetActiveUniform',
+             'glGetUniformLocation', 'glUseProgram', 'glGetString',
+             'glUniform1fv']
+    EXT_NAMES = ['glGetProgramBinary', 'glProgramBinary']
+
+    def __init__(self):
+        self.counts = dict((name, 0) for name in self.NAMES + self.EXT_NAMES)
+        self.linked = set()
+        self.uploads = []
+        self.reject_binaries = False
+        self.extensions = b''
+        self.complete = True
+        self._handle = 0
+        self._originals = {}
+
+    def install(self):
+        for ns, names in [(gl, self.NAMES), (gl.ext, self.EXT_NAMES)]:
+            for name in names:
+                self._originals[(ns, name)] = getattr(ns, name)
+                setattr(ns, name, self._make(name))
+
+    def uninstall(self):
+        for (ns, name), func in self._originals.items():
+            setattr(ns, name, func)
+
+    def _make(self, name):
+        def func(*args):
+            self.counts[name] += 1
+            return getattr(self, '_' + name, lambda *args: None)(*args)
+        return func
+
+    def _new_handle(self, *args):
+        self._handle += 1
+        return self._handle
+
+    _glCreateShader = _glCreateProgram = _new_handle
+
+    def _glGetShaderiv(self, handle, pname):
+        return True
+
+    def _glUniform1fv(self, loc, count, data):
+        self.uploads.append(data)
+
+    def _glGetAttachedShaders(self, handle):
+        return []
+
+    def _glGetProgramiv(self, handle, pname):
+        return {gl.GL_LINK_STATUS: handle in self.linked,
+                gl.GL_ACTIVE_ATTRIBUTES: 1, gl.GL_ACTIVE_UNIFORMS: 1,
+                gl.ext.GL_PROGRAM_BINARY_LENGTH: 16,
+                0x91B1: self.complete}[pname]
+
+    def _glLinkProgram(self, handle):
+        self.linked.add(handle)
+
+    def _glGetString(self, name):
+        return self.extensions if name == gl.GL_EXTENSIONS else b'fake'
+
+    def _glGetProgramBinary(self, handle, n, length, format, binary):
+        length[0], format[0], binary[:] = n, 42, 7
+
+    def _glProgramBinary(self, handle, format, binary, n):
+        if not self.reject_binaries:
+            assert format == 42 and (binary == 7).all()
+            self.linked.add(handle)
+
+    def _glGetActiveAttrib(self, handle, i):
+        return b'a_position', 1, gl.GL_FLOAT_VEC2
+
+    def _glGetActiveUniform(self, handle, i):
+        return b'u_scale', 1, gl.GL_FLOAT
+
+    def _glGetAttribLocation(self, handle, name):
+        return 0
+
+    _glGetUniformLocation = _glGetAttribLocation
+
+
+
+# -----------------------------------------------------------------------------
+class ShaderCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        # Use a fresh context, and thus a fresh cache
+        class Context(object):
+            pass
+        self.context = Context()
+        set_current_context(self.context)
+        self.gl = FakeGL()
+        self.gl.install()
+
+    def tearDown(self):
+        self.gl.uninstall()
+        set_current_context(None)
+
+    def test_identical_programs(self):
+        programs = [Program(VERT, FRAG) for i in range(100)]
+        for program in programs:
+            program.activate()
+            assert program._uniforms['u_scale'].active
+            program.deactivate()
+        # One compile per shader, one link
+        counts = self.gl.counts
+        assert counts['glCompileShader'] == 2
+        assert counts['glLinkProgram'] == 1
+        assert len(set([p.handle for p in programs])) == 1
+        stats = get_shader_cache().stats
+        assert stats['program_hits'] == 99
+        assert stats['program_misses'] == 1
+        assert stats['programs'] == 1
+        # Deleted only when the last program is deleted
+        for program in programs:
+            program.delete()
+        assert counts['glDeleteProgram'] == 1
+        assert get_shader_cache().stats['programs'] == 0
+
+    def test_whitespace(self):
+        vert = VertexShader(VERT)
+        vert.activate()
+        vert2 = VertexShader('\n\n' + VERT.replace('\n', '   \n') + '  \n')
+        vert2.activate()
+        assert vert.handle == vert2.handle
+        assert self.gl.counts['glCompileShader'] == 1
+        # Changing the code releases the shared shader
+        vert2.code = VERT + '// changed'
+        vert2.activate()
+        assert vert.handle != vert2.handle
+        assert self.gl.counts['glCompileShader'] == 2
+
+    def test_uniforms_reset(self):
+        program1 = Program(VERT, FRAG)
+        program2 = Program(VERT, FRAG)
+        program1['u_scale'] = 1.0
+        program2['u_scale'] = 2.0
+        for program in (program1, program2, program2, program1):
+            program.activate()
+            for uniform in program.uniforms:
+                uniform.upload(program)
+            program.deactivate()
+        # Uploaded again only when the other program used the GL program
+        uploads = self.gl.uploads
+        assert [float(data[0]) for data in uploads] == [1.0, 2.0, 1.0]
+
+    def test_per_context(self):
+        program = Program(VERT, FRAG)
+        program.activate()
+        set_current_context(None)
+        cache = get_shader_cache()
+        set_current_context(self.context)
+        assert get_shader_cache() is not cache
+        assert get_shader_cache().stats['programs'] == 1
+
+
+    def test_prepare(self):
+        program = Program(VERT, FRAG)
+        assert program.prepare()
+        assert program._valid and not program._need_update
+        assert program._uniforms['u_scale'].active
+        assert self.gl.counts['glLinkProgram'] == 1
+        assert set(program.timings) == set(['compile', 'link', 'total'])
+        # No work the second time
+        assert program.prepare(wait=False)
+        assert self.gl.counts['glLinkProgram'] == 1
+
+    def test_prepare_parallel(self):
+        self.gl.extensions = b'GL_foo GL_KHR_parallel_shader_compile'
+        self.gl.complete = False
+        program = Program(VERT, FRAG)
+        assert not program.prepare(wait=False)
+        # Compiled and linked, but status not queried yet
+        assert self.gl.counts['glLinkProgram'] == 1
+        assert self.gl.counts['glGetShaderiv'] == 0
+        assert not program.prepare(wait=False)
+        self.gl.complete = True
+        assert program.prepare(wait=False)
+        assert self.gl.counts['glGetShaderiv'] == 2
+        assert self.gl.counts['glLinkProgram'] == 1
+        assert all([shader._valid for shader in program.shaders])
+        assert program.timings['total'] >= program.timings['link']
+
+    def test_prepare_no_parallel(self):
+        self.gl.complete = False
+        program = Program(VERT, FRAG)
+        # Without the extension, prepare() always waits
+        assert program.prepare(wait=False)
+
+
+# -----------------------------------------------------------------------------
+class ProgramBinaryCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.gl = FakeGL()
+        self.gl.install()
+        vispy.config['program_binary_cache'] = True
+        self._new_session()
+
+    def tearDown(self):
+        vispy.config['program_binary_cache'] = False
+        self.gl.uninstall()
+        set_current_context(None)
+        shutil.rmtree(self.path)
+
+    def _new_session(self):
+        # A new context, with a binary cache that uses our directory
+        class Context(object):
+            pass
+        self.context = Context()
+        set_current_context(self.context)
+        cache = ProgramBinaryCache(self.path)
+        context.get_context_object('program_binary_cache', lambda: cache)
+
+    def test_save_load(self):
+        program = Program(VERT, FRAG)
+        program.activate()
+        assert get_program_binary_cache().stats['saved'] == 1
+        assert get_program_binary_cache().stats['misses'] == 1
+        assert self.gl.counts['glCompileShader'] == 2
+        # Next session: no compiling
+        self._new_session()
+        program = Program(VERT, FRAG)
+        program.activate()
+        assert program._uniforms['u_scale'].active
+        assert self.gl.counts['glCompileShader'] == 2
+        assert self.gl.counts['glLinkProgram'] == 1
+        assert get_program_binary_cache().stats['hits'] == 1
+
+    def test_rejected(self):
+        Program(VERT, FRAG).activate()
+        self.gl.reject_binaries = True
+        self._new_session()
+        program = Program(VERT, FRAG)
+        program.activate()
+        # Fall back to compiling and linking (and save the new binary)
+        assert get_program_binary_cache().stats['rejected'] == 1
+        assert get_program_binary_cache().stats['saved'] == 1
+        assert self.gl.counts['glLinkProgram'] == 2
+        assert program.handle in self.gl.linked
+
+
+if __name__ == "__main__":
+    unittest.main()
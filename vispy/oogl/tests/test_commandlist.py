@@ -0,0 +1,167 @@
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team
+# All rights reserved.
+# -----------------------------------------------------------------------------
+import gc
+import unittest
+import numpy as np
+
+from vispy import gl
+from vispy.oogl import Program, VertexBuffer, UniformGroup
+from vispy.oogl import CommandList, CommandListError
+from vispy.oogl.context import set_current_context
+from vispy.gl.recorder import default_recorder
+
+
+VERT = """
+uniform float u_scale;
+attribute vec2 a_position;
+void main() { gl_Position = vec4(a_position*u_scale, 0.0, 1.0); }
+"""
+
+FRAG = """
+void main() { gl_FragColor = vec4(1.0); }
+"""
+
+
+
+# -----------------------------------------------------------------------------
+class CommandListTest(unittest.TestCase):
+
+    def setUp(self):
+        gl.set_gl_target('record')
+        set_current_context(None)
+        self.program = Program(VERT, FRAG)
+        self.buffer = VertexBuffer(np.zeros((4, 2), np.float32))
+        self.program['a_position'] = self.buffer
+        self.program['u_scale'] = 1.0
+
+    def tearDown(self):
+        # Delete the objects while the target is 'record'
+        del self.program, self.buffer
+        gc.collect()
+        gl.set_gl_target('gl')
+
+    def draw(self):
+        gl.glClear(gl.GL_COLOR_BUFFER_BIT)
+        with self.program:
+            self.program.draw_arrays(gl.GL_TRIANGLE_STRIP)
+
+    def test_capture_and_replay(self):
+        commands = CommandList()
+        assert not commands.valid
+        assert not commands.replay()
+        # The first draw creates and uploads, so it is not kept
+        commands.draw(self.draw)
+        assert not commands.valid
+        commands.draw(self.draw)
+        assert commands.valid
+        assert commands.stats == {'captures': 2, 'replays': 0}
+        names = [func.__name__ for func, args in commands.commands]
+        assert 'glDrawArrays' in names
+        assert not [n for n in names if n.startswith('glGet')]
+        # Replaying issues the same calls
+        start = len(default_recorder.commands)
+        commands.draw(self.draw)
+        replayed = [c[0] for c in default_recorder.commands[start:]]
+        assert replayed == names
+        assert commands.stats == {'captures': 2, 'replays': 1}
+        # The functions in vispy.gl are restored
+        assert gl.glDrawArrays.__name__ == 'glDrawArrays'
+        assert 'capturing' not in repr(gl.glDrawArrays)
+
+    def test_invalidate(self):
+        commands = CommandList()
+        commands.draw(self.draw)
+        commands.draw(self.draw)
+        assert commands.valid
+        # New uniform value
+        self.program['u_scale'] = 2.0
+        assert not commands.valid
+        commands.draw(self.draw)
+        assert commands.valid
+        # New data for a buffer
+        self.buffer.set_data(np.ones((4, 2), np.float32))
+        assert not commands.valid
+        commands.draw(self.draw)
+        commands.draw(self.draw)
+        assert commands.valid
+        # Changed uniform group
+        group = UniformGroup(u_scale=3.0)
+        self.program.add_uniform_group(group)
+        assert not commands.valid
+        commands.draw(self.draw)
+        assert commands.valid
+        group['u_scale'] = 4.0
+        assert not commands.valid
+        commands.draw(self.draw)
+        # Explicit
+        assert commands.valid
+        commands.invalidate()
+        assert not commands.valid
+
+    def test_uniform_upload(self):
+        commands = CommandList()
+        commands.draw(self.draw)
+        commands.draw(self.draw)
+        names = [func.__name__ for func, args in commands.commands]
+        assert 'glUniform1fv' not in names
+        # An upload during the capture is captured as well
+        self.program['u_scale'] = 2.0
+        commands.draw(self.draw)
+        assert commands.valid
+        names = [func.__name__ for func, args in commands.commands]
+        assert 'glUniform1fv' in names
+        start = len(default_recorder.commands)
+        commands.replay()
+        replayed = [c[0] for c in default_recorder.commands[start:]]
+        assert 'glUniform1fv' in replayed
+
+    def test_shared_program(self):
+        # Two Programs with the same source share the linked program
+        program2 = Program(VERT, FRAG)
+        program2['a_position'] = self.buffer
+        program2['u_scale'] = 2.0
+        def draw():
+            self.draw()
+            with program2:
+                program2.draw_arrays(gl.GL_TRIANGLE_STRIP)
+        commands = CommandList()
+        for i in range(3):
+            commands.draw(draw)
+        assert program2._cache_key == self.program._cache_key
+        # Both upload their uniforms in each capture, so it stays valid
+        assert commands.valid
+        assert commands.stats == {'captures': 2, 'replays': 1}
+        names = [func.__name__ for func, args in commands.commands]
+        assert names.count('glUniform1fv') == 2
+        # Also when another Program used the GL program in between
+        self.draw()
+        assert commands.valid
+        # Replaying restores the last user
+        commands.replay()
+        cache = self.program._cache
+        assert cache.get_program_user(self.program._cache_key) is program2
+        # A capture that relies on the uniforms of the previous user is
+        # invalid when another Program used the GL program
+        commands = CommandList()
+        self.draw()
+        commands.draw(self.draw)
+        assert commands.valid
+        names = [func.__name__ for func, args in commands.commands]
+        assert 'glUniform1fv' not in names
+        with program2:
+            program2.draw_arrays(gl.GL_TRIANGLE_STRIP)
+        assert not commands.valid
+        del program2
+        gc.collect()
+
+    def test_nested(self):
+        commands1, commands2 = CommandList(), CommandList()
+        self.assertRaises(CommandListError, commands1.capture,
+                          commands2.capture, self.draw)
+        assert gl.glDrawArrays.__name__ == 'glDrawArrays'
+
+
+if __name__ == "__main__":
+    unittest.main()
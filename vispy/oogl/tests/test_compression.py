@@ -0,0 +1,142 @@
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team
+# All rights reserved.
+# -----------------------------------------------------------------------------
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from vispy import gl
+from vispy.gl import recorder
+from vispy.oogl import compression, ext_available
+from vispy.oogl.context import set_current_context
+from vispy.oogl.texture import CompressedTexture2D, TextureError
+from vispy.util.diskcache import DiskCache
+
+
+class Context(object):
+    pass
+
+
+def make_image(h=30, w=45):
+    y, x = np.mgrid[0:h, 0:w]
+    return np.dstack([x*5, y*8, (x+y)*3]).astype(np.uint8)
+
+
+# -----------------------------------------------------------------------------
+class CompressionTest(unittest.TestCase):
+
+    def test_roundtrip(self):
+        image = make_image()
+        for codec in ('dxt1', 'etc1'):
+            data = compression.compress(image, codec)
+            # 4 bits per pixel, image padded to a multiple of 4
+            assert data.shape == (8*12, 8)
+            result = compression.decompress(data, image.shape, codec)
+            assert result.shape == image.shape
+            error = np.abs(result.astype(int) - image)
+            assert error.mean() < 6, codec
+            assert error.max() < 40, codec
+
+    def test_solid(self):
+        image = np.zeros((4, 8, 4), np.uint8)
+        image[:, :4] = 255, 0, 0, 255
+        image[:, 4:] = 0, 0, 255, 0
+        # Pure colors survive DXT1 exactly (alpha is dropped). In ETC1
+        # the smallest modifier is 2, and it applies to all channels.
+        for codec, tolerance in [('dxt1', 0), ('etc1', 2)]:
+            data = compression.compress(image, codec)
+            result = compression.decompress(data, (4, 8), codec)
+            error = np.abs(result.astype(int) - image[:, :, :3])
+            assert error.max() <= tolerance, codec
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            compression.compress(make_image(), 'foo')
+        with self.assertRaises(ValueError):
+            compression.compress(make_image().astype(np.float32))
+        with self.assertRaises(ValueError):
+            compression.decompress(np.zeros((3, 8), np.uint8), (8, 8))
+
+    def test_cache(self):
+        path = tempfile.mkdtemp()
+        try:
+            cache = DiskCache('test', path)
+            image = make_image()
+            data1 = compression.compress(image, 'dxt1', cache)
+            assert cache.stats == {'hits': 0, 'misses': 1}
+            data2 = compression.compress(image, 'dxt1', cache)
+            assert cache.stats == {'hits': 1, 'misses': 1}
+            assert (data1 == data2).all()
+            # Other codec, other key
+            compression.compress(image, 'etc1', cache)
+            assert cache.stats['misses'] == 2
+            cache.clear()
+            compression.compress(image, 'dxt1', cache)
+            assert cache.stats['misses'] == 3
+        finally:
+            shutil.rmtree(path)
+
+
+# -----------------------------------------------------------------------------
+class CompressedTexture2DTest(unittest.TestCase):
+
+    def test_set_data(self):
+        texture = CompressedTexture2D(make_image(), codec='etc1')
+        data, offset, level, format, clim = texture._pending_data
+        assert format == compression.GL_ETC1_RGB8
+        assert data.shape == (8*12, 8)
+        assert texture._pending_shape == (30, 45)
+        assert clim is None
+        # Floats are scaled to uint8 first
+        texture = CompressedTexture2D(np.ones((8, 8), np.float32))
+        assert texture._pending_data[0].shape == (4, 8)
+        assert texture.codec == 'dxt1'
+
+    def test_compressed_data(self):
+        texture = CompressedTexture2D()
+        texture.set_compressed_data(bytes(bytearray(8*4)), (8, 5))
+        assert texture._pending_data[0].shape == (4, 8)
+        with self.assertRaises(ValueError):
+            texture.set_compressed_data(np.zeros((3, 8), np.uint8), (8, 8))
+        with self.assertRaises(RuntimeError):
+            texture.set_subdata((0, 0), np.zeros((4, 4, 3), np.uint8))
+        with self.assertRaises(ValueError):
+            CompressedTexture2D(codec='foo')
+
+    def test_extension(self):
+        assert compression.GL_COMPRESSED_RGB_S3TC_DXT1 == 0x83F0
+        assert compression.GL_COMPRESSED_RGB_S3TC_DXT1 is \
+            gl.ext.GL_COMPRESSED_RGB_S3TC_DXT1
+        assert compression.get_extension('DXT1') == \
+            'GL_EXT_texture_compression_s3tc'
+        # The extensions of the context are queried, once per context
+        gl.set_gl_target('record')
+        strings = recorder.STRINGS.copy()
+        recorder.STRINGS[gl.GL_EXTENSIONS] = b'GL_OES_texture_float'
+        try:
+            set_current_context(Context())
+            assert ext_available('GL_OES_texture_float')
+            assert ext_available('texture_float')
+            assert not ext_available('GL_EXT_texture_compression_s3tc')
+            # Without the extension, nothing is uploaded
+            texture = CompressedTexture2D(make_image(), codec='etc1')
+            with self.assertRaises(TextureError) as cm:
+                texture._update()
+            assert 'GL_OES_compressed_ETC1_RGB8_texture' in str(cm.exception)
+            assert texture._pending_data is not None
+            # Desktop OpenGL has some ES extensions built in
+            recorder.STRINGS[gl.GL_VERSION] = b'2.1 Mesa'
+            assert not ext_available('texture_3D')
+            set_current_context(Context())
+            assert ext_available('GL_texture_3D')
+            assert not ext_available('GL_OES_texture_3D')
+        finally:
+            recorder.STRINGS.update(strings)
+            set_current_context(None)
+            gl.set_gl_target('gl')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team
+# All rights reserved.
+# -----------------------------------------------------------------------------
+import gc
+import unittest
+import numpy as np
+
+from vispy import gl
+from vispy.oogl import VertexBuffer, Texture2D, StreamingTexture2D, Program
+from vispy.oogl import DeletionQueue, get_deletion_queue
+from vispy.oogl.context import set_current_context
+from vispy.gl.recorder import default_recorder
+
+
+VERT = """
+attribute vec2 a_position;
+void main() { gl_Position = vec4(a_position, 0.0, 1.0); }
+"""
+
+FRAG = """
+void main() { gl_FragColor = vec4(1.0); }
+"""
+
+
+class Context(object):
+    pass
+
+
+
+# -----------------------------------------------------------------------------
+class DeletionQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        gl.set_gl_target('record')
+        self.context = Context()
+        set_current_context(self.context)
+        self.start = len(default_recorder.commands)
+
+    def tearDown(self):
+        set_current_context(None)
+        gc.collect()
+        gl.set_gl_target('gl')
+
+    def calls(self, prefix='glDelete'):
+        return [(name, args) for name, args in
+                default_recorder.commands[self.start:]
+                if name.startswith(prefix)]
+
+    def test_queue(self):
+        queue = DeletionQueue()
+        queue.push('glDeleteBuffers', 3)
+        queue.push('glDeleteBuffers', 4)
+        queue.push('glDeleteShader', 5)
+        queue.push('glDeleteShader', 6)
+        assert self.calls() == []
+        assert queue.stats == {'queued': 4, 'deleted': 0, 'calls': 0}
+        assert queue.drain() == 4
+        assert sorted(self.calls()) == [('glDeleteBuffers', (2, [3, 4])),
+                                        ('glDeleteShader', (5,)),
+                                        ('glDeleteShader', (6,))]
+        assert queue.stats == {'queued': 0, 'deleted': 4, 'calls': 3}
+        assert queue.drain() == 0
+
+    def test_del(self):
+        queue = get_deletion_queue()
+        buffers = [VertexBuffer(np.zeros((4, 2), np.float32))
+                   for i in range(3)]
+        texture = Texture2D(np.zeros((4, 4, 3), np.uint8))
+        for ob in buffers + [texture]:
+            ob.activate()
+        assert queue.live_objects() == {'VertexBuffer': 3, 'Texture2D': 1}
+        handles = sorted(ob.handle for ob in buffers)
+        # Garbage collection only queues the objects
+        del buffers, texture, ob
+        gc.collect()
+        assert self.calls() == []
+        assert queue.live_objects() == {}
+        # Switching context does not matter
+        set_current_context(None)
+        assert queue.drain() == 4
+        calls = dict(self.calls())
+        assert sorted(calls) == ['glDeleteBuffers', 'glDeleteTextures']
+        assert calls['glDeleteBuffers'][0] == 3
+        assert sorted(calls['glDeleteBuffers'][1]) == handles
+
+    def test_delete(self):
+        queue = get_deletion_queue()
+        buffer = VertexBuffer(np.zeros((4, 2), np.float32))
+        buffer.activate()
+        # Explicit delete is immediate
+        buffer.delete()
+        assert [name for name, args in self.calls()] == ['glDeleteBuffers']
+        assert queue.live_objects() == {}
+        del buffer
+        gc.collect()
+        assert queue.stats['queued'] == 0
+
+    def test_shared(self):
+        queue = get_deletion_queue()
+        programs = [Program(VERT, FRAG) for i in range(2)]
+        for program in programs:
+            program.activate()
+        # The second program uses the linked program of the first, so
+        # its shaders are not created
+        assert queue.live_objects() == {'Program': 2, 'VertexShader': 1,
+                                        'FragmentShader': 1}
+        # The shared GL program is deleted when the last user is gone
+        del program
+        programs.pop()
+        gc.collect()
+        assert queue.stats['queued'] == 0
+        del programs
+        gc.collect()
+        assert queue.stats['queued'] == 3
+        queue.drain()
+        names = sorted(name for name, args in self.calls())
+        assert names == ['glDeleteProgram', 'glDeleteShader',
+                         'glDeleteShader']
+        assert queue.live_objects() == {}
+
+    def test_reshape(self):
+        # A new shape creates a new GL texture, which is registered too
+        queue = get_deletion_queue()
+        texture = Texture2D(np.zeros((4, 4, 3), np.uint8))
+        texture.activate()
+        texture.set_storage((8, 8, 3))
+        texture.activate()
+        assert texture._deletion_queue is queue
+        assert queue.live_objects() == {'Texture2D': 1}
+        del texture
+        gc.collect()
+        assert queue.stats['queued'] == 1
+        assert queue.live_objects() == {}
+
+    def test_prepare(self):
+        # Programs that are linked ahead of drawing are registered too
+        queue = get_deletion_queue()
+        for wait in (True, False):
+            program = Program(VERT, FRAG)
+            program.prepare(wait=wait)
+            assert program._deletion_queue is queue
+            assert queue.live_objects() == {'Program': 1, 'VertexShader': 1,
+                                            'FragmentShader': 1}
+            del program
+            gc.collect()
+            assert queue.stats['queued'] == 3
+            assert queue.live_objects() == {}
+            queue.drain()
+
+    def test_failed_init(self):
+        # __del__ is also called if __init__ raised before the attributes
+        # of GLObject were set
+        self.assertRaises(ValueError, StreamingTexture2D, (4, 4, 3), 1)
+        texture = StreamingTexture2D.__new__(StreamingTexture2D)
+        texture.__del__()
+
+
+if __name__ == "__main__":
+    unittest.main()
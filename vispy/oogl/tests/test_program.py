@@ -11,6 +11,7 @@ from vispy.oogl.shader import VertexShader
 from vispy.oogl.shader import FragmentShader
 from vispy.oogl.buffer import VertexBuffer
 from vispy.oogl.buffer import ClientVertexBuffer
+from vispy.oogl.variable import UniformGroup
 
 
 
@@ -107,6 +108,55 @@ class ProgramTest(unittest.TestCase):
         program = Program(vert,frag)
         program["color"] = 1,1,1,1
 
+    def test_set_uniform_array(self):
+        vert = VertexShader("uniform vec4 colors[64]; uniform float f[2];")
+        frag = FragmentShader("uniform sampler2D textures[2];")
+
+        program = Program(vert,frag)
+        assert sorted(program._uniforms) == ['colors', 'f', 
+                                             'textures[0]', 'textures[1]']
+        assert program._uniforms['colors'].count == 64
+        program["colors"] = np.zeros((64, 4))
+        program["colors[3]"] = 1, 1, 1, 1
+        assert (program._uniforms['colors'].data[3] == 1).all()
+        program.set_vars({'f[1]': 2})
+        assert program._uniforms['f'].data[1] == 2
+        with self.assertRaises(IndexError):
+            program["f[2]"] = 1
+        with self.assertRaises(NameError):
+            program["g[0]"] = 1
+
+    def test_uniform_group(self):
+        vert = VertexShader("uniform mat4 u_view; uniform float u_scale;")
+        frag = FragmentShader("uniform vec4 u_color;")
+        group = UniformGroup(u_view=np.eye(4), u_color=(1, 0, 0, 1))
+        version = group.version
+        group['u_color'] = 1, 0, 0, 1
+        assert group.version == version
+        group['u_other'] = 3
+        assert group.version == version + 1
+
+        programs = [Program(vert, frag) for i in range(3)]
+        for program in programs:
+            program.add_uniform_group(group)
+            program.add_uniform_group(group)
+            program._apply_uniform_groups()
+            assert (program._uniforms['u_color'].data == [1, 0, 0, 1]).all()
+            assert program._uniforms['u_view'].data[0] == 1
+            program._uniforms['u_color']._dirty = False
+        assert len(programs[0]._uniform_groups) == 1
+        # Only applied when the group changed
+        program = programs[0]
+        program._uniforms['u_color'].set_data((0, 0, 0, 0))
+        program._apply_uniform_groups()
+        assert (program._uniforms['u_color'].data == 0).all()
+        group['u_color'] = 0, 1, 0, 1
+        for program in programs:
+            program._apply_uniform_groups()
+            assert program._uniforms['u_color'].data[1] == 1
+        programs[1].remove_uniform_group(group)
+        assert programs[1]._uniform_groups == []
+
     def test_set_attribute_float(self):
 
         vert = VertexShader("attribute float f;")
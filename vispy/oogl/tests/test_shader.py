@@ -8,6 +8,7 @@ from vispy import gl
 from vispy.oogl.shader import ShaderError
 from vispy.oogl.shader import VertexShader
 from vispy.oogl.shader import FragmentShader
+from vispy.oogl.shader import parse_declarations
 
 
 
@@ -83,5 +84,129 @@ class ShaderTest(unittest.TestCase):
         attributes = shader._get_attributes()
         assert attributes == [ ("color", gl.GL_FLOAT_VEC4) ]
 
+    def test_attribute_array(self):
+        shader = VertexShader("attribute vec2 position[2];")
+        attributes = shader._get_attributes()
+        assert attributes == [ ("position[0]", gl.GL_FLOAT_VEC2),
+                               ("position[1]", gl.GL_FLOAT_VEC2) ]
+
+
+# -----------------------------------------------------------------------------
+class ParseDeclarationsTest(unittest.TestCase):
+
+    def test_comments(self):
+        code = """
+        // uniform float a;
+        /* uniform float b;
+           uniform float c; */
+        uniform float d; // uniform float e;
+        """
+        uniforms = parse_declarations(code)[1]
+        assert uniforms == (("d", gl.GL_FLOAT),)
+
+    def test_preprocessor(self):
+        code = """
+        #define N 3
+        #define USE_COLOR
+        #ifdef USE_COLOR
+        attribute vec4 a_color;
+        #else
+        attribute float a_intensity;
+        #endif
+        #if N > 2 && !defined(FOO)
+        uniform float u_scale[N - 1];
+        #elif 1
+        uniform float u_offset;
+        #endif
+        #ifndef USE_COLOR
+        uniform float u_intensity;
+        #endif
+        """
+        attributes, uniforms = parse_declarations(code)
+        assert attributes == (("a_color", gl.GL_FLOAT_VEC4),)
+        assert uniforms == (("u_scale[0]", gl.GL_FLOAT),
+                            ("u_scale[1]", gl.GL_FLOAT))
+
+    def test_builtin_macros(self):
+        # Conditions on macros of the implementation keep all branches
+        code = """
+        #define N 3
+        #if defined(GL_ES) && N > 2
+        uniform float u[N];
+        #else
+        uniform float v;
+        #endif
+        #ifdef GL_FRAGMENT_PRECISION_HIGH
+        uniform highp float w;
+        #endif
+        """
+        uniforms = parse_declarations(code)[1]
+        assert [name for name, gtype in uniforms] == ["u[0]", "u[1]", "u[2]",
+                                                       "v", "w"]
+        # Unless the code says which version it is
+        code = """
+        #version 120
+        #if __VERSION__ >= 120
+        uniform float u;
+        #else
+        uniform float v;
+        #endif
+        """
+        uniforms = parse_declarations(code)[1]
+        assert uniforms == (("u", gl.GL_FLOAT),)
+
+    def test_array_size(self):
+        code = "uniform float a[(7 / 2) * 2 + (1 << 1) - 011 % 5];"
+        uniforms = parse_declarations(code)[1]
+        assert len(uniforms) == 4
+        # Only integer arithmetic is evaluated
+        for size in ("().__class__.__name__.__len__()", "2.5", "1 / 0",
+                     "3 2", "(1", "N"):
+            with self.assertRaises(ShaderError):
+                parse_declarations("uniform float a[%s];" % size)
+
+    def test_struct(self):
+        code = """
+        struct Light { 
+            vec3 position;
+            float intensity; 
+        };
+        uniform Light u_lights[2];
+        uniform lowp vec4 u_color, u_colors[1];
+        void main() { float uniform_like = 1.0; }
+        """
+        uniforms = parse_declarations(code)[1]
+        assert [name for name, gtype in uniforms] == [
+            "u_lights[0].position", "u_lights[0].intensity",
+            "u_lights[1].position", "u_lights[1].intensity",
+            "u_color", "u_colors[0]"]
+        assert uniforms[0][1] == gl.GL_FLOAT_VEC3
+
+    def test_memoize(self):
+        code = "uniform float a;"
+        assert parse_declarations(code) is parse_declarations(code)
+
+    def test_inline_struct(self):
+        code = """
+        uniform struct S { float x; struct { vec2 y; } t[2]; } s, s2;
+        uniform struct { int i; } anonymous;
+        uniform S u_again;
+        """
+        uniforms = parse_declarations(code)[1]
+        assert [name for name, gtype in uniforms] == [
+            "s.x", "s.t[0].y", "s.t[1].y", "s2.x", "s2.t[0].y", "s2.t[1].y",
+            "anonymous.i", "u_again.x", "u_again.t[0].y", "u_again.t[1].y"]
+        assert uniforms[1][1] == gl.GL_FLOAT_VEC2
+        with self.assertRaises(ShaderError):
+            parse_declarations("uniform struct S float x; } s;")
+
+    def test_unknown_type(self):
+        # Declarations of unknown types are skipped
+        code = "uniform foo a; uniform sampler2DRect b; uniform float c;"
+        assert parse_declarations(code)[1] == (("c", gl.GL_FLOAT),)
+        code = "struct S { foo a; float b; }; uniform S s;"
+        assert parse_declarations(code)[1] == (("s.b", gl.GL_FLOAT),)
+
+
 if __name__ == "__main__":
     unittest.main()
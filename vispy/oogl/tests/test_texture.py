@@ -0,0 +1,124 @@
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team
+# All rights reserved.
+# -----------------------------------------------------------------------------
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from vispy.oogl.texture import Texture3D
+from vispy.oogl.texture import StreamingTexture2D
+
+
+# -----------------------------------------------------------------------------
+class Texture3DStreamTest(unittest.TestCase):
+
+    def _record(self, texture):
+        calls = []
+        def process(data, offset, level, format, clim):
+            calls.append((data.copy(), list(offset)))
+        texture._process_pending_data = process
+        return calls
+
+    def test_small_array(self):
+        data = np.zeros((4, 8, 8), np.uint8)
+        texture = Texture3D(data)
+        assert texture._pending_stream is None
+        assert texture._pending_data[0] is data
+
+    def test_large_array(self):
+        data = np.arange(10*8*8, dtype=np.float32).reshape(10, 8, 8)
+        progress = []
+        texture = Texture3D(max_bytes=3*8*8*4,
+                            callback=lambda p, t: progress.append(p))
+        texture.set_data(data)
+        assert texture._pending_data[0] == (10, 8, 8)
+        assert texture._pending_stream is not None
+        calls = self._record(texture)
+        texture._stream_data(*texture._pending_stream)
+        assert [c[1][0] for c in calls] == [0, 3, 6, 9]
+        assert max([c[0].nbytes for c in calls]) <= 3*8*8*4
+        assert (np.concatenate([c[0] for c in calls]) == data).all()
+        assert progress[-1] == 1.0
+
+    def test_memmap_prefetch(self):
+        fd, fname = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            data = np.memmap(fname, np.uint8, 'w+', shape=(16, 4, 4))
+            data[...] = np.arange(16)[:, None, None]
+            texture = Texture3D(data, max_bytes=8*4*4, prefetch=True)
+            assert texture._pending_stream is not None
+            calls = self._record(texture)
+            texture._stream_data(*texture._pending_stream)
+            assert len(calls) == 4
+            assert (np.concatenate([c[0] for c in calls]) == data).all()
+            del data
+        finally:
+            os.remove(fname)
+
+    def test_slab_depth(self):
+        texture = Texture3D(max_bytes=1000)
+        # int16 needs conversion, so costs an extra float32 per element
+        assert texture._slab_depth((100, 10, 10), np.int16) == 1
+        assert texture._slab_depth((100, 10, 10), np.uint8) == 10
+        # A single slice is always allowed
+        assert texture._slab_depth((100, 100, 100), np.uint8) == 1
+
+
+# -----------------------------------------------------------------------------
+class StreamingTexture2DTest(unittest.TestCase):
+
+    def _fake_gl(self, texture):
+        uploads = []
+        for i, slot in enumerate(texture._slots):
+            def activate(slot=slot, i=i):
+                for item in slot._pending_subdata:
+                    uploads.append((i, item[0][0, 0]))
+                slot._pending_subdata = []
+                slot._handle = i + 1
+            slot.activate = activate
+            slot.deactivate = lambda: None
+        return uploads
+
+    def test_init(self):
+        texture = StreamingTexture2D((4, 4, 3), count=3)
+        assert len(texture._slots) == 3
+        assert all([s._pending_data[0] == (4, 4, 3) for s in texture._slots])
+        with self.assertRaises(ValueError):
+            StreamingTexture2D((4, 4, 3), count=1)
+        with self.assertRaises(ValueError):
+            texture.set_data(np.zeros((5, 4, 3), np.uint8))
+
+    def test_alternate(self):
+        texture = StreamingTexture2D((4, 4))
+        uploads = self._fake_gl(texture)
+        for frame in range(4):
+            texture.set_data(np.ones((4, 4), np.uint8) * frame)
+            texture.upload()
+            texture.activate()
+            # The front texture holds the last frame
+            assert uploads[-1] == (texture._front, frame)
+        # Never uploaded into the front texture
+        assert [u[0] for u in uploads] == [0, 1, 0, 1]
+        assert texture.stats['shown'] == 4
+        assert texture.frames_dropped == 0
+
+    def test_drop(self):
+        texture = StreamingTexture2D((4, 4))
+        uploads = self._fake_gl(texture)
+        texture.set_data(np.zeros((4, 4), np.uint8))
+        texture.activate()
+        # Two frames before the next draw: one is dropped
+        texture.set_data(np.ones((4, 4), np.uint8))
+        texture.set_data(np.ones((4, 4), np.uint8) * 2)
+        assert texture.frames_dropped == 1
+        texture.activate()
+        assert uploads[-1] == (texture._front, 2)
+        assert texture.stats['set'] == 3
+        assert texture.stats['shown'] == 2
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team
+# All rights reserved.
+# -----------------------------------------------------------------------------
+import unittest
+import numpy as np
+
+from vispy.oogl.buffer import VertexBuffer
+from vispy.oogl.texture import Texture2D
+from vispy.oogl.uploader import UploadScheduler
+
+
+def fake_activate(object):
+    """ Replace the GL part of activating an object: record what would
+    be uploaded.
+    """
+    uploads = []
+    def activate():
+        if hasattr(object, '_pending_subdata'):
+            uploads.extend([d[0].nbytes for d in object._pending_subdata])
+            object._pending_subdata = []
+        else:
+            uploads.extend([d[1] for d in object._pending_data])
+            object._pending_data = []
+    object.activate = activate
+    object.deactivate = lambda: None
+    return uploads
+
+
+# -----------------------------------------------------------------------------
+class UploadSchedulerTest(unittest.TestCase):
+
+    def test_buffer(self):
+        scheduler = UploadScheduler(max_bytes=4000, chunk_bytes=1000)
+        data = np.arange(3000, dtype=np.float32).reshape(1000, 3)
+        vbo = VertexBuffer(np.zeros((10, 3), np.float32))
+        uploads = fake_activate(vbo)
+        scheduler.set_data(vbo, data)
+        assert vbo.count == 1000
+        assert vbo._need_resize
+        assert vbo.pending_nbytes == 12000
+        assert scheduler.pending_nbytes == 12000
+        # Three frames to drain
+        assert scheduler.drain() == 4000
+        assert vbo.pending_nbytes == 8000
+        assert scheduler.drain() == 4000
+        assert scheduler.drain() == 4000
+        assert not scheduler.pending
+        assert scheduler.drain() == 0
+        assert sum(uploads) == 12000 and max(uploads) == 1000
+        assert scheduler.stats['frames'] == 3
+
+    def test_small_data(self):
+        scheduler = UploadScheduler(max_bytes=4000)
+        vbo = VertexBuffer(np.zeros((10, 3), np.float32))
+        scheduler.set_data(vbo, np.ones((10, 3), np.float32))
+        assert not scheduler.pending
+        assert vbo.pending_nbytes == 120
+
+    def test_texture(self):
+        scheduler = UploadScheduler(max_bytes=1, chunk_bytes=64*4*10)
+        texture = Texture2D()
+        uploads = fake_activate(texture)
+        scheduler.set_data(texture, np.zeros((64, 64, 4), np.uint8))
+        # Storage is allocated, data comes in chunks of ten rows
+        assert texture._pending_data[0] == (64, 64, 4)
+        assert texture.pending_nbytes == 64*64*4
+        n = 0
+        while scheduler.pending:
+            scheduler.drain()
+            n += 1
+        assert n == 7
+        assert sum(uploads) == 64*64*4
+
+    def test_cancel(self):
+        scheduler = UploadScheduler(max_bytes=100, chunk_bytes=100)
+        vbo = VertexBuffer(np.zeros((10, 3), np.float32))
+        scheduler.set_data(vbo, np.ones((100, 3), np.float32))
+        assert scheduler.pending
+        scheduler.cancel(vbo)
+        assert not scheduler.pending
+        assert vbo.pending_nbytes == 0
+
+
+if __name__ == "__main__":
+    unittest.main()
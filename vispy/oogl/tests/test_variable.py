@@ -9,6 +9,7 @@ from vispy import gl
 from vispy.oogl.variable import Uniform
 from vispy.oogl.variable import Variable
 from vispy.oogl.variable import Attribute
+from vispy.oogl.variable import get_uniform_stats, reset_uniform_stats
 
 
 # -----------------------------------------------------------------------------
@@ -105,6 +106,93 @@ class UniformTest(unittest.TestCase):
         with self.assertRaises(ValueError):
             uniform.set_data([1,2,3,4,5])
 
+    def test_set_unchanged(self):
+        uniform = Uniform("A", gl.GL_FLOAT_MAT4)
+        reset_uniform_stats()
+        M = np.eye(4, dtype=np.float32)
+        uniform.set_data(M)
+        uniform._dirty = False
+        # Same value: not dirty
+        uniform.set_data(M.copy())
+        assert not uniform._dirty
+        M[0, 1] = 2
+        uniform.set_data(M)
+        assert uniform._dirty
+        assert uniform.data[1] == 2
+        # Also for tuples and numbers
+        uniform = Uniform("B", gl.GL_FLOAT_VEC2)
+        uniform.set_data((1, 2))
+        uniform._dirty = False
+        uniform.set_data((1, 2))
+        assert not uniform._dirty
+        uniform.set_data((1, 3))
+        assert uniform._dirty
+        assert get_uniform_stats() == {'sets': 6, 'unchanged': 2, 
+                                       'uploads': 0}
+
+    def test_set_no_copy(self):
+        uniform = Uniform("A", gl.GL_FLOAT_VEC4)
+        uniform.set_data(np.ones(4, np.float32))
+        data = uniform._data
+        uniform.set_data(np.zeros((1, 4), np.float32))
+        uniform.set_data((1, 2, 3, 4))
+        assert uniform._data is data
+        assert (uniform.data == [1, 2, 3, 4]).all()
+
+    def test_array(self):
+        uniform = Uniform("A", gl.GL_FLOAT_VEC4, 64)
+        assert uniform.count == 64
+        uniform.set_data(np.ones((64, 4)))
+        assert uniform.data.shape == (64, 4)
+        uniform.set_data([1, 2, 3, 4])
+        assert (uniform.data[63] == [1, 2, 3, 4]).all()
+        with self.assertRaises(ValueError):
+            uniform.set_data(np.ones((3, 4)))
+        with self.assertRaises(IndexError):
+            uniform.set_data(np.ones((2, 4)), 63)
+
+    def record_calls(self, name):
+        # Replace the GL function by one that records the arguments
+        calls = []
+        self.addCleanup(setattr, gl, name, getattr(gl, name))
+        setattr(gl, name, lambda *args: calls.append(args))
+        return calls
+
+    def test_array_upload(self):
+        uniform = Uniform("A", gl.GL_FLOAT_VEC4, 64)
+        uniform._locs = list(range(10, 74))
+        uniform._loc = 10
+        calls = self.record_calls('glUniform4fv')
+        # The whole array in one call
+        uniform.set_data(np.arange(256).reshape(64, 4))
+        uniform.upload(None)
+        assert len(calls) == 1
+        assert calls[0][:2] == (10, 64)
+        assert calls[0][2].shape == (64, 4)
+        uniform.upload(None)
+        assert len(calls) == 1
+        # Only the range that changed
+        uniform.set_data([1, 1, 1, 1], 5)
+        uniform.set_data(np.zeros((2, 4)), 8)
+        uniform.upload(None)
+        assert calls[1][:2] == (15, 5)
+        assert (calls[1][2][0] == 1).all()
+        # Inactive elements at the end are not uploaded
+        uniform._locs[60:] = [None] * 4
+        uniform.set_data(np.zeros((64, 4)))
+        uniform.upload(None)
+        assert calls[2][:2] == (10, 60)
+
+    def test_array_matrix_upload(self):
+        uniform = Uniform("A", gl.GL_FLOAT_MAT4, 3)
+        uniform._locs = [0, 1, 2]
+        uniform._loc = 0
+        calls = self.record_calls('glUniformMatrix4fv')
+        uniform.set_data(np.eye(4), 1)
+        uniform.upload(None)
+        assert calls[0][:3] == (1, 1, False)
+
+
 
 # -----------------------------------------------------------------------------
 class AttributeTest(unittest.TestCase):
@@ -8,22 +8,23 @@ This code is inspired by similar classes from Visvis and Pygly.
 
 """
 
-# todo: implement ext_available
 # todo: make a Texture1D that makes a nicer interface to a 2D texture
 # todo: same for Texture3D?
 # todo: Cubemap texture
 # todo: mipmapping, allow creating mipmaps
-# todo: compressed textures?
 
 
 from __future__ import print_function, division, absolute_import
 
 import sys
+import threading
 import numpy as np
 
 from vispy import gl
+from vispy.util import ptime
 from vispy.util.six import string_types
 from . import GLObject, ext_available
+from .compression import compress, get_internalformat, get_extension
 
 
 
@@ -342,6 +343,22 @@ class Texture(GLObject):
         self._need_update = True
     
     
+    @property
+    def pending_nbytes(self):
+        """ The number of bytes that have been set but are not yet 
+        uploaded to the GPU (including data held by an UploadScheduler).
+        """
+        nbytes = self._scheduled_nbytes
+        if self._pending_data and isinstance(self._pending_data[0], np.ndarray):
+            nbytes += self._pending_data[0].nbytes
+        for item in self._pending_subdata:
+            nbytes += item[0].nbytes
+        return nbytes
+    
+    
+    _gl_delete = 'glDeleteTextures'
+    
+    
     def _create(self):
         self._handle = gl.glGenTextures(1)
     
@@ -435,7 +452,7 @@ class Texture(GLObject):
                 # should not be necessary, but some implementations cause
                 # memory leaks otherwise.
                 self.delete() 
-                self._create()
+                self._create_object()
             # Upload!
             self._activate()
             if isinstance(data, tuple):
@@ -565,12 +582,526 @@ class Texture2D(Texture):
 
 
 
+class CompressedTexture2D(Texture2D):
+    """ A 2D RGB texture that is stored compressed on the GPU, using 4
+    bits per pixel. Inherits Texture2D.
+
+    Images given to set_data() are compressed on the CPU (see
+    vispy.oogl.compression), which is relatively slow, but the result
+    can be cached on disk. Data that is already compressed can be set
+    using set_compressed_data(). The alpha channel is dropped.
+
+    Parameters
+    ----------
+    data : numpy array
+        The image data (uint8 or float in the range 0..1).
+    codec : str
+        The compression format: 'dxt1' (S3TC, desktop) or 'etc1'
+        (OpenGL ES). The hardware must support the corresponding
+        extension, otherwise a TextureError is raised when the data is
+        uploaded.
+    cache : bool
+        Whether to cache the compressed data on disk. Default False.
+
+    """
+
+    def __init__(self, data=None, codec='dxt1', cache=False):
+        self._codec = codec.lower()
+        self._cache = cache
+        self._format = get_internalformat(self._codec)
+        self._extension = get_extension(self._codec)
+        self._pending_shape = None
+        self._uploaded_shape = None
+        if isinstance(data, tuple):
+            raise ValueError('CompressedTexture2D cannot allocate storage.')
+        Texture2D.__init__(self, data)
+
+
+    @property
+    def codec(self):
+        """ The compression format of this texture. """
+        return self._codec
+
+
+    def set_data(self, data, level=0, format=None, clim=None):
+        """ Compress the given image and set it as the data for this
+        texture. The format argument is ignored. See Texture.set_data().
+        """
+        # Check data
+        if not isinstance(data, np.ndarray):
+            raise ValueError("Data should be a numpy array.")
+        if data.ndim not in (2, 3):
+            raise ValueError("Data should be a 2D (or 2D RGB(A)) array.")
+
+        # Get uint8 data
+        if data.dtype != np.uint8 or clim is not None:
+            data = convert_data(data, clim)
+            if data.dtype != np.uint8:
+                data = (np.clip(data, 0, 1) * 255 + 0.5).astype(np.uint8)
+
+        # Compress and set
+        blocks = compress(data, self._codec, self._cache)
+        self.set_compressed_data(blocks, data.shape[:2], level)
+
+
+    def set_compressed_data(self, data, shape, level=0):
+        """ Set data that is already compressed (e.g. loaded from a file)
+        using the codec of this texture.
+
+        Parameters
+        ----------
+        data : numpy array
+            The compressed data, as (N, 8) uint8 blocks, or as bytes.
+        shape : tuple
+            The (height, width) of the image.
+        level : int
+            The mipmap level. Default 0.
+        """
+        data = np.frombuffer(data, np.uint8) if isinstance(data, bytes) else data
+        data = np.ascontiguousarray(data, np.uint8).reshape(-1, 8)
+        h, w = shape[:2]
+        if len(data) != ((h + 3) // 4) * ((w + 3) // 4):
+            raise ValueError('Compressed data does not match shape.')
+
+        # Clear subdata and set pending data and the shape of the image
+        self._pending_subdata = []
+        self._pending_data = data, None, level, self._format, None
+        self._pending_shape = h, w
+        if level == 0:
+            self._texture_shape = (h, w, 3)
+        self._need_update = True
+
+
+    def set_subdata(self, offset, data, level=0, format=None, clim=None):
+        raise TextureError('CompressedTexture2D does not support set_subdata.')
+
+
+    def set_storage(self, shape, level=0, format=None):
+        raise TextureError('CompressedTexture2D does not support set_storage.')
+
+
+    def _update(self):
+        # Check the extension before anything is uploaded, otherwise
+        # glCompressedTexImage2D fails with an obscure GL error
+        if self._pending_data and not ext_available(self._extension):
+            raise TextureError('Compressed texture format %r needs the %s '
+                               'extension.' % (self._codec, self._extension))
+        Texture2D._update(self)
+
+
+    def _process_pending_data(self, data, offset, level, format, clim):
+        shape = self._pending_shape
+        h, w = shape
+
+        if level == 0 and shape == self._uploaded_shape and self._valid:
+            # Update: fast!
+            gl.glBindTexture(self._target, self._handle)
+            gl.glCompressedTexSubImage2D(self._target, level, 0, 0, w, h,
+                                         format, data.nbytes, data)
+        else:
+            # (re)upload
+            if self._valid and level == 0:
+                self.delete()
+                self._create_object()
+            self._activate()
+            gl.glCompressedTexImage2D(self._target, level, format, w, h, 0,
+                                      data.nbytes, data)
+            if level == 0:
+                self._uploaded_shape = shape
+            # Set all parameters that the user set
+            for param, value in self._texture_params.items():
+                gl.glTexParameter(self._target, param, value)
+            self._pending_params = {}
+
+
+
+class StreamingTexture2D(Texture2D):
+    """ A 2D texture of fixed shape for streaming video or image
+    sequences. Inherits Texture2D.
+    
+    Internally, the frames are uploaded into a ring of two or more
+    textures with pre-allocated storage, using only glTexSubImage2D.
+    The texture that is sampled (the front texture) is never the one
+    being written to, so that uploading frame N+1 does not have to wait
+    until the GPU is done sampling frame N.
+    
+    Typically, set_data() is called when a new frame is available, 
+    and upload() is called right after it (or before drawing). When the
+    texture is activated (e.g. by a Program), the most recently uploaded
+    frame becomes the front texture. Frames that are replaced before
+    they are uploaded, or uploaded but never shown, are counted as
+    dropped.
+    
+    Parameters
+    ----------
+    shape : tuple
+        The shape of each frame, e.g. (480, 640, 3). Note that shape[0]
+        is height.
+    count : int
+        The number of textures in the ring. Default 2.
+    format : OpenGL enum
+        The format representation of the data. If not given or None,
+        it is decuced from the shape.
+    """
+    
+    # The textures in the ring own the GL objects
+    _gl_delete = None
+    
+    def __init__(self, shape, count=2, format=None):
+        shape = tuple([int(i) for i in shape])
+        count = int(count)
+        if count < 2:
+            raise ValueError('StreamingTexture2D needs at least two textures.')
+        # Create the ring before initializing ourselves, because
+        # Texture.__init__ sets parameters which we forward.
+        self._slots = [Texture2D(shape, format=format) for i in range(count)]
+        Texture2D.__init__(self)
+        self._shape = shape
+        self._texture_shape = shape
+        self._format = format
+        
+        # Index of front texture, indices of slots with a frame that is
+        # set but not uploaded, and with a frame uploaded but not shown.
+        self._front = None
+        self._pending = []
+        self._ready = []
+        
+        # Stats
+        self._frames_set = 0
+        self._frames_shown = 0
+        self._frames_dropped = 0
+        self._nbytes_uploaded = 0
+    
+    
+    @property
+    def shape(self):
+        """ The shape of each frame. """
+        return self._shape
+    
+    
+    @property
+    def stats(self):
+        """ A dict with the number of frames that were set, shown and
+        dropped, and the number of bytes that were uploaded.
+        """
+        return {'set': self._frames_set, 'shown': self._frames_shown,
+                'dropped': self._frames_dropped, 
+                'nbytes': self._nbytes_uploaded}
+    
+    
+    @property
+    def frames_dropped(self):
+        """ The number of frames that were set, but never shown. """
+        return self._frames_dropped
+    
+    
+    def set_filter(self, mag_filter, min_filter):
+        Texture.set_filter(self, mag_filter, min_filter)
+        for slot in self._slots:
+            slot.set_filter(mag_filter, min_filter)
+    set_filter.__doc__ = Texture.set_filter.__doc__
+    
+    
+    def set_wrapping(self, wrapx, wrapy, wrapz=None):
+        Texture.set_wrapping(self, wrapx, wrapy, wrapz)
+        for slot in self._slots:
+            slot.set_wrapping(wrapx, wrapy, wrapz)
+    set_wrapping.__doc__ = Texture.set_wrapping.__doc__
+    
+    
+    def set_data(self, data, level=0, format=None, clim=None):
+        """ Set the next frame. The data must match the shape of this
+        texture. The data is uploaded on the next call to upload() or
+        when the texture is activated.
+        
+        Parameters
+        ----------
+        data : numpy array
+            The frame data to set.
+        level : int
+            The mipmap level. Default 0.
+        format : OpenGL enum
+            The format representation of the data. If not given or None,
+            the format given at initialization is used.
+        clim : (min, max)
+            Contrast limits for the data, see Texture.set_data().
+        """
+        if not isinstance(data, np.ndarray):
+            raise ValueError("Data should be a numpy array.")
+        if data.shape != self._shape:
+            raise ValueError('Data shape %r does not match streaming '
+                             'texture shape %r.' % (data.shape, self._shape))
+        
+        # Select slot to write to: not the front, not in use. If all
+        # are in use, drop the oldest frame.
+        busy = [self._front] + self._pending + self._ready
+        free = [i for i in range(len(self._slots)) if i not in busy]
+        if free:
+            index = free[0]
+        else:
+            self._frames_dropped += 1
+            if self._ready:
+                index = self._ready.pop(0)
+            else:
+                index = self._pending.pop(0)
+        
+        # Set pending data; the storage is already allocated, so use
+        # subdata to make sure that the texture is never recreated.
+        slot = self._slots[index]
+        slot._pending_subdata = []
+        slot.set_subdata((0, 0), data, level, format or self._format, clim)
+        self._pending.append(index)
+        self._frames_set += 1
+    
+    
+    def set_subdata(self, *args, **kwargs):
+        raise RuntimeError('Use set_data() to set a frame on a %s.' %
+                           self.__class__.__name__)
+    
+    
+    def set_storage(self, shape, level=0, format=None):
+        raise RuntimeError('The storage of a %s is fixed.' %
+                           self.__class__.__name__)
+    
+    
+    @property
+    def pending_nbytes(self):
+        """ The number of bytes that have been set but are not yet 
+        uploaded to the GPU.
+        """
+        return sum([self._slots[i].pending_nbytes for i in self._pending])
+    
+    
+    def upload(self):
+        """ Upload pending frames to their textures. A GL context must
+        be current. Returns the number of bytes uploaded.
+        """
+        nbytes = 0
+        while self._pending:
+            index = self._pending.pop(0)
+            slot = self._slots[index]
+            nbytes += slot.pending_nbytes
+            slot.activate()
+            slot.deactivate()
+            self._ready.append(index)
+        self._nbytes_uploaded += nbytes
+        return nbytes
+    
+    
+    def activate(self):
+        """ Activate the texture (a GL context must be available). The
+        most recently uploaded frame is made the front texture.
+        """
+        # Upload frames if the user did not call upload()
+        if self._pending:
+            self.upload()
+        # Swap
+        if self._ready:
+            self._frames_dropped += len(self._ready) - 1
+            self._front = self._ready[-1]
+            self._ready = []
+            self._frames_shown += 1
+        # Bind front texture
+        if self._front is None:
+            self._front = 0
+        front = self._slots[self._front]
+        front.activate()
+        self._handle = front.handle
+        self._valid = front._valid
+    
+    
+    def deactivate(self):
+        """ Deactivate the texture. """
+        gl.glBindTexture(self._target, 0)
+    
+    
+    def delete(self):
+        """ Delete the textures from OpenGl memory. """
+        for slot in self._slots:
+            slot.delete()
+        self._handle = 0
+        self._valid = False
+
+
+
 class Texture3D(Texture):
     """ Representation of a 3D texture. Note that for this the
     GL_texture_3D extension needs to be available. Inherits Texture.
+    
+    Volumes that are larger than a given number of bytes, memory
+    mapped arrays (np.memmap) and other array-like objects that
+    support slicing are not uploaded in one go. Instead, storage is
+    allocated for the full volume, after which the data is streamed
+    to the GPU in z-slabs, so that only a bounded part of the volume
+    needs to be in memory at any time. See set_streaming().
     """
-    def __init__(self, *args, **kwargs):
-        Texture.__init__(self, gl.ext.GL_TEXTURE_3D, *args, **kwargs)
+    def __init__(self, data=None, format=None, clim=None, **kwargs):
+        self._pending_stream = None
+        self.set_streaming(**kwargs)
+        # Let the Texture class handle everything except array-likes
+        if data is not None and not isinstance(data, (np.ndarray, tuple)):
+            Texture.__init__(self, gl.ext.GL_TEXTURE_3D, None, format, clim)
+            self.set_data(data, format=format, clim=clim)
+        else:
+            Texture.__init__(self, gl.ext.GL_TEXTURE_3D, data, format, clim)
+    
+    
+    def set_streaming(self, max_bytes=64*2**20, callback=None, prefetch=False):
+        """ Set how large volumes are streamed to the GPU.
+        
+        Parameters
+        ----------
+        max_bytes : int
+            The memory ceiling (in bytes) for data that is read from the 
+            source array at once. Volumes larger than this are uploaded 
+            in z-slabs. Default 64 MiB.
+        callback : callable or None
+            Called after each uploaded slab with two arguments: the 
+            progress (a float between 0 and 1) and the throughput so 
+            far (in bytes per second).
+        prefetch : bool
+            Whether to read the next slab from the source array in a
+            background thread while the current one is uploaded. Note 
+            that the memory ceiling is then shared by two slabs.
+        """
+        max_bytes = int(max_bytes)
+        if max_bytes <= 0:
+            raise ValueError('max_bytes must be positive.')
+        if callback is not None and not callable(callback):
+            raise ValueError('callback must be callable.')
+        self._stream_max_bytes = max_bytes
+        self._stream_callback = callback
+        self._stream_prefetch = bool(prefetch)
+    
+    
+    def set_data(self, data, level=0, format=None, clim=None):
+        """ Set the data for this texture. See Texture.set_data(). In 
+        addition to numpy arrays, any array-like object that has a shape
+        and dtype and supports slicing is accepted. Memory mapped and
+        large arrays are streamed in z-slabs (see set_streaming()).
+        """
+        
+        # Normal arrays that are not too large are uploaded in one go
+        if (isinstance(data, np.ndarray) and 
+                not isinstance(data, np.memmap) and
+                data.nbytes <= self._stream_max_bytes):
+            self._pending_stream = None
+            return Texture.set_data(self, data, level, format, clim)
+        
+        # Check data
+        if not (hasattr(data, 'shape') and hasattr(data, '__getitem__')):
+            raise ValueError("Data should be a numpy array or array-like.")
+        shape = tuple([int(i) for i in data.shape])
+        if len(shape) not in (3, 4):
+            raise ValueError("Data for a Texture3D must be 3D or 4D.")
+        assert clim is None or (isinstance(clim, tuple) and len(clim)==2)
+        
+        # Allocate storage and stream the data on the next update. 
+        # The storage may already be there (set_storage() then does
+        # nothing), so we need to make sure that we get updated.
+        self.set_storage(shape, level, format)
+        self._pending_subdata = []
+        self._pending_stream = data, level, format, clim
+        self._need_update = True
+    
+    
+    @property
+    def pending_nbytes(self):
+        """ The number of bytes that have been set but are not yet 
+        uploaded to the GPU (including data held by an UploadScheduler).
+        """
+        nbytes = Texture.pending_nbytes.fget(self)
+        if self._pending_stream is not None:
+            data = self._pending_stream[0]
+            itemsize = np.dtype(getattr(data, 'dtype', np.float32)).itemsize
+            nbytes += int(np.prod(data.shape)) * itemsize
+        return nbytes
+    
+    
+    def _update(self):
+        Texture._update(self)
+        # Stream pending volume
+        if self._pending_stream is not None and self._handle:
+            stream, self._pending_stream = self._pending_stream, None
+            self._stream_data(*stream)
+    
+    
+    def _slab_depth(self, shape, dtype):
+        """ Get the number of z-slices to read at once, such that the
+        memory ceiling is respected. Data that needs conversion costs
+        an extra float32 copy.
+        """
+        dtype = np.dtype(dtype)
+        itemsize = dtype.itemsize
+        if dtype.name not in ('uint8', 'float16', 'float32'):
+            itemsize += 4
+        slice_bytes = max(1, int(np.prod(shape[1:])) * itemsize)
+        max_bytes = self._stream_max_bytes
+        if self._stream_prefetch:
+            max_bytes //= 2
+        return int(max(1, min(shape[0], max_bytes // slice_bytes)))
+    
+    
+    def _stream_data(self, data, level, format, clim):
+        """ Upload data in z-slabs, using the subdata upload path.
+        """
+        shape = tuple(data.shape)
+        depth = self._slab_depth(shape, getattr(data, 'dtype', np.float32))
+        starts = list(range(0, shape[0], depth))
+        
+        def load(z0):
+            return np.ascontiguousarray(data[z0:z0+depth])
+        
+        # Prepare
+        t0 = ptime.time()
+        done, total = 0, shape[0]
+        prefetcher = None
+        callback = self._stream_callback
+        nbytes = 0
+        
+        for i, z0 in enumerate(starts):
+            # Get slab (from prefetcher, if we have one)
+            if prefetcher is not None:
+                slab = prefetcher.result()
+            else:
+                slab = load(z0)
+            # Start reading the next slab
+            if self._stream_prefetch and i+1 < len(starts):
+                prefetcher = _Prefetcher(load, starts[i+1])
+            # Upload this slab
+            offset = [z0, 0, 0]
+            self._process_pending_data(slab, offset, level, format, clim)
+            # Report
+            done += slab.shape[0]
+            nbytes += slab.nbytes
+            del slab
+            if callback is not None:
+                elapsed = max(ptime.time() - t0, 1e-9)
+                callback(done / total, nbytes / elapsed)
+
+
+
+class _Prefetcher(object):
+    """ Call a function in a background thread. Use result() to wait
+    for (and get) the result.
+    """
+    def __init__(self, func, *args):
+        self._result = None
+        self._error = None
+        def run():
+            try:
+                self._result = func(*args)
+            except Exception as err:
+                self._error = err
+        self._thread = threading.Thread(target=run)
+        self._thread.daemon = True
+        self._thread.start()
+    
+    def result(self):
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
 
 
 
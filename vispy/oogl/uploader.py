@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2013, Vispy Development Team.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+""" Definition of the UploadScheduler class.
+
+Setting a large amount of data on a buffer or texture normally results
+in a single upload the next time the object is activated, which can
+freeze the application for a considerable amount of time. The
+UploadScheduler splits such payloads in chunks that are uploaded over
+successive frames, within a per-frame budget.
+
+Example::
+
+    scheduler = oogl.UploadScheduler(max_bytes=8*2**20)
+    scheduler.connect(canvas)  # drain a bit on each paint
+    scheduler.set_data(vbo, huge_array)
+    ...
+    # In the paint handler, vbo.pending_nbytes tells how much is left
+
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+
+from vispy import gl
+from vispy.util import ptime
+from .buffer import Buffer, ClientVertexBuffer, ClientElementBuffer
+from .texture import Texture
+
+
+
+class UploadScheduler(object):
+    """ Schedules the upload of large data to buffers and textures over
+    multiple frames.
+
+    Call drain() regularly (with the GL context current), e.g. from the
+    paint handler, or use connect() to do this automatically for a Canvas.
+
+    Parameters
+    ----------
+    max_bytes : int
+        The maximum number of bytes to upload per call to drain().
+        Default 8 MiB.
+    max_time : float or None
+        The maximum time (in seconds) to spend per call to drain().
+        Default None (no time limit).
+    chunk_bytes : int or None
+        The (approximate) size of each chunk. Textures are split in
+        whole rows (2D) or slices (3D). By default this is max_bytes
+        divided by four.
+
+    Note that each call to drain() uploads at least one chunk, so that
+    progress is always made.
+    """
+
+    def __init__(self, max_bytes=8*2**20, max_time=None, chunk_bytes=None):
+        self._max_bytes = int(max_bytes)
+        self._max_time = None if max_time is None else float(max_time)
+        if chunk_bytes is None:
+            chunk_bytes = max(1, self._max_bytes // 4)
+        self._chunk_bytes = int(chunk_bytes)
+
+        # List of [object, list of chunk tuples], in order of submission
+        self._queue = []
+
+        # Stats
+        self._frames = 0
+        self._total_nbytes = 0
+        self._last_nbytes = 0
+
+        # Canvases that we are connected to
+        self._canvases = []
+
+
+    @property
+    def pending_nbytes(self):
+        """ The total number of bytes that are waiting to be uploaded. """
+        return sum([ob._scheduled_nbytes for ob, chunks in self._queue])
+
+
+    @property
+    def pending(self):
+        """ Whether there is any data waiting to be uploaded. """
+        return bool(self._queue)
+
+
+    @property
+    def stats(self):
+        """ A dict with the number of frames in which data was uploaded,
+        the total number of bytes uploaded, and the number of bytes
+        uploaded in the last call to drain().
+        """
+        return {'frames': self._frames, 'nbytes': self._total_nbytes,
+                'last_nbytes': self._last_nbytes}
+
+
+    def set_data(self, object, data, **kwargs):
+        """ Set data on a buffer or texture, the upload of which is
+        spread over multiple frames. Any data that is still scheduled for
+        the object is discarded. Extra keyword arguments (e.g. clim for
+        textures) are passed to the object's set_data() method.
+
+        Small payloads (that fit in a single chunk) are set directly.
+        """
+        if isinstance(object, (ClientVertexBuffer, ClientElementBuffer)):
+            raise ValueError('Client buffers are not uploaded.')
+
+        # Discard anything still scheduled for this object
+        self.cancel(object)
+
+        # Let the object check the data and set its own pending state
+        if isinstance(object, Buffer):
+            object.set_data(data, **kwargs)
+            chunks = self._take_buffer_chunks(object)
+        elif isinstance(object, Texture):
+            shape = object._texture_shape
+            same_shape = object._valid and shape == tuple(data.shape)
+            object.set_data(data, **kwargs)
+            chunks = self._take_texture_chunks(object, same_shape)
+        else:
+            raise ValueError('Can only schedule data for buffers and textures.')
+
+        # Queue
+        if chunks:
+            object._scheduled_nbytes = sum([c[-1] for c in chunks])
+            self._queue.append([object, chunks])
+        self._request_update()
+
+
+    def cancel(self, object):
+        """ Discard all data that is scheduled for the given object.
+        """
+        for item in list(self._queue):
+            if item[0] is object:
+                self._queue.remove(item)
+        object._scheduled_nbytes = 0
+
+
+    def drain(self):
+        """ Upload chunks until the budget for this frame is used.
+        A GL context must be current. Returns the number of bytes
+        uploaded.
+        """
+        t0 = ptime.time()
+        nbytes = 0
+
+        while self._queue:
+            # Check budget (but always do at least one chunk)
+            if nbytes:
+                if nbytes >= self._max_bytes:
+                    break
+                if (self._max_time is not None and
+                        ptime.time() - t0 >= self._max_time):
+                    break
+
+            # Get next chunk
+            item = self._queue[0]
+            object, chunks = item
+            chunk = chunks.pop(0)
+            if not chunks:
+                self._queue.pop(0)
+
+            # Upload it
+            self._upload_chunk(object, chunk)
+            object._scheduled_nbytes -= chunk[-1]
+            nbytes += chunk[-1]
+
+        # Update stats
+        self._last_nbytes = nbytes
+        if nbytes:
+            self._frames += 1
+            self._total_nbytes += nbytes
+        return nbytes
+
+
+    def connect(self, canvas):
+        """ Drain (part of) the pending data on each paint event of
+        the given canvas. A repaint is requested for as long as there
+        is data pending.
+        """
+        if canvas not in self._canvases:
+            self._canvases.append(canvas)
+            canvas.events.paint.connect(self._on_paint)
+
+
+    def disconnect(self, canvas):
+        """ Stop draining on paint events of the given canvas.
+        """
+        if canvas in self._canvases:
+            self._canvases.remove(canvas)
+            canvas.events.paint.disconnect(self._on_paint)
+
+
+    def _on_paint(self, event):
+        self.drain()
+        self._request_update()
+
+
+    def _request_update(self):
+        if self._queue:
+            for canvas in self._canvases:
+                canvas.update()
+
+
+    ## Splitting and uploading
+
+    def _take_buffer_chunks(self, buffer):
+        """ Take the pending data from a buffer and split it in chunks
+        of (bytes, offset, nbytes).
+        """
+        chunks = []
+        pending, buffer._pending_data = buffer._pending_data, []
+        for data, nbytes, offset in pending:
+            if nbytes <= self._chunk_bytes:
+                buffer._pending_data.append((data, nbytes, offset))
+                continue
+            data = np.ascontiguousarray(data).view(np.uint8).ravel()
+            for i in range(0, nbytes, self._chunk_bytes):
+                part = data[i:i+self._chunk_bytes]
+                chunks.append((part, offset+i, part.nbytes))
+        return chunks
+
+
+    def _take_texture_chunks(self, texture, same_shape):
+        """ Take the pending data from a texture and split it in chunks
+        of (data, start, count, offset, level, format, clim, nbytes) 
+        along the first dimension. Storage is allocated by the texture itself, unless it
+        already has the right shape.
+        """
+
+        # Get what is pending; Texture3D may have a streamed volume
+        stream = getattr(texture, '_pending_stream', None)
+        if stream is not None:
+            data, level, format, clim = stream
+        elif (texture._pending_data is not None and
+                not isinstance(texture._pending_data[0], tuple)):
+            data, _, level, format, clim = texture._pending_data
+        else:
+            return []
+
+        # Determine number of rows/slices per chunk
+        shape = tuple(data.shape)
+        itemsize = np.dtype(getattr(data, 'dtype', np.float32)).itemsize
+        row_bytes = max(1, int(np.prod(shape[1:])) * itemsize)
+        if row_bytes * shape[0] <= self._chunk_bytes:
+            return []  # Small enough, let the texture handle it
+        rows = max(1, self._chunk_bytes // row_bytes)
+
+        # Allocate storage instead of uploading the data in one go
+        if stream is not None:
+            texture._pending_stream = None
+        if same_shape:
+            texture._pending_data = None
+        else:
+            texture._pending_data = shape, None, level, format, None
+
+        # Create chunks; views for arrays and memmaps, data is read lazily
+        chunks = []
+        ndim = {gl.GL_TEXTURE_2D: 2, gl.ext.GL_TEXTURE_3D: 3}[texture._target]
+        for i in range(0, shape[0], rows):
+            n = min(rows, shape[0] - i)
+            offset = [i] + [0] * (ndim - 1)
+            chunks.append((data, i, n, offset, level, format, clim,
+                           n * row_bytes))
+        return chunks
+
+
+    def _upload_chunk(self, object, chunk):
+        """ Set the chunk as pending data and activate the object to
+        perform the upload.
+        """
+        if isinstance(object, Buffer):
+            data, offset, nbytes = chunk
+            Buffer.set_subdata(object, offset, data)
+        else:
+            data, i, n, offset, level, format, clim, nbytes = chunk
+            part = np.ascontiguousarray(data[i:i+n])
+            object.set_subdata(offset, part, level, format, clim)
+        object.activate()
+        object.deactivate()
@@ -20,8 +20,6 @@ from .buffer import ClientVertexBuffer, VertexBuffer, VertexBufferView
 from .texture import Texture, Texture2D, TextureCubeMap, Texture3D
 from vispy.util.six import string_types
 
-# todo: support arrays of uniforms
-
 gl_typeinfo = {
     gl.GL_FLOAT        : ( 1, gl.GL_FLOAT,        np.float32),      
     gl.GL_FLOAT_VEC2   : ( 2, gl.GL_FLOAT,        np.float32),      
@@ -42,6 +40,26 @@ gl_typeinfo = {
     gl.ext.GL_SAMPLER_3D   : ( 1, gl.GL_UNSIGNED_INT, np.uint32),
     gl.GL_SAMPLER_CUBE : ( 1, gl.GL_UNSIGNED_INT, np.uint32), }
 
+# Counters for uniform assignments and uploads (see get_uniform_stats)
+_uniform_stats = {'sets': 0, 'unchanged': 0, 'uploads': 0}
+
+
+def get_uniform_stats():
+    """ Get a dict with the number of uniform assignments ("sets"), 
+    the number of assignments that did not change the value and thus 
+    did not cause an upload ("unchanged"), and the number of uniform 
+    uploads to the GPU ("uploads").
+    """
+    return dict(_uniform_stats)
+
+
+def reset_uniform_stats():
+    """ Reset the counters returned by get_uniform_stats().
+    """
+    for key in _uniform_stats:
+        _uniform_stats[key] = 0
+
+
 
 class VariableError(RuntimeError):
     """ Raised when something goes wrong that depens on state that was set 
@@ -128,38 +146,56 @@ class Variable(object):
 
 # ----------------------------------------------------------- Uniform class ---
 class Uniform(Variable):
-    """ A Uniform represents a program uniform variable. """
+    """ A Uniform represents a program uniform variable. 
+    
+    If count is given, the uniform is an array (e.g. "uniform vec4 u[64]")
+    of which the data is stored in one contiguous (count, size) array, and 
+    which is uploaded with a single glUniform*v call. Only the range of 
+    elements that changed since the last upload is uploaded.
+    """
     
     # NOTE: Variable, Uniform, Attribute are FRIENDS of Program,
     # and Program manimpulates the private attributes of these objects.
     
     _ufunctions = { 
-        gl.GL_FLOAT:        (gl.glUniform1fv, 1),
-        gl.GL_FLOAT_VEC2:   (gl.glUniform2fv, 2),
-        gl.GL_FLOAT_VEC3:   (gl.glUniform3fv, 3),
-        gl.GL_FLOAT_VEC4:   (gl.glUniform4fv, 4),
-        gl.GL_INT:          (gl.glUniform1iv, 1),
-        gl.GL_INT_VEC2:     (gl.glUniform2iv, 2),
-        gl.GL_INT_VEC3:     (gl.glUniform3iv, 3),
-        gl.GL_INT_VEC4:     (gl.glUniform4iv, 4),
-        gl.GL_BOOL:         (gl.glUniform1iv, 1),
-        gl.GL_BOOL_VEC2:    (gl.glUniform2iv, 2),
-        gl.GL_BOOL_VEC3:    (gl.glUniform3iv, 3),
-        gl.GL_BOOL_VEC4:    (gl.glUniform4iv, 4),
-        gl.GL_FLOAT_MAT2:   (gl.glUniformMatrix2fv, 4),
-        gl.GL_FLOAT_MAT3:   (gl.glUniformMatrix3fv, 9),
-        gl.GL_FLOAT_MAT4:   (gl.glUniformMatrix4fv, 16),
-        gl.GL_SAMPLER_2D:   (gl.glUniform1i, 1),
-        gl.GL_SAMPLER_CUBE: (gl.glUniform1i, 1),
-        gl.ext.GL_SAMPLER_3D: (gl.glUniform1i, 1),
+        gl.GL_FLOAT:        ('glUniform1fv', 1),
+        gl.GL_FLOAT_VEC2:   ('glUniform2fv', 2),
+        gl.GL_FLOAT_VEC3:   ('glUniform3fv', 3),
+        gl.GL_FLOAT_VEC4:   ('glUniform4fv', 4),
+        gl.GL_INT:          ('glUniform1iv', 1),
+        gl.GL_INT_VEC2:     ('glUniform2iv', 2),
+        gl.GL_INT_VEC3:     ('glUniform3iv', 3),
+        gl.GL_INT_VEC4:     ('glUniform4iv', 4),
+        gl.GL_BOOL:         ('glUniform1iv', 1),
+        gl.GL_BOOL_VEC2:    ('glUniform2iv', 2),
+        gl.GL_BOOL_VEC3:    ('glUniform3iv', 3),
+        gl.GL_BOOL_VEC4:    ('glUniform4iv', 4),
+        gl.GL_FLOAT_MAT2:   ('glUniformMatrix2fv', 4),
+        gl.GL_FLOAT_MAT3:   ('glUniformMatrix3fv', 9),
+        gl.GL_FLOAT_MAT4:   ('glUniformMatrix4fv', 16),
+        gl.GL_SAMPLER_2D:   ('glUniform1i', 1),
+        gl.GL_SAMPLER_CUBE: ('glUniform1i', 1),
+        gl.ext.GL_SAMPLER_3D: ('glUniform1i', 1),
         }
 
 
-    def __init__(self, name, gtype):
+    def __init__(self, name, gtype, count=None):
         Variable.__init__(self, name, gtype)
         
-        # Get ufunc
-        self._ufunction, self._numel = Uniform._ufunctions[self._gtype]
+        # Get the name of the ufunc. The function is looked up on each
+        # upload, so that it is that of the current GL target, and so that
+        # a CommandList that is capturing sees the call
+        self._ufuncname, self._numel = Uniform._ufunctions[self._gtype]
+        
+        # For arrays: number of elements, location of each element (set
+        # by Program), and the range of elements to upload (None if all)
+        self._count = count
+        self._locs = []
+        self._dirty_range = None
+        
+        # The last immutable value (tuple or number) that was set, to
+        # detect unchanged values without converting to an array
+        self._value = None
         
         # For textures:
         self._texture_unit = -1  # Set by Program
@@ -168,6 +204,13 @@ class Uniform(Variable):
                                 gl.ext.GL_SAMPLER_3D: Texture3D,}.get(gtype, None)
     
     
+    @property
+    def count(self):
+        """ The number of elements if this uniform is an array, or None.
+        """
+        return self._count
+    
+    
     @property
     def texture_unit(self):
         """ The texture unit (only valid if this uniform is a sampler/texture.
@@ -175,12 +218,21 @@ class Uniform(Variable):
         return self._texture_unit
     
     
-    def set_data(self, data):
+    def set_data(self, data, offset=None):
         """ Set data for this uniform. Data can be anything that can be
         conveted to a numpy array. If the uniform is a sampler, a Texture
         object is required.
+        
+        For arrays, offset can be given to set the elements starting at
+        that index; data then contains one or more elements. Without 
+        offset, data should contain all elements.
         """
         
+        if self._count is not None:
+            return self._set_array_data(data, offset)
+        elif offset:
+            raise ValueError('Uniform %s is not an array.' % self.name)
+        
         if self._gtype in (gl.GL_SAMPLER_2D, gl.GL_SAMPLER_CUBE, gl.ext.GL_SAMPLER_3D):
             # Textures need special handling
             if isinstance(data, Texture):
@@ -188,21 +240,83 @@ class Uniform(Variable):
             else:
                 raise ValueError('Expected a Texture for uniform %s.' % self.name)
         else:
-            # Try to put it inside the array
+            _uniform_stats['sets'] += 1
             if self._data is None:
                 size, _, dtype = gl_typeinfo[self._gtype]
                 self._data = np.zeros(size, dtype)
+                self._equal = np.zeros(size, np.bool_)
+            elif self._set_unchanged(data):
+                _uniform_stats['unchanged'] += 1
+                return
+            # Try to put it inside the array (without making a copy first)
             try:
-                if not isinstance(data, np.ndarray):
-                    data = np.array(data)
-                self._data[...] = data.ravel() 
+                if isinstance(data, np.ndarray):
+                    self._data[...] = data.reshape(self._data.shape)
+                else:
+                    self._data[...] = data
             except ValueError:
-                raise ValueError("Wrong data format for uniform %s" % self.name)
+                try:
+                    self._data[...] = np.array(data).ravel()
+                except ValueError:
+                    raise ValueError("Wrong data format for uniform %s" % 
+                                     self.name)
+            # Remember immutable values
+            if isinstance(data, (tuple, float, int)):
+                self._value = data
+            else:
+                self._value = None
         
         # Mark variable as dirty
         self._dirty = True
     
     
+    def _set_unchanged(self, data):
+        """ Get whether the given data is equal to the current data. For
+        tuples and numbers that are equal to the last set value, and for
+        arrays of the right size, this does not allocate new arrays.
+        """
+        if self._value is not None and type(data) is type(self._value):
+            return data == self._value
+        elif isinstance(data, np.ndarray) and data.size == self._data.size:
+            np.equal(self._data, data.reshape(self._data.shape), 
+                     out=self._equal)
+            return self._equal.all()
+        return False
+    
+    
+    def _set_array_data(self, data, offset):
+        """ Set (part of) the data of an array uniform.
+        """
+        if self._data is None:
+            self._data = np.zeros((self._count, self._size), self._dtype)
+        
+        # Put data in the array
+        _uniform_stats['sets'] += 1
+        if not isinstance(data, np.ndarray):
+            data = np.array(data)
+        start = offset or 0
+        try:
+            data = data.reshape(-1, self._size)
+            stop = self._count if offset is None else start + data.shape[0]
+            if start < 0 or stop > self._count:
+                raise IndexError('Index out of range for uniform %s.' % 
+                                 self.name)
+            if (self._data[start:stop] == data).all():
+                _uniform_stats['unchanged'] += 1
+                return
+            self._data[start:stop] = data
+        except ValueError:
+            raise ValueError("Wrong data format for uniform %s" % self.name)
+        
+        # Mark range as dirty
+        if not self._dirty:
+            self._dirty_range = start, stop
+        elif self._dirty_range is not None:
+            self._dirty_range = (min(start, self._dirty_range[0]), 
+                                 max(stop, self._dirty_range[1]))
+        self._dirty = True
+    
+    
     def upload(self, program):
         """ Actual upload of data to GPU memory """
         
@@ -217,19 +331,44 @@ class Uniform(Variable):
         if self._loc is None:
             raise VariableError("Uniform is not active")
         
+        ufunction = getattr(gl, self._ufuncname)
+        
         #  WARNING : Uniform are supposed to keep their value between program
         #           activation/deactivation (from the GL documentation). It has
         #           been tested on some machines but if it is not the case on
         #           every machine, we can expect nasty bugs from these early
         #           returns
-            
+        
+        # Arrays: upload the dirty range of active elements in one call
+        if self._count is not None:
+            if not self._dirty:
+                return
+            start, stop = self._dirty_range or (0, self._count)
+            self._dirty = False
+            self._dirty_range = None
+            # Elements at the end may be inactive (unused in the shader)
+            while stop > start and (stop > len(self._locs) or 
+                                    self._locs[stop-1] is None):
+                stop -= 1
+            if stop <= start:
+                return
+            data = self._data[start:stop]
+            _uniform_stats['uploads'] += 1
+            if self._gtype in (gl.GL_FLOAT_MAT2, gl.GL_FLOAT_MAT3, 
+                               gl.GL_FLOAT_MAT4):
+                ufunction(self._locs[start], stop - start, False, data)
+            else:
+                ufunction(self._locs[start], stop - start, data)
+            return
+        
         # Matrices (need a transpose argument)
         if self._gtype in (gl.GL_FLOAT_MAT2, gl.GL_FLOAT_MAT3, gl.GL_FLOAT_MAT4):
             if not self._dirty:
                 return
             # OpenGL ES 2.0 does not support transpose
             transpose = False 
-            self._ufunction(self._loc, 1, transpose, self._data)
+            _uniform_stats['uploads'] += 1
+            ufunction(self._loc, 1, transpose, self._data)
             self._dirty = False
             
         # Textures (need to get texture count)
@@ -242,13 +381,15 @@ class Uniform(Variable):
             # Upload uniform only of needed
             if not self._dirty:
                 return
+            _uniform_stats['uploads'] += 1
             gl.glUniform1i(self._loc, unit)
             
         # Regular uniform
         else:
             if not self._dirty:
                 return
-            self._ufunction(self._loc, 1, self._data)
+            _uniform_stats['uploads'] += 1
+            ufunction(self._loc, 1, self._data)
         
         # Mark as uploaded
         self._dirty = False
@@ -257,6 +398,78 @@ class Uniform(Variable):
 
 
 
+# ------------------------------------------------------ UniformGroup class ---
+class UniformGroup(object):
+    """ A group of uniform values that is shared by multiple programs, 
+    such as the view and projection matrices. The values are set once
+    (e.g. per frame), and each program that uses the group (see 
+    Program.add_uniform_group) applies them only when the version of
+    the group differs from the version it applied last.
+    
+    Parameters
+    ----------
+    **values : 
+        Initial values for the uniforms in this group.
+    
+    Example
+    -------
+    
+        camera = UniformGroup(u_view=np.eye(4), u_projection=np.eye(4))
+        program1.add_uniform_group(camera)
+        program2.add_uniform_group(camera)
+        camera['u_projection'] = P  # Used by both programs on next draw
+    
+    """
+    
+    def __init__(self, **values):
+        self._values = {}
+        self._version = 0
+        for name, value in values.items():
+            self[name] = value
+    
+    
+    @property
+    def version(self):
+        """ Counter that is increased each time a value in this group 
+        changes.
+        """
+        return self._version
+    
+    
+    def __setitem__(self, name, value):
+        """ Set the value of a uniform in this group. The version is only 
+        increased if the value differs from the current value.
+        """
+        value = np.array(value)  # A copy, so it cannot change behind our back
+        old = self._values.get(name, None)
+        if (old is not None and old.shape == value.shape and 
+                (old == value).all()):
+            return
+        self._values[name] = value
+        self._version += 1
+    
+    
+    def __getitem__(self, name):
+        return self._values[name]
+    
+    
+    def __contains__(self, name):
+        return name in self._values
+    
+    
+    def keys(self):
+        """ Get the names of the uniforms in this group.
+        """
+        return list(self._values.keys())
+    
+    
+    def items(self):
+        """ Get a list of (name, value) tuples.
+        """
+        return list(self._values.items())
+
+
+
 # --------------------------------------------------------- Attribute class ---
 class Attribute(Variable):
     """
@@ -267,10 +480,10 @@ class Attribute(Variable):
     # and Program manimpulates the private attributes of these objects.
     
     _afunctions = { 
-        gl.GL_FLOAT:        gl.glVertexAttrib1f,
-        gl.GL_FLOAT_VEC2:   gl.glVertexAttrib2f,
-        gl.GL_FLOAT_VEC3:   gl.glVertexAttrib3f,
-        gl.GL_FLOAT_VEC4:   gl.glVertexAttrib4f
+        gl.GL_FLOAT:        'glVertexAttrib1f',
+        gl.GL_FLOAT_VEC2:   'glVertexAttrib2f',
+        gl.GL_FLOAT_VEC3:   'glVertexAttrib3f',
+        gl.GL_FLOAT_VEC4:   'glVertexAttrib4f'
     }
 
 
@@ -311,9 +524,9 @@ class Attribute(Variable):
             # Let numpy convert the data for us
             self._data = np.array(data, dtype=dtype)
             self._data.shape = self._data.size,
-            # Set generic and afunc
+            # Set generic and the name of the afunc (looked up on upload)
             self._generic = True
-            self._afunction = Attribute._afunctions[self._gtype]
+            self._afuncname = Attribute._afunctions[self._gtype]
         
         elif isinstance(data, (ClientVertexBuffer, VertexBuffer)):
             # Just store the Buffer
@@ -355,7 +568,7 @@ class Attribute(Variable):
                 return
             
             # Apply
-            self._afunction(self._loc, *self._data)
+            getattr(gl, self._afuncname)(self._loc, *self._data)
 
         # Client side array
         elif isinstance(self._data, ClientVertexBuffer):
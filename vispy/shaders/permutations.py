@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2013, Vispy Development Team.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+""" Registry of the variants (permutations) of a shader program.
+
+A visual often combines a main shader with one of several snippets for
+each of a few features (e.g. the dimensionality of the positions, or
+where the color comes from). Each combination is a variant of the same
+program. A ShaderPermutations object declares these feature axes, and
+builds the program for each variant the first time it is needed. The
+programs are cached per context, so that switching a visual between
+variants is a lookup instead of a compile and link.
+
+Example::
+
+    def build(position, color):
+        return Program([main_vshader, position_shaders[position],
+                        color_shaders[color]], main_fshader)
+
+    line_programs = ShaderPermutations('line', build,
+                                       position=('xy', 'xyz'),
+                                       color=('uniform', 'rgb', 'rgba'))
+
+    program = line_programs.get(dict(position='xy', color='rgba'))
+
+"""
+
+from __future__ import print_function, division, absolute_import
+
+from vispy.oogl.context import get_context_object
+
+
+class ShaderPermutations(object):
+    """ Declares the feature axes of a shader program, and builds and
+    caches (per context) the program for each combination of features.
+
+    Parameters
+    ----------
+    name : str
+        The name of this set of permutations. Must be unique; the object
+        is registered in ShaderPermutations.names.
+    build : callable
+        Function that is called with the features as keyword arguments
+        (and any extra arguments given to get()), and returns a Program.
+    **axes :
+        The feature axes. Each value is a sequence of the allowed values
+        for that feature, or None to allow any hashable value (e.g. the
+        signature of a transform chain).
+
+    Notes
+    -----
+    The programs are shared by all users of the same variant, so users
+    should set all their uniforms and attributes before drawing.
+    """
+
+    names = {}
+
+    def __init__(self, name, build, **axes):
+        self._name = name
+        self._build = build
+        self._axes = {}
+        for axis, values in axes.items():
+            self._axes[axis] = None if values is None else tuple(values)
+        self._stats = {'hits': 0, 'misses': 0}
+        ShaderPermutations.names[name] = self
+
+
+    @property
+    def name(self):
+        """ The name of this set of permutations.
+        """
+        return self._name
+
+
+    @property
+    def axes(self):
+        """ Dict that maps the name of each feature axis to a tuple of
+        its allowed values (or None if any hashable value is allowed).
+        """
+        return dict(self._axes)
+
+
+    @property
+    def stats(self):
+        """ Dict with the number of lookups that found a program in the
+        cache ("hits"), and that had to build one ("misses").
+        """
+        return dict(self._stats)
+
+
+    def key(self, features):
+        """ Get the cache key for the given features (a dict). Raises
+        ValueError if a feature is missing, unknown, or has a value that
+        is not allowed.
+        """
+        for axis in features:
+            if axis not in self._axes:
+                raise ValueError('Unknown feature for shader %s: %s' %
+                                 (self._name, axis))
+        key = []
+        for axis in sorted(self._axes):
+            if axis not in features:
+                raise ValueError('Feature %s not given for shader %s.' %
+                                 (axis, self._name))
+            value, values = features[axis], self._axes[axis]
+            if values is not None and value not in values:
+                raise ValueError('Invalid value for feature %s of shader '
+                                 '%s: %r' % (axis, self._name, value))
+            key.append(value)
+        return tuple(key)
+
+
+    def get(self, features, *args):
+        """ Get the program for the given features (a dict) in the
+        current context. If it is not in the cache, it is built by
+        calling build(*args, **features). The extra args should not
+        affect the generated code in ways not described by the features.
+        """
+        key = self.key(features)
+        programs = self._get_programs()
+        try:
+            program = programs[key]
+        except KeyError:
+            self._stats['misses'] += 1
+            program = programs[key] = self._build(*args, **features)
+        else:
+            self._stats['hits'] += 1
+        return program
+
+
+    @property
+    def variants(self):
+        """ The keys of the variants in the cache of the current context.
+        """
+        return list(self._get_programs().keys())
+
+
+    def clear(self):
+        """ Remove all programs from the cache of the current context.
+        """
+        self._get_programs().clear()
+
+
+    def _get_programs(self):
+        # Our programs in the current context: key -> Program
+        programs = get_context_object('shader_permutations', dict)
+        return programs.setdefault(self._name, {})
@@ -0,0 +1,116 @@
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team
+# All rights reserved.
+# -----------------------------------------------------------------------------
+import unittest
+import numpy as np
+
+from vispy.oogl import Program
+from vispy.oogl.context import set_current_context
+from vispy.shaders.permutations import ShaderPermutations
+from vispy.shaders import transforms
+from vispy.visuals.line import LineVisual, line_programs
+
+
+VERT = {2: "attribute vec2 a_position;", 3: "attribute vec3 a_position;"}
+FRAG = {'uniform': "uniform vec4 u_color;", 'none': ""}
+
+
+# -----------------------------------------------------------------------------
+class ShaderPermutationsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.built = []
+        def build(dims, color, transform):
+            self.built.append((dims, color, transform))
+            return Program(VERT[dims], FRAG[color])
+        self.permutations = ShaderPermutations('test', build, dims=(2, 3),
+                                               color=('uniform', 'none'),
+                                               transform=None)
+
+    def tearDown(self):
+        set_current_context(None)
+        self.permutations.clear()
+
+    def test_get(self):
+        p = self.permutations
+        program = p.get(dict(dims=2, color='none', transform=()))
+        assert isinstance(program, Program)
+        assert p.get(dict(dims=2, color='none', transform=())) is program
+        program2 = p.get(dict(dims=3, color='none', transform=('ST',)))
+        assert program2 is not program
+        assert 'u_color' not in program2._uniforms
+        assert len(self.built) == 2
+        assert p.stats == {'hits': 1, 'misses': 2}
+        assert len(p.variants) == 2
+        assert ShaderPermutations.names['test'] is p
+
+    def test_per_context(self):
+        p = self.permutations
+        program = p.get(dict(dims=2, color='uniform', transform=()))
+        class Context(object):
+            pass
+        context = Context()
+        set_current_context(context)
+        assert p.variants == []
+        assert p.get(dict(dims=2, color='uniform', transform=())) is not program
+        set_current_context(None)
+        assert p.get(dict(dims=2, color='uniform', transform=())) is program
+
+    def test_invalid(self):
+        p = self.permutations
+        with self.assertRaises(ValueError):
+            p.get(dict(dims=4, color='none', transform=()))
+        with self.assertRaises(ValueError):
+            p.get(dict(dims=2, color='none'))
+        with self.assertRaises(ValueError):
+            p.get(dict(dims=2, color='none', transform=(), foo=1))
+        assert self.built == []
+
+
+
+class RecordingProgram(object):
+    """ Stands in for the program of a LineVisual, to see the uniforms
+    that are set.
+    """
+    def __init__(self):
+        self.uniforms = {}
+
+
+
+# -----------------------------------------------------------------------------
+class LineVisualTest(unittest.TestCase):
+
+    def tearDown(self):
+        line_programs.clear()
+
+    def make_line(self, scale):
+        line = LineVisual(pos=np.zeros((4, 2), np.float32))
+        line.transforms = [transforms.STTransform(scale=scale)]
+        line._generate_program()
+        return line
+
+    def test_shared_program(self):
+        lines = [self.make_line((2, 2, 1)), self.make_line((3, 3, 1))]
+        assert lines[0]._program is lines[1]._program
+        # Each line sets the uniforms of its own transforms (as done by
+        # _set_variables() before drawing)
+        for line, scale in zip(lines, (2, 3)):
+            program = RecordingProgram()
+            line._transform_chain._apply_variables(program)
+            name = line._transform_chain._collapsed[0]._arg_map['scale']
+            assert np.allclose(program.uniforms[name], (scale, scale, 1))
+
+    def test_transform_types(self):
+        # Transform classes with the same name are different variants
+        class STTransform(transforms.STTransform):
+            pass
+        line = self.make_line((2, 2, 1))
+        line2 = LineVisual(pos=np.zeros((4, 2), np.float32))
+        line2.transforms = [STTransform(scale=(2, 2, 1))]
+        line2._generate_program()
+        assert line._program is not line2._program
+
+
+if __name__ == "__main__":
+    unittest.main()
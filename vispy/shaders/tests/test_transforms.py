@@ -0,0 +1,220 @@
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team
+# All rights reserved.
+# -----------------------------------------------------------------------------
+import unittest
+import numpy as np
+
+from vispy.shaders.transforms import TransformChain, collapse_transforms
+from vispy.shaders.transforms import STTransform, LogTransform
+from vispy.shaders.transforms import AffineTransform, SRTTransform
+from vispy.shaders.transforms import NullTransform, PolarTransform
+from vispy.shaders.transforms import Transform
+
+
+class RecordingProgram(object):
+    """ Stands in for a program, to see the uniforms that are set.
+    """
+    def __init__(self, uniforms):
+        self.uniforms = uniforms
+
+
+# -----------------------------------------------------------------------------
+class TransformChainTest(unittest.TestCase):
+
+    def test_source_memoized(self):
+        tr1 = [STTransform(), LogTransform(), STTransform()]
+        tr2 = [STTransform(scale=(2, 2)), LogTransform(base=(10, 0, 0)), 
+               STTransform()]
+        chain1 = TransformChain(tr1, function='global_transform')
+        chain2 = TransformChain(tr2, function='global_transform')
+        source = chain1._generate_source()
+        assert chain2._generate_source() is source
+        assert 'vec4 global_transform(vec4 pos)' in source
+        # Each transform knows the names of its uniforms
+        assert tr2[2]._arg_map['scale'] == 'STTransform_map_scale_0'
+        assert tr2[0]._arg_map['scale'] == 'STTransform_map_scale_1'
+        assert tr2[1]._arg_map['base'] == 'LogTransform_map_base_0'
+        # Different types or function give different source
+        chain3 = TransformChain([STTransform()], function='global_transform')
+        assert chain3._generate_source() != source
+        chain4 = TransformChain(tr1, function='other_transform')
+        assert chain4._generate_source() != source
+
+    def test_collapse(self):
+        affine = AffineTransform()
+        affine.scale((2, 3, 4))
+        affine.translate((1, 0, 0))
+        transforms = [STTransform(scale=(2, 2), translate=(1, 1)),
+                      STTransform(scale=(0.5, 3), translate=(2, 0)),
+                      LogTransform(base=(10, 0, 0)),
+                      STTransform(translate=(1, 2, 3)), affine]
+        collapsed = collapse_transforms(transforms)
+        assert [type(tr) for tr in collapsed] == [STTransform, LogTransform,
+                                                  AffineTransform]
+        assert len(transforms) == 5
+        # Same result on the CPU
+        coords = np.random.uniform(1, 10, (100, 3))
+        expected = TransformChain(transforms).map(coords)
+        result = TransformChain(collapsed).map(coords)
+        assert np.allclose(expected, result)
+        assert np.allclose(TransformChain(collapsed).imap(result), coords)
+        # One call per fused stage in the shader
+        chain = TransformChain(transforms, function='global_transform')
+        source = chain._generate_source()
+        assert source.count('pos = ') == 3
+        assert 'AffineTransform_map_matrix_0' in source
+
+    def test_apply_variables(self):
+        tr = [STTransform(scale=(2, 2)), STTransform(translate=(1, 0)),
+              LogTransform(base=(10, 0, 0)), STTransform(), 
+              AffineTransform()]
+        chain = TransformChain(tr, function='global_transform')
+        chain._generate_source()
+        collapsed = list(chain._collapsed)
+        # New parameters are fused into the same transforms, without
+        # creating new ones
+        created = []
+        init = Transform.__init__
+        Transform.__init__ = lambda self, *args: created.append(self)
+        try:
+            tr[0].scale = (3, 3)
+            tr[3].translate = (0, 5)
+            uniforms = {}
+            chain._apply_variables(RecordingProgram(uniforms))
+        finally:
+            Transform.__init__ = init
+        assert created == []
+        assert [a is b for a, b in zip(chain._collapsed, collapsed)] == \
+            [True, True, True]
+        assert np.allclose(uniforms['STTransform_map_scale_0'], (3, 3, 1))
+        assert np.allclose(uniforms['STTransform_map_translate_0'], 
+                           (3, 0, 0))
+        matrix = uniforms['AffineTransform_map_matrix_0'].T
+        assert np.allclose(matrix[:3, 3], (0, 5, 0))
+        # A new list of transforms gives new fused transforms
+        chain._transforms = tr[3:]
+        chain._apply_variables(RecordingProgram({}))
+        assert chain._collapsed[0] is not collapsed[2]
+        assert chain._collapsed[0]._arg_map
+
+    def test_affine(self):
+        affine = AffineTransform()
+        affine.scale((2, 2, 2))
+        affine.translate((1, 2, 3))
+        st = STTransform(scale=(2, 2, 2), translate=(1, 2, 3))
+        coords = np.random.normal(size=(10, 3))
+        assert np.allclose(affine.map(coords), st.map(coords))
+        assert np.allclose(affine.imap(affine.map(coords)), coords)
+        assert np.allclose((st * affine).matrix, 
+                           (st.as_affine() * affine).matrix)
+
+
+# The GLSL of each transform, transcribed per vertex (vec4)
+def glsl_map(tr, pos):
+    pos = pos.astype(np.float32)
+    if isinstance(tr, NullTransform):
+        return pos
+    elif isinstance(tr, STTransform):
+        return (pos * np.append(tr.scale, 1).astype(np.float32) + 
+                np.append(tr.translate, 0).astype(np.float32))
+    elif isinstance(tr, AffineTransform):
+        return np.dot(tr.matrix.astype(np.float32), pos)
+    elif isinstance(tr, LogTransform):
+        p1 = pos.copy()
+        for i in range(3):
+            if tr.base[i] > 1.0:
+                p1[i] = np.log(p1[i]) / np.log(np.float32(tr.base[i]))
+        return p1
+    elif isinstance(tr, PolarTransform):
+        return np.array([pos[1] * np.cos(pos[0]), pos[1] * np.sin(pos[0]),
+                         pos[2], pos[3]], np.float32)
+
+
+# -----------------------------------------------------------------------------
+class TransformMapTest(unittest.TestCase):
+
+    def transforms(self):
+        matrix = np.random.normal(size=(4, 4)) + 4 * np.eye(4)
+        matrix[3] = 0, 0, 0, 1
+        return [NullTransform(), 
+                STTransform(scale=(2, 3, 4), translate=(-1, 0.5, 2)),
+                AffineTransform(matrix),
+                SRTTransform(scale=(2, 0.5), angle=30, translate=(1, 2)),
+                LogTransform(base=(10, 2, 0)),
+                PolarTransform()]
+
+    def chain(self):
+        # Keeps the input of LogTransform positive for coords in [1, 2]
+        return TransformChain([PolarTransform(), LogTransform(base=(10, 2)),
+                               STTransform(scale=(2, 3), translate=(-1, 0)),
+                               SRTTransform(scale=(2, 0.5), angle=30, 
+                                            translate=(1, 2)),
+                               NullTransform()])
+
+    def test_glsl_parity(self):
+        coords = np.random.uniform(1, 2, (50, 4)).astype(np.float32)
+        coords[:, 3] = 1
+        for tr in self.transforms():
+            result = tr.map(coords)
+            assert result.dtype == np.float32
+            expected = np.array([glsl_map(tr, pos) for pos in coords])
+            assert np.allclose(result, expected, rtol=1e-5, atol=1e-6), tr
+            # Fewer components: the missing ones are 0 (and w=1)
+            for n in (2, 3):
+                pos = np.zeros((50, 4), np.float32)
+                pos[:, :n] = coords[:, :n]
+                pos[:, 3] = 1
+                if isinstance(tr, LogTransform):
+                    pos[:, n:3] = 1
+                    expected = np.array([glsl_map(tr, p) for p in pos])
+                    result = tr.map(pos[:, :n])
+                else:
+                    expected = np.array([glsl_map(tr, p) for p in pos])
+                    result = tr.map(coords[:, :n])
+                assert np.allclose(result, expected[:, :n], rtol=1e-5,
+                                   atol=1e-6), (tr, n)
+
+    def test_imap(self):
+        coords = np.random.uniform(1, 2, (50, 3))
+        for tr in self.transforms():
+            assert np.allclose(tr.imap(tr.map(coords)), coords), tr
+
+    def test_out_and_chunks(self):
+        coords = np.random.uniform(1, 2, (1000, 3))
+        for tr in self.transforms() + [self.chain()]:
+            expected = tr.map(coords)
+            assert np.allclose(tr.map(coords, chunk_size=64), expected)
+            out = np.empty_like(coords)
+            assert tr.map(coords, out=out) is out
+            assert np.allclose(out, expected)
+            inplace = coords.copy()
+            tr.map(inplace, out=inplace, chunk_size=100)
+            assert np.allclose(inplace, expected), tr
+            inplace = tr.imap(inplace, out=inplace)
+            assert np.allclose(inplace, coords), tr
+        with self.assertRaises(ValueError):
+            STTransform().map(coords, out=np.empty((10, 3)))
+        with self.assertRaises(ValueError):
+            STTransform().map(np.zeros((10, 5)))
+
+    def test_chain(self):
+        chain = self.chain()
+        coords = np.random.uniform(1, 2, (100, 2))
+        expected = coords
+        for tr in chain.transforms[::-1]:
+            expected = tr.map(expected)
+        assert np.allclose(chain.map(coords), expected)
+        assert np.allclose(chain.imap(chain.map(coords)), coords)
+        assert np.allclose(TransformChain([]).map(coords), coords)
+        # Linear transforms are composed into a single matrix
+        linear = self.transforms()[1:4]
+        assert len(collapse_transforms(linear)) == 1
+        matrix = collapse_transforms(linear)[0].matrix
+        coords3 = np.random.uniform(1, 2, (100, 3))
+        expected = np.dot(coords3, matrix[:3, :3].T) + matrix[:3, 3]
+        assert np.allclose(TransformChain(linear).map(coords3), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,10 +4,102 @@ import OpenGL.GL as gl
 import numpy as np
 
 
+# Generated TransformChain source per signature: 
+# (function, transform types) -> (source, argument names per transform)
+_chain_sources = {}
+
+
+def _apply_chunked(func, coords, out, chunk_size):
+    """ Call func(coords, out) for coords of shape (..., n), in chunks of
+    chunk_size rows. out may be None (a new array is returned) or may 
+    be coords itself (in-place).
+    """
+    if not isinstance(coords, np.ndarray) or coords.dtype.kind != 'f':
+        coords = np.asarray(coords, dtype=np.float64)
+    if coords.ndim == 0 or not 1 <= coords.shape[-1] <= 4:
+        raise ValueError('Coordinates must have shape (..., n) with n <= 4.')
+    if out is None:
+        out = np.empty(coords.shape, coords.dtype)
+    elif out.shape != coords.shape:
+        raise ValueError('Output array must have shape %r.' % 
+                         (coords.shape,))
+    if chunk_size is None or coords.ndim < 2 or len(coords) <= chunk_size:
+        func(coords, out)
+    else:
+        for i in range(0, len(coords), chunk_size):
+            func(coords[i:i+chunk_size], out[i:i+chunk_size])
+    return out
+
+
+def collapse_transforms(transforms):
+    """ Return a new list of transforms in which each run of adjacent
+    linear transforms (STTransform and AffineTransform) is fused into a 
+    single transform on the CPU. Nonlinear transforms are kept as they
+    are. The given transforms are not modified.
+    """
+    return [_fuse(run) for run in _linear_runs(transforms)]
+
+
+def _linear_runs(transforms):
+    """ Split the transforms in lists of adjacent linear transforms. Each
+    nonlinear transform is in a list of its own.
+    """
+    runs = []
+    for tr in transforms:
+        if (runs and isinstance(tr, LINEAR_TRANSFORMS) and
+                isinstance(runs[-1][-1], LINEAR_TRANSFORMS)):
+            runs[-1].append(tr)
+        else:
+            runs.append([tr])
+    return runs
+
+
+def _fuse(run):
+    """ Get the transform that is the composition of the given run of
+    linear transforms: the transform itself if there is only one, or else
+    a new STTransform or AffineTransform.
+    """
+    if len(run) == 1:
+        return run[0]
+    if all(isinstance(tr, STTransform) for tr in run):
+        fused = STTransform()
+    else:
+        fused = AffineTransform()
+    _compose(run, fused)
+    return fused
+
+
+def _compose(run, fused):
+    """ Set the parameters of the fused transform (see _fuse()) to the
+    composition of the transforms in the run, without creating new
+    transforms.
+    """
+    if isinstance(fused, STTransform):
+        scale, translate = np.ones(3), np.zeros(3)
+        for tr in run:
+            translate += tr._translate * scale
+            scale *= tr._scale
+        fused.scale, fused.translate = scale, translate
+    else:
+        matrix = np.eye(4)
+        for tr in run:
+            if isinstance(tr, STTransform):
+                m = np.eye(4)
+                m[range(3), range(3)] = tr._scale
+                m[:3, 3] = tr._translate
+            else:
+                m = tr.matrix
+            matrix = np.dot(matrix, m)
+        fused.matrix = matrix
+
+
 class TransformChain(VertexShader):
     """ Transform shader built from a series of Transform shaders.
     
     Will collapse adjacent transforms if possible.
+    
+    The transforms are given in the order in which they are composed:
+    the last transform in the list is applied first.
     """
     def __init__(self, transforms=None, function=None):
         super(TransformChain, self).__init__()
@@ -16,6 +108,11 @@ class TransformChain(VertexShader):
         self._transforms = transforms
         self._enabled = True
         self._function = function
+        # The collapsed transforms, the runs of transforms that they were
+        # fused from, and the transforms that they were made for
+        self._collapsed = []
+        self._runs = []
+        self._collapsed_from = None
         
         
     @property
@@ -40,16 +137,85 @@ class TransformChain(VertexShader):
             raise RuntimeError("Shader is already enabled; cannot modify.")
         self._transforms.insert(0, tr)
         
+    def map(self, coords, out=None, chunk_size=None):
+        """ Map coordinates through all transforms (see Transform.map). 
+        Adjacent linear transforms are first composed into one matrix.
+        """
+        self._update_collapsed()
+        transforms = self._collapsed[::-1]
+        def func(coords, out):
+            if not transforms:
+                out[...] = coords
+            for tr in transforms:
+                tr._map(coords, out)
+                coords = out
+        return _apply_chunked(func, coords, out, chunk_size)
+    
+    def imap(self, coords, out=None, chunk_size=None):
+        """ Map coordinates back through all transforms (see 
+        Transform.imap).
+        """
+        self._update_collapsed()
+        transforms = self._collapsed
+        def func(coords, out):
+            if not transforms:
+                out[...] = coords
+            for tr in transforms:
+                tr._imap(coords, out)
+                coords = out
+        return _apply_chunked(func, coords, out, chunk_size)
+        
     def _enable(self):
         self._enabled = True
-        self.set_source(self._generate_source())
+        # The source is memoized, so only set it (and recompile) on change
+        source = self._generate_source()
+        if source is not self.code:
+            self.code = source
         super(TransformChain, self)._enable()
         
+    def _update_collapsed(self):
+        """ Update the collapsed transforms, in which adjacent linear
+        transforms are fused in one (on the CPU) so that they cost a 
+        single matrix multiply in the shader. The fused transforms are
+        only created when the transforms of the chain changed, otherwise
+        only their parameters are computed again. Returns whether they
+        were created.
+        """
+        previous = self._collapsed_from
+        if (previous is not None and len(previous) == len(self._transforms)
+                and all(a is b for a, b in zip(previous, self._transforms))):
+            for run, tr in zip(self._runs, self._collapsed):
+                if len(run) > 1:
+                    _compose(run, tr)
+            return False
+        self._runs = _linear_runs(self._transforms)
+        self._collapsed = [_fuse(run) for run in self._runs]
+        self._collapsed_from = list(self._transforms)
+        return True
+        
     def _generate_source(self):
+        self._update_collapsed()
+        
+        # Chains with the same types of transforms have the same source,
+        # differing only in the values of the uniforms.
+        key = (self._function, tuple([(type(tr), tr.function, 
+                                       tuple(tr.arguments)) 
+                                      for tr in self._collapsed]))
+        try:
+            source, arg_maps = _chain_sources[key]
+        except KeyError:
+            source, arg_maps = _chain_sources[key] = self._build_source()
+        # tell the transforms the names of uniforms/atributes that will be passed as arguments.
+        for tr, arg_map in zip(self._collapsed[::-1], arg_maps):
+            tr._arg_map.update(arg_map)
+        return source
+        
+    def _build_source(self):
         transform_indexes = {}
         variable_decl = []
         func_calls = []
-        for tr in self._transforms[::-1]:
+        arg_maps = []
+        for tr in self._collapsed[::-1]:
             if tr.function not in transform_indexes:
                 ind = 0
                 argtypes = ['vec4'] + [d for a,d,n in tr.arguments]
@@ -59,16 +225,17 @@ class TransformChain(VertexShader):
             transform_indexes[tr.function] = ind + 1
             args = []
             sig_decl = ['vec4']
+            arg_map = {}
             for atype, dtype, name in tr.arguments:
                 varname = '%s_%s_%d' % (tr.function, name, ind)
                 variable_decl.append("%s %s %s;\n" % (atype, dtype, varname))
-                # tell the transform the names of uniforms/atributes that will be passed as arguments.
-                tr._arg_map[name] = varname 
+                arg_map[name] = varname 
                 args.append(varname)
                 sig_decl.append(dtype)
+            arg_maps.append(arg_map)
             
                 
-            func_calls.append("    pos = %s(pos, %s);\n" % (tr.function, ", ".join(args)))
+            func_calls.append("    pos = %s(%s);\n" % (tr.function, ", ".join(['pos'] + args)))
             
         source = (
         "#version 120\n" +
@@ -81,7 +248,7 @@ class TransformChain(VertexShader):
         "}\n")
         #print("====================")
         #print(source)
-        return source
+        return source, arg_maps
         
     def _disable(self):
         self._enabled = False
@@ -89,7 +256,8 @@ class TransformChain(VertexShader):
         
     def _on_attach(self, program):
         attached = set()
-        for tr in self.transforms:
+        self._update_collapsed()
+        for tr in self._collapsed:
             name = tr.function
             if name in attached:
                 continue
@@ -98,7 +266,18 @@ class TransformChain(VertexShader):
 
     def _on_enabling(self, program):
         super(TransformChain, self)._on_enabling(program)
-        for tr in self.transforms:
+        self._apply_variables(program)
+        
+    def _apply_variables(self, program):
+        # Send the uniforms of the transforms to the program. Also used
+        # by visuals that share a program with other chains of the same
+        # types (see LineVisual).
+        # The parameters of the transforms may have changed. Only those
+        # of the fused transforms are computed again, unless the list of
+        # transforms was changed.
+        if self._update_collapsed():
+            self._generate_source()
+        for tr in self._collapsed:
             tr._apply_variables(program)
         
 class Transform(VertexShader):
@@ -109,7 +288,15 @@ class Transform(VertexShader):
     and reverse mappings.
     
     In general, transformations should only ever be done using the
-    map() and imap() methods. In some cases, imap() may return None.
+    map() and imap() methods. These take arrays of shape (..., n) with
+    n <= 4, of which the components are (x, y, z, w), and missing 
+    components are (0, 0, 0, 1) as in the shader. The computation is 
+    vectorized and done in the dtype of the coordinates (use float32 to 
+    match the GPU). The result is written in out if given (which may be
+    the coords array itself), and large arrays can be processed in 
+    chunks of chunk_size rows to limit the memory used for temporaries.
+    
+    Subclasses implement _map(coords, out) and _imap(coords, out).
     """
     source = None    # Default source code for this shader.
     function = None  # The name of the mapping function as defined in the shader source.
@@ -123,17 +310,30 @@ class Transform(VertexShader):
         self._arg_map = {} # {argument_name: attribute/uniform_name} set by TransformChain
         super(Transform, self).__init__(source)
     
-    def map(self, coords):
-        pass
+    def map(self, coords, out=None, chunk_size=None):
+        """ Map coordinates of shape (..., n) through this transform.
+        """
+        return _apply_chunked(self._map, coords, out, chunk_size)
     
-    def imap(self, coords):
-        pass
+    def imap(self, coords, out=None, chunk_size=None):
+        """ Map coordinates of shape (..., n) through the inverse of this
+        transform.
+        """
+        return _apply_chunked(self._imap, coords, out, chunk_size)
+    
+    def _map(self, coords, out):
+        raise NotImplementedError('%s cannot map coordinates.' % 
+                                  self.__class__.__name__)
+    
+    def _imap(self, coords, out):
+        raise NotImplementedError('%s cannot map coordinates back.' % 
+                                  self.__class__.__name__)
     
     def __mul__(self, tr):
         #return TransformChain([self, tr])
         return NotImplemented
         
-    def __apply_variables(self, program):
+    def _apply_variables(self, program):
         # Send uniforms/attributes for this transform to currently-enabled program, if any.
         pass
 
@@ -149,6 +349,11 @@ class NullTransform(Transform):
         }
         """
     function = 'NullTransform_map'
+    
+    def _map(self, coords, out):
+        out[...] = coords
+    
+    _imap = _map
 
 
 
@@ -177,13 +382,20 @@ class STTransform(Transform):
         self.scale = (1.0, 1.0, 1.0) if scale is None else scale
         self.translate = (0.0, 0.0, 0.0) if translate is None else translate
     
-    def map(self, coords):
+    def _map(self, coords, out):
+        # pos * vec4(scale, 1) + vec4(translate, 0)
         n = coords.shape[-1]
-        return coords * self.scale[:n] + self.translate[:n]
+        scale = np.append(self._scale, 1).astype(coords.dtype)
+        translate = np.append(self._translate, 0).astype(coords.dtype)
+        np.multiply(coords, scale[:n], out=out)
+        out += translate[:n]
     
-    def imap(self, coords):
+    def _imap(self, coords, out):
         n = coords.shape[-1]
-        return (coords - self.translate[:n]) / self.scale[:n]
+        scale = np.append(self._scale, 1).astype(coords.dtype)
+        translate = np.append(self._translate, 0).astype(coords.dtype)
+        np.subtract(coords, translate[:n], out=out)
+        out /= scale[:n]
             
     @property
     def scale(self):
@@ -229,32 +441,149 @@ class STTransform(Transform):
         return "<STTransform scale=%s translate=%s>" % (self.scale, self.translate)
 
 class AffineTransform(Transform):
-    def __init__(self):
-        self.matrix = np.eye(4)
-        self.inverse = None
-        Transform.__init__(self, """
-            #version 120
-
-            uniform mat4 transform;
+    """ Transform performing an affine transformation with a 4x4 matrix
+    (applied to column vectors).
+    """
+    source = """
+        #version 120
 
-            vec4 global_transform(vec4 pos) {
-                return transform * pos;
-            }
-            """)
+        vec4 AffineTransform_map(vec4 pos, mat4 matrix) {
+            return matrix * pos;
+        }
+        """
+    function = 'AffineTransform_map'
+    arguments = [
+        ('uniform', 'mat4', 'matrix'),
+        ]
+    
+    def __init__(self, matrix=None):
+        super(AffineTransform, self).__init__()
+        self.matrix = np.eye(4) if matrix is None else matrix
+    
+    @property
+    def matrix(self):
+        return self._matrix
     
-    def map(self, coords):
-        return np.dot(self.matrix, coords)
+    @matrix.setter
+    def matrix(self, m):
+        self._matrix = np.array(m, dtype=np.float64).reshape(4, 4)
+        self._inverse = None
     
-    def imap(self, coords):
-        if self.inverse is None:
-            self.inverse = np.linalg.invert(self.matrix)
-        return np.dot(self.inverse, coords)
+    @property
+    def inverse(self):
+        if self._inverse is None:
+            self._inverse = np.linalg.inv(self._matrix)
+        return self._inverse
+    
+    def _apply(self, matrix, coords, out):
+        # matrix * pos, with the missing components of pos being 0 
+        # (and w=1), and only the first n components of the result
+        n = coords.shape[-1]
+        matrix = matrix.astype(coords.dtype)
+        np.matmul(coords, matrix[:n, :n].T, out=out)
+        if n < 4:
+            out += matrix[:n, 3]
+    
+    def _map(self, coords, out):
+        self._apply(self._matrix, coords, out)
+    
+    def _imap(self, coords, out):
+        self._apply(self.inverse, coords, out)
+    
+    def scale(self, s):
+        """ Scale the result of this transform by s (up to 3 values).
+        """
+        m = np.eye(4)
+        m[range(len(s)), range(len(s))] = s
+        self.matrix = np.dot(m, self._matrix)
+    
+    def translate(self, t):
+        """ Translate the result of this transform by t (up to 3 values).
+        """
+        m = np.eye(4)
+        m[:len(t), 3] = t
+        self.matrix = np.dot(m, self._matrix)
+            
+    def _apply_variables(self, program):
+        # Send uniforms to currently-enabled program, if any.
+        # (GLSL matrices are column-major, so transpose)
+        program.uniforms[self._arg_map['matrix']] = self._matrix.T
+    
+    def __mul__(self, tr):
+        if isinstance(tr, AffineTransform):
+            return AffineTransform(np.dot(self._matrix, tr.matrix))
+        elif isinstance(tr, STTransform):
+            return self * tr.as_affine()
+        else:
+            return NotImplemented
+            
+    def __repr__(self):
+        return "<AffineTransform matrix=%s>" % (self.matrix.tolist())
+
 
+# Transforms that can be fused by collapse_transforms()
+LINEAR_TRANSFORMS = (STTransform, AffineTransform)
 
-class SRTTransform(Transform):
-    """ Transform performing scale, rotate, and translate
+
+class SRTTransform(AffineTransform):
+    """ Transform performing scale, rotate (around the z axis, in 
+    degrees), and translate, in that order. In the shader, this is an
+    AffineTransform.
     """
     
+    def __init__(self, scale=None, angle=0.0, translate=None):
+        self._scale = np.ones(3)
+        self._angle = 0.0
+        self._translate = np.zeros(3)
+        super(SRTTransform, self).__init__()
+        if scale is not None:
+            self._scale[:len(scale)] = scale
+        if translate is not None:
+            self._translate[:len(translate)] = translate
+        self.angle = angle
+    
+    def _update_matrix(self):
+        c, s = np.cos(np.radians(self._angle)), np.sin(np.radians(self._angle))
+        m = np.eye(4)
+        m[:2, :2] = [[c, -s], [s, c]]
+        m[:3, :3] *= self._scale  # scale first (i.e. the columns)
+        m[:3, 3] = self._translate
+        self.matrix = m
+    
+    @property
+    def scale(self):
+        return self._scale.copy()
+    
+    @scale.setter
+    def scale(self, s):
+        self._scale[:len(s)] = s
+        self._scale[len(s):] = 1.0
+        self._update_matrix()
+    
+    @property
+    def angle(self):
+        return self._angle
+    
+    @angle.setter
+    def angle(self, a):
+        self._angle = float(a)
+        self._update_matrix()
+    
+    @property
+    def translate(self):
+        return self._translate.copy()
+    
+    @translate.setter
+    def translate(self, t):
+        self._translate[:len(t)] = t
+        self._translate[len(t):] = 0.0
+        self._update_matrix()
+    
+    def __repr__(self):
+        return "<SRTTransform scale=%s angle=%s translate=%s>" % (
+            self.scale, self.angle, self.translate)
+
+    
 class ProjectionTransform(Transform):
     @classmethod
     def frustum(cls, l, r, t, b, n, f):
@@ -287,25 +616,22 @@ class LogTransform(Transform):
         self._base = np.zeros(3, dtype=np.float32)
         self.base = (0.0, 0.0, 0.0) if base is None else base
         
-    def map(self, coords):
-        ret = np.empty(coords.shape, coords.dtype)
-        base = self.base
-        for i in range(ret.shape[-1]):
-            if base[i] > 1.0:
-                ret[...,i] = np.log(coords[...,i]) / np.log(base[i])
+    def _map(self, coords, out):
+        base = self._base.astype(coords.dtype)
+        for i in range(coords.shape[-1]):
+            if i < 3 and base[i] > 1.0:
+                np.log(coords[...,i], out=out[...,i])
+                out[...,i] /= np.log(base[i])
             else:
-                ret[...,i] = coords[...,i]
-        return ret
-    
-    def imap(self, coords):
-        ret = np.empty(coords.shape, coords.dtype)
-        base = self.base
-        for i in range(ret.shape[-1]):
-            if base[i] > 1.0:
-                ret[...,i] = base[i] ** coords[...,i]
+                out[...,i] = coords[...,i]
+    
+    def _imap(self, coords, out):
+        base = self._base.astype(coords.dtype)
+        for i in range(coords.shape[-1]):
+            if i < 3 and base[i] > 1.0:
+                np.power(base[i], coords[...,i], out=out[...,i])
             else:
-                ret[...,i] = coords[...,i]
-        return ret
+                out[...,i] = coords[...,i]
             
     @property
     def base(self):
@@ -324,7 +650,35 @@ class LogTransform(Transform):
         return "<LogTransform base=%s>" % (self.base)
 
 class PolarTransform(Transform):
-    pass
+    """ Transform from polar coordinates (x=angle in radians, y=radius) 
+    to cartesian coordinates. Other components are unchanged.
+    """
+    source = """
+        #version 120
+
+        vec4 PolarTransform_map(vec4 pos) {
+            return vec4(pos.y * cos(pos.x), pos.y * sin(pos.x), pos.z, pos.w);
+        }
+        """
+    function = 'PolarTransform_map'
+    
+    def _map(self, coords, out):
+        if coords.shape[-1] < 2:
+            raise ValueError('PolarTransform needs at least 2 components.')
+        theta, r = coords[...,0].copy(), coords[...,1].copy()
+        out[...,2:] = coords[...,2:]
+        np.cos(theta, out=out[...,0])
+        out[...,0] *= r
+        np.sin(theta, out=out[...,1])
+        out[...,1] *= r
+    
+    def _imap(self, coords, out):
+        if coords.shape[-1] < 2:
+            raise ValueError('PolarTransform needs at least 2 components.')
+        x, y = coords[...,0].copy(), coords[...,1].copy()
+        out[...,2:] = coords[...,2:]
+        np.arctan2(y, x, out=out[...,0])
+        np.hypot(x, y, out=out[...,1])
 
 class BilinearTransform(Transform):
     pass
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2013, Vispy Development Team.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+"""
+Simple disk cache for binary data (e.g. compressed textures) that is
+expensive to compute and can be reused between sessions.
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import os
+import hashlib
+import tempfile
+
+
+def get_cache_dir():
+    """ Get the root directory for vispy's cache. Can be set using the
+    VISPY_CACHE_DIR environment variable; defaults to ~/.vispy/cache.
+    """
+    path = os.environ.get('VISPY_CACHE_DIR', '')
+    if not path:
+        path = os.path.join(os.path.expanduser('~'), '.vispy', 'cache')
+    return path
+
+
+def hash_key(*parts):
+    """ Create a key from the given parts (strings, bytes, or objects
+    that support the buffer interface, such as numpy arrays).
+    """
+    h = hashlib.sha1()
+    for part in parts:
+        if hasattr(part, 'encode') and not isinstance(part, bytes):
+            part = part.encode('utf-8')
+        elif not isinstance(part, bytes):
+            part = memoryview(part).tobytes()
+        h.update(part)
+        h.update(b'\x00')
+    return h.hexdigest()
+
+
+class DiskCache(object):
+    """ A directory of binary blobs, keyed by (hex) strings.
+
+    Failing to read or write the cache is never an error: get() then
+    returns None, and set() returns False.
+
+    Parameters
+    ----------
+    name : str
+        The name of the subdirectory in the cache directory.
+    path : str or None
+        The directory to use. If given, name is ignored.
+    """
+
+    def __init__(self, name, path=None):
+        if path is None:
+            path = os.path.join(get_cache_dir(), name)
+        self._path = path
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def path(self):
+        """ The directory that contains the cached data. """
+        return self._path
+
+    @property
+    def stats(self):
+        """ A dict with the number of hits and misses. """
+        return {'hits': self._hits, 'misses': self._misses}
+
+    def _filename(self, key):
+        return os.path.join(self._path, key + '.bin')
+
+    def get(self, key):
+        """ Get the data (as bytes) for the given key, or None.
+        """
+        try:
+            with open(self._filename(key), 'rb') as f:
+                data = f.read()
+        except (IOError, OSError):
+            self._misses += 1
+            return None
+        self._hits += 1
+        return data
+
+    def set(self, key, data):
+        """ Store data (bytes or array) for the given key. The file is
+        written atomically, so that concurrent readers never see a
+        partially written file. Returns whether the data was stored.
+        """
+        if not isinstance(data, bytes):
+            data = memoryview(data).tobytes()
+        try:
+            if not os.path.isdir(self._path):
+                os.makedirs(self._path)
+            fd, tmpname = tempfile.mkstemp(dir=self._path, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            filename = self._filename(key)
+            if os.path.exists(filename) and os.name == 'nt':
+                os.remove(filename)
+            os.rename(tmpname, filename)
+        except (IOError, OSError):
+            return False
+        return True
+
+    def remove(self, key):
+        """ Remove the data for the given key (if present).
+        """
+        try:
+            os.remove(self._filename(key))
+        except (IOError, OSError):
+            pass
+
+    def clear(self):
+        """ Remove all data from this cache.
+        """
+        if not os.path.isdir(self._path):
+            return
+        for fname in os.listdir(self._path):
+            if fname.endswith('.bin'):
+                try:
+                    os.remove(os.path.join(self._path, fname))
+                except (IOError, OSError):
+                    pass
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2013, Vispy Development Team.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+""" Model, view and projection matrices with cached products.
+
+A MatrixNode is a matrix in a hierarchy (e.g. of the objects in a scene).
+Its world matrix is the product of its own matrix and that of all its
+ancestors, and is only recomputed when one of these changes, which is
+tracked with version counters. A MatrixStack holds the model, view and
+projection for drawing and caches the modelview, model-view-projection
+and normal matrices in the same way. It can set these as uniforms of a
+Program (or UniformGroup), only when they changed.
+
+The matrices are for row vectors (v' = v * M), like those of
+vispy.util.transforms, so the world matrix of a node is
+``node.matrix * parent.world``.
+
+Example::
+
+    stack = MatrixStack(projection=perspective(45.0, 1.0, 2.0, 10.0))
+    translate(stack.view.matrix, 0, 0, -5)
+    stack.view.changed()
+    arm = MatrixNode(parent=stack.model)
+    ...
+    # Paint event handler
+    stack.model = arm  # Or stack.push(...) and stack.pop()
+    stack.apply(program, mvp='u_mvp', normal='u_normal')
+
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import weakref
+import itertools
+
+import numpy as np
+
+
+# Unique numbers for the nodes, to use in cache keys (unlike id(), a
+# number is never reused for a new node after a node is freed)
+_node_uids = itertools.count(1)
+
+
+class MatrixNode(object):
+    """ A 4x4 matrix in a hierarchy, with a cached world matrix.
+
+    Parameters
+    ----------
+    matrix : array (4, 4), optional
+        The matrix of this node. Default identity.
+    parent : MatrixNode, optional
+        The parent node.
+
+    Notes
+    -----
+    When modifying the matrix in place (e.g. with the functions in
+    vispy.util.transforms), call changed() afterwards.
+    """
+
+    def __init__(self, matrix=None, parent=None):
+        self._matrix = np.eye(4, dtype=np.float32)
+        if matrix is not None:
+            self._matrix[...] = matrix
+        self._parent = parent
+        self._version = 0
+        self._uid = next(_node_uids)
+        # The world matrix, the key of the inputs it was computed for,
+        # and a counter that is increased when it is recomputed
+        self._world = np.eye(4, dtype=np.float32)
+        self._world_key = None
+        self._world_version = 0
+
+
+    @property
+    def matrix(self):
+        """ The matrix of this node (relative to its parent).
+        """
+        return self._matrix
+
+
+    @matrix.setter
+    def matrix(self, matrix):
+        self._matrix[...] = matrix
+        self._version += 1
+
+
+    @property
+    def parent(self):
+        """ The parent node, or None.
+        """
+        return self._parent
+
+
+    @parent.setter
+    def parent(self, parent):
+        self._parent = parent
+        self._version += 1
+
+
+    def changed(self):
+        """ Mark the matrix as changed, after modifying it in place.
+        """
+        self._version += 1
+
+
+    @property
+    def world(self):
+        """ The product of the matrix of this node and those of its
+        ancestors. Only recomputed if one of these changed.
+        """
+        self._update_world()
+        return self._world
+
+
+    @property
+    def world_version(self):
+        """ Counter that is increased each time the world matrix
+        changes.
+        """
+        self._update_world()
+        return self._world_version
+
+
+    def _update_world(self):
+        parent = self._parent
+        if parent is None:
+            key = self._version, None, 0
+        else:
+            key = self._version, parent._uid, parent.world_version
+        if key != self._world_key:
+            if parent is None:
+                self._world[...] = self._matrix
+            else:
+                np.dot(self._matrix, parent._world, out=self._world)
+            self._world_key = key
+            self._world_version += 1
+
+
+
+class MatrixStack(object):
+    """ The model, view and projection matrices for drawing, with cached
+    products.
+
+    Parameters
+    ----------
+    model, view, projection : array (4, 4) or MatrixNode, optional
+        The initial matrices. Default identity.
+
+    The model, view and projection properties are MatrixNode objects.
+    Setting them with an array sets the matrix of the current node.
+    """
+
+    def __init__(self, model=None, view=None, projection=None):
+        self._model = self._view = self._projection = None
+        self.model = model
+        self.view = view
+        self.projection = projection
+        self._stack = []
+        # Cached products: name -> (key, matrix)
+        self._cache = {}
+        # Target (e.g. Program) -> key of the values last applied to it
+        self._applied = weakref.WeakKeyDictionary()
+
+
+    def _as_node(self, node, matrix):
+        if isinstance(matrix, MatrixNode):
+            return matrix
+        elif node is None:
+            return MatrixNode(matrix)
+        elif matrix is not None:
+            node.matrix = matrix
+        return node
+
+
+    @property
+    def model(self):
+        """ The node of the model matrix. Its world matrix is used.
+        """
+        return self._model
+
+
+    @model.setter
+    def model(self, model):
+        self._model = self._as_node(self._model, model)
+
+
+    @property
+    def view(self):
+        """ The node of the view matrix.
+        """
+        return self._view
+
+
+    @view.setter
+    def view(self, view):
+        self._view = self._as_node(self._view, view)
+
+
+    @property
+    def projection(self):
+        """ The node of the projection matrix.
+        """
+        return self._projection
+
+
+    @projection.setter
+    def projection(self, projection):
+        self._projection = self._as_node(self._projection, projection)
+
+
+    def push(self, matrix=None):
+        """ Make a new model node, with the given matrix, that is a child
+        of the current model node. Returns the new node. In a hierarchy
+        that is drawn each frame, it is more efficient to keep the nodes
+        and set them as model, since their world matrices are cached.
+        """
+        self._stack.append(self._model)
+        self._model = MatrixNode(matrix, parent=self._model)
+        return self._model
+
+
+    def pop(self):
+        """ Go back to the model node before the last push().
+        """
+        if not self._stack:
+            raise IndexError('MatrixStack.pop() without push().')
+        self._model = self._stack.pop()
+
+
+    @property
+    def key(self):
+        """ A tuple that changes when any of the matrices changes.
+        """
+        return (self._model._uid, self._model.world_version,
+                self._view._uid, self._view.world_version,
+                self._projection._uid, self._projection.world_version)
+
+
+    def _cached(self, name, key, compute):
+        try:
+            cached_key, matrix = self._cache[name]
+        except KeyError:
+            cached_key, matrix = None, None
+        if cached_key != key:
+            matrix = compute(matrix)
+            self._cache[name] = key, matrix
+        return matrix
+
+
+    @property
+    def modelview(self):
+        """ The product of the model and view matrices.
+        """
+        key = self.key[:4]
+        def compute(out):
+            if out is None:
+                out = np.empty((4, 4), np.float32)
+            return np.dot(self._model.world, self._view.world, out=out)
+        return self._cached('modelview', key, compute)
+
+
+    @property
+    def mvp(self):
+        """ The product of the model, view and projection matrices.
+        """
+        key = self.key
+        def compute(out):
+            if out is None:
+                out = np.empty((4, 4), np.float32)
+            return np.dot(self.modelview, self._projection.world, out=out)
+        return self._cached('mvp', key, compute)
+
+
+    @property
+    def normal(self):
+        """ The 3x3 matrix to transform normals with (the inverse
+        transpose of the upper-left 3x3 of the modelview matrix).
+        """
+        key = self.key[:4]
+        def compute(out):
+            m = np.linalg.inv(self.modelview[:3, :3]).T
+            return m.astype(np.float32)
+        return self._cached('normal', key, compute)
+
+
+    def apply(self, target, model=None, view=None, projection=None,
+              modelview=None, mvp=None, normal=None):
+        """ Set the matrices as uniforms of the target (a Program or
+        UniformGroup), for each of the given uniform names. Does nothing
+        if the matrices did not change since the last call for this
+        target (with the same names).
+        """
+        names = dict(model=model, view=view, projection=projection,
+                     modelview=modelview, mvp=mvp, normal=normal)
+        key = self.key, tuple(sorted(names.items()))
+        if self._applied.get(target, None) == key:
+            return
+        for attr in ('model', 'view', 'projection'):
+            if names[attr]:
+                target[names[attr]] = getattr(self, attr).world
+        for attr in ('modelview', 'mvp', 'normal'):
+            if names[attr]:
+                target[names[attr]] = getattr(self, attr)
+        self._applied[target] = key
@@ -0,0 +1,99 @@
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team
+# All rights reserved.
+# -----------------------------------------------------------------------------
+import math
+import unittest
+import numpy as np
+
+from vispy.util import transforms as tr
+
+
+# Reference: compose with the full matrix, as in the original functions
+def ref_rotate(M, angle, x, y, z):
+    angle = math.pi*angle/180
+    c, s = math.cos(angle), math.sin(angle)
+    n = math.sqrt(x*x+y*y+z*z)
+    x, y, z = x/n, y/n, z/n
+    cx, cy, cz = (1-c)*x, (1-c)*y, (1-c)*z
+    R = np.array([[ cx*x + c  , cy*x - z*s, cz*x + y*s, 0],
+                  [ cx*y + z*s, cy*y + c  , cz*y - x*s, 0],
+                  [ cx*z - y*s, cy*z + x*s, cz*z + c,   0],
+                  [          0,          0,        0,   1]]).T
+    return np.dot(M, R)
+
+
+def ref_translate(M, x, y, z):
+    T = np.eye(4)
+    T[3, :3] = x, y, z
+    return np.dot(M, T)
+
+
+def ref_scale(M, x, y, z):
+    return np.dot(M, np.diag([x, y, z, 1]))
+
+
+# -----------------------------------------------------------------------------
+class TransformsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.M = np.random.normal(size=(4, 4)).astype(np.float32)
+
+    def test_in_place(self):
+        for func, ref, args in [
+                (tr.translate, ref_translate, (1, 2, 3)),
+                (tr.scale, ref_scale, (2, 3, 4)),
+                (tr.rotate, ref_rotate, (30, 1, 2, 3)),
+                # (these rotate in the opposite direction as rotate())
+                (tr.xrotate, ref_rotate, (-30, 1, 0, 0)),
+                (tr.yrotate, ref_rotate, (-30, 0, 1, 0)),
+                (tr.zrotate, ref_rotate, (-30, 0, 0, 1))]:
+            M = self.M.copy()
+            expected = ref(M, *args)
+            data = M.__array_interface__['data'][0]
+            if func in (tr.xrotate, tr.yrotate, tr.zrotate):
+                func(M, -args[0])
+            else:
+                func(M, *args)
+            assert M.__array_interface__['data'][0] == data
+            assert M.dtype == np.float32
+            assert np.allclose(M, expected, atol=1e-5), func
+
+    def test_translate_scale_default(self):
+        M = self.M.copy()
+        tr.translate(M, 2)
+        assert np.allclose(M, ref_translate(self.M, 2, 2, 2))
+        M = self.M.copy()
+        tr.scale(M, 2)
+        assert np.allclose(M, ref_scale(self.M, 2, 2, 2))
+
+    def test_batched(self):
+        N = 20
+        t = np.random.normal(size=(N, 3))
+        s = np.random.uniform(0.5, 2, (N, 3))
+        a = np.random.uniform(0, 360, N)
+        axis = np.random.normal(size=(N, 3))
+        out = np.empty((N, 4, 4), np.float32)
+        result = tr.model_matrices(t, s, a, axis, out=out)
+        assert result is out
+        for i in range(N):
+            M = np.eye(4, dtype=np.float32)
+            tr.scale(M, *s[i])
+            tr.rotate(M, a[i], *axis[i])
+            tr.translate(M, *t[i])
+            assert np.allclose(out[i], M, atol=1e-5)
+        # Separate parts
+        assert np.allclose(tr.translation_matrices(t)[3, 3, :3], t[3])
+        assert np.allclose(tr.scale_matrices(s[:, 0])[2], 
+                           np.diag([s[2, 0]] * 3 + [1]))
+        M = np.eye(4)
+        tr.zrotate(M, -a[5])
+        assert np.allclose(tr.rotation_matrices(a)[5], M, atol=1e-6)
+        with self.assertRaises(ValueError):
+            tr.model_matrices(t, out=np.empty((N + 1, 4, 4)))
+        with self.assertRaises(ValueError):
+            tr.model_matrices()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+# -----------------------------------------------------------------------------
+# VisPy - Copyright (c) 2013, Vispy Development Team
+# All rights reserved.
+# -----------------------------------------------------------------------------
+import unittest
+import numpy as np
+
+from vispy.util.matrixstack import MatrixNode, MatrixStack
+from vispy.util.transforms import translate, rotate, scale, perspective
+
+
+class Target(object):
+    """ Records uniform assignments, like a Program.
+    """
+    def __init__(self):
+        self.count = 0
+        self.values = {}
+    def __setitem__(self, name, value):
+        self.count += 1
+        self.values[name] = np.array(value)
+
+
+# -----------------------------------------------------------------------------
+class MatrixNodeTest(unittest.TestCase):
+
+    def test_hierarchy(self):
+        root = MatrixNode()
+        translate(root.matrix, 1, 2, 3)
+        root.changed()
+        child = MatrixNode(parent=root)
+        scale(child.matrix, 2)
+        child.changed()
+        leaf = MatrixNode(np.eye(4), parent=child)
+        rotate(leaf.matrix, 30, 0, 0, 1)
+        leaf.changed()
+        expected = np.dot(np.dot(leaf.matrix, child.matrix), root.matrix)
+        assert np.allclose(leaf.world, expected)
+        # Not recomputed if nothing changed
+        version = leaf.world_version
+        leaf.world
+        assert leaf.world_version == version
+        # Changes of ancestors propagate
+        root.matrix = np.eye(4)
+        assert leaf.world_version == version + 1
+        assert np.allclose(leaf.world, np.dot(leaf.matrix, child.matrix))
+        leaf.parent = None
+        assert np.allclose(leaf.world, leaf.matrix)
+
+
+# -----------------------------------------------------------------------------
+class MatrixStackTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stack = MatrixStack(projection=perspective(45, 1, 2, 10))
+        translate(self.stack.view.matrix, 0, 0, -5)
+        self.stack.view.changed()
+
+    def test_products(self):
+        stack = self.stack
+        stack.model = np.diag([1, 2, 3, 1])
+        model = stack.model.world
+        mv = np.dot(model, stack.view.world)
+        assert np.allclose(stack.modelview, mv)
+        assert np.allclose(stack.mvp, np.dot(mv, stack.projection.world))
+        assert np.allclose(stack.normal, np.linalg.inv(mv[:3, :3]).T)
+        # Cached
+        mvp = stack.mvp
+        assert stack.mvp is mvp
+        stack.projection = np.eye(4)
+        assert np.allclose(stack.mvp, mv)
+
+    def test_push_pop(self):
+        stack = self.stack
+        base = stack.model
+        node = stack.push(np.diag([2, 2, 2, 1]))
+        assert node.parent is base
+        stack.push(np.diag([3, 3, 3, 1]))
+        assert np.allclose(stack.model.world, np.diag([6, 6, 6, 1]))
+        stack.pop()
+        assert stack.model is node
+        stack.pop()
+        with self.assertRaises(IndexError):
+            stack.pop()
+
+    def test_push_pop_push(self):
+        # The node of the second push may get the id() of the first
+        stack = self.stack
+        for x in (1, 2, 3):
+            matrix = np.eye(4, dtype=np.float32)
+            translate(matrix, x, 0, 0)
+            stack.push(matrix)
+            modelview = np.dot(matrix, stack.view.matrix)
+            mvp = np.dot(modelview, stack.projection.matrix)
+            assert np.allclose(stack.modelview, modelview)
+            assert np.allclose(stack.mvp, mvp)
+            stack.pop()
+
+    def test_apply(self):
+        stack = self.stack
+        target = Target()
+        stack.apply(target, mvp='u_mvp', normal='u_normal', view='u_view')
+        assert sorted(target.values) == ['u_mvp', 'u_normal', 'u_view']
+        assert target.count == 3
+        assert np.allclose(target.values['u_mvp'], stack.mvp)
+        # Nothing changed: nothing set
+        stack.apply(target, mvp='u_mvp', normal='u_normal', view='u_view')
+        assert target.count == 3
+        stack.model.matrix = np.diag([2, 2, 2, 1])
+        stack.apply(target, mvp='u_mvp', normal='u_normal', view='u_view')
+        assert target.count == 6
+        assert np.allclose(target.values['u_mvp'], stack.mvp)
+
+
+if __name__ == "__main__":
+    unittest.main()
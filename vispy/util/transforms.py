@@ -2,6 +2,14 @@
 # -*- coding: utf-8 -*-
 """
 Very simple transformation library that is needed for some examples.
+
+The matrices are for row vectors (i.e. v' = v * M), so that they can be
+uploaded to a (column-major) GLSL mat4 as they are. The functions that 
+modify a matrix M do so in place, without allocating new arrays (they 
+use scratch arrays and are therefore not thread-safe). The functions 
+that end with "_matrices" build (N, 4, 4) arrays with one matrix per
+object in a single vectorized call, e.g. for instanced attributes or 
+uniform arrays.
 """
 
 import math
@@ -9,6 +17,31 @@ import numpy
 import numpy as np
 
 
+# Scratch matrices per dtype: dtype -> {name: matrix}. Each function
+# only sets the elements it needs in "its" matrix (the others keep their
+# identity value), and multiplies into "result".
+_scratch = {}
+
+
+def _get_scratch(dtype, name):
+    try:
+        matrices = _scratch[dtype]
+    except KeyError:
+        matrices = _scratch[dtype] = {'result': np.empty((4, 4), dtype)}
+    try:
+        return matrices[name], matrices['result']
+    except KeyError:
+        matrices[name] = np.eye(4, dtype=dtype)
+        return matrices[name], matrices['result']
+
+
+def _compose(M, R, result):
+    """ M = M * R, in place.
+    """
+    np.dot(M, R, out=result)
+    M[...] = result
+
+
 def translate(M, x, y=None, z=None):
     """
     translate produces a translation by (x, y, z) . 
@@ -20,12 +53,9 @@ def translate(M, x, y=None, z=None):
     """
     if y is None: y = x
     if z is None: z = x
-    T = [[ 1, 0, 0, x],
-         [ 0, 1, 0, y],
-         [ 0, 0, 1, z],
-         [ 0, 0, 0, 1]]
-    T = np.array(T, dtype=np.float32).T
-    M[...] = np.dot(M,T)
+    T, result = _get_scratch(M.dtype, 'translate')
+    T[3, 0], T[3, 1], T[3, 2] = x, y, z
+    _compose(M, T, result)
 
 
 def scale(M, x, y=None, z=None):
@@ -40,46 +70,37 @@ def scale(M, x, y=None, z=None):
     """
     if y is None: y = x
     if z is None: z = x
-    S = [[ x, 0, 0, 0],
-         [ 0, y, 0, 0],
-         [ 0, 0, z, 0],
-         [ 0, 0, 0, 1]]
-    S = np.array(S,dtype=np.float32).T
-    M[...] = np.dot(M,S)
+    S, result = _get_scratch(M.dtype, 'scale')
+    S[0, 0], S[1, 1], S[2, 2] = x, y, z
+    _compose(M, S, result)
 
 
 def xrotate(M,theta):
     t = math.pi*theta/180
     cosT = math.cos( t )
     sinT = math.sin( t )
-    R = numpy.array(
-        [[ 1.0,  0.0,  0.0, 0.0 ],
-         [ 0.0, cosT,-sinT, 0.0 ],
-         [ 0.0, sinT, cosT, 0.0 ],
-         [ 0.0,  0.0,  0.0, 1.0 ]], dtype=np.float32)
-    M[...] = np.dot(M,R)
+    R, result = _get_scratch(M.dtype, 'xrotate')
+    R[1, 1], R[1, 2] = cosT, -sinT
+    R[2, 1], R[2, 2] = sinT, cosT
+    _compose(M, R, result)
 
 def yrotate(M,theta):
     t = math.pi*theta/180
     cosT = math.cos( t )
     sinT = math.sin( t )
-    R = numpy.array(
-        [[ cosT,  0.0, sinT, 0.0 ],
-         [ 0.0,   1.0,  0.0, 0.0 ],
-         [-sinT,  0.0, cosT, 0.0 ],
-         [ 0.0,  0.0,  0.0, 1.0 ]], dtype=np.float32)
-    M[...] = np.dot(M,R)
+    R, result = _get_scratch(M.dtype, 'yrotate')
+    R[0, 0], R[0, 2] = cosT, sinT
+    R[2, 0], R[2, 2] = -sinT, cosT
+    _compose(M, R, result)
 
 def zrotate(M,theta):
     t = math.pi*theta/180
     cosT = math.cos( t )
     sinT = math.sin( t )
-    R = numpy.array(
-        [[ cosT,-sinT, 0.0, 0.0 ],
-         [ sinT, cosT, 0.0, 0.0 ],
-         [ 0.0,  0.0,  1.0, 0.0 ],
-         [ 0.0,  0.0,  0.0, 1.0 ]], dtype=np.float32)
-    M[...] = np.dot(M,R)
+    R, result = _get_scratch(M.dtype, 'zrotate')
+    R[0, 0], R[0, 1] = cosT, -sinT
+    R[1, 0], R[1, 1] = sinT, cosT
+    _compose(M, R, result)
 
 
 def rotate(M, angle, x, y, z, point=None):
@@ -104,11 +125,15 @@ def rotate(M, angle, x, y, z, point=None):
     y /= n
     z /= n
     cx,cy,cz = (1-c)*x, (1-c)*y, (1-c)*z
-    R = numpy.array([[ cx*x + c  , cy*x - z*s, cz*x + y*s, 0],
-                     [ cx*y + z*s, cy*y + c  , cz*y - x*s, 0],
-                     [ cx*z - y*s, cy*z + x*s, cz*z + c,   0],
-                     [          0,          0,        0,   1]]).T
-    M[...] = np.dot(M,R)
+    # R is the transpose of [[ cx*x + c  , cy*x - z*s, cz*x + y*s, 0],
+    #                        [ cx*y + z*s, cy*y + c  , cz*y - x*s, 0],
+    #                        [ cx*z - y*s, cy*z + x*s, cz*z + c,   0],
+    #                        [          0,          0,        0,   1]]
+    R, result = _get_scratch(M.dtype, 'rotate')
+    R[0, 0], R[1, 0], R[2, 0] = cx*x + c  , cy*x - z*s, cz*x + y*s
+    R[0, 1], R[1, 1], R[2, 1] = cx*y + z*s, cy*y + c  , cz*y - x*s
+    R[0, 2], R[1, 2], R[2, 2] = cx*z - y*s, cy*z + x*s, cz*z + c
+    _compose(M, R, result)
 
 
 def ortho( left, right, bottom, top, znear, zfar ):
@@ -146,3 +171,127 @@ def perspective(fovy, aspect, znear, zfar):
     h = np.tan(fovy / 360.0 * np.pi) * znear
     w = h * aspect
     return frustum( -w, w, -h, h, znear, zfar )
+
+
+
+def _identity_matrices(n, out, dtype=np.float32):
+    """ Get an (n, 4, 4) array of identity matrices, in out if given.
+    """
+    if out is None:
+        out = np.zeros((n, 4, 4), dtype)
+    elif out.shape != (n, 4, 4):
+        raise ValueError('out must have shape (%d, 4, 4).' % n)
+    else:
+        out[...] = 0
+    for i in range(4):
+        out[:, i, i] = 1
+    return out
+
+
+def translation_matrices(t, out=None):
+    """
+    Build one translation matrix for each row of t.
+    
+    Parameters
+    ----------
+    t : array (N, 3)
+        The x, y and z translation for each of the N matrices.
+    out : array (N, 4, 4), optional
+        The array to store the matrices in. By default a new float32 
+        array is created.
+    """
+    t = np.asarray(t)
+    out = _identity_matrices(len(t), out)
+    out[:, 3, :3] = t
+    return out
+
+
+def scale_matrices(s, out=None):
+    """
+    Build one scale matrix for each row of s.
+    
+    Parameters
+    ----------
+    s : array (N, 3) or (N,)
+        The x, y and z scale factors for each of the N matrices, or a 
+        single (uniform) scale factor for each.
+    out : array (N, 4, 4), optional
+        The array to store the matrices in. By default a new float32 
+        array is created.
+    """
+    s = np.asarray(s)
+    out = _identity_matrices(len(s), out)
+    for i in range(3):
+        out[:, i, i] = s if s.ndim == 1 else s[:, i]
+    return out
+
+
+def rotation_matrices(angle, axis=(0, 0, 1), out=None):
+    """
+    Build one rotation matrix for each of the given angles. The matrices
+    are the same as those of rotate().
+    
+    Parameters
+    ----------
+    angle : array (N,)
+        The angle of rotation for each of the N matrices, in degrees.
+    axis : array (3,) or (N, 3)
+        The vector to rotate around (normalized by this function).
+    out : array (N, 4, 4), optional
+        The array to store the matrices in. By default a new float32 
+        array is created.
+    """
+    angle = np.radians(np.asarray(angle, np.float64))
+    axis = np.asarray(axis, np.float64)
+    axis = axis / np.sqrt((axis * axis).sum(-1))[..., np.newaxis]
+    x, y, z = [np.broadcast_to(axis[..., i], angle.shape) for i in range(3)]
+    c, s = np.cos(angle), np.sin(angle)
+    cx, cy, cz = (1-c)*x, (1-c)*y, (1-c)*z
+    out = _identity_matrices(len(angle), out)
+    out[:, 0, 0], out[:, 1, 0], out[:, 2, 0] = cx*x + c  , cy*x - z*s, cz*x + y*s
+    out[:, 0, 1], out[:, 1, 1], out[:, 2, 1] = cx*y + z*s, cy*y + c  , cz*y - x*s
+    out[:, 0, 2], out[:, 1, 2], out[:, 2, 2] = cx*z - y*s, cy*z + x*s, cz*z + c
+    return out
+
+
+def model_matrices(translate=None, scale=None, angle=None, axis=(0, 0, 1), 
+                   out=None):
+    """
+    Build one model matrix for each of N objects, that first scales, then
+    rotates and then translates. The result is the same as calling 
+    scale(), rotate() and translate() (in that order) on an identity 
+    matrix for each object.
+    
+    Parameters
+    ----------
+    translate : array (N, 3), optional
+        The translation of each object.
+    scale : array (N, 3) or (N,), optional
+        The scale factors of each object.
+    angle : array (N,), optional
+        The rotation of each object, in degrees.
+    axis : array (3,) or (N, 3)
+        The vector to rotate around.
+    out : array (N, 4, 4), optional
+        The array to store the matrices in. By default a new float32 
+        array is created.
+    """
+    given = [a for a in (translate, scale, angle) if a is not None]
+    if not given:
+        raise ValueError('Need at least one of translate, scale and angle.')
+    n = len(given[0])
+    if angle is not None:
+        out = rotation_matrices(angle, axis, out)
+    else:
+        out = _identity_matrices(n, out)
+    if scale is not None:
+        # S * R: scale the rows
+        scale = np.asarray(scale)
+        if scale.ndim == 1:
+            out[:, :3, :3] *= scale[:, np.newaxis, np.newaxis]
+        else:
+            out[:, :3, :3] *= scale[:, :, np.newaxis]
+    if translate is not None:
+        # (S * R) * T: the last row is the translation
+        out[:, 3, :3] = translate
+    return out
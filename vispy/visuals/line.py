@@ -1,6 +1,7 @@
 from vispy.oogl import Program, VertexShader, FragmentShader, VertexBuffer, Texture2D
 import OpenGL.GL as gl
 import vispy.shaders.transforms as transforms
+from vispy.shaders.permutations import ShaderPermutations
 import numpy as np
 from .visual import Visual
 
@@ -245,6 +246,37 @@ void main(void)
     gl_FragColor = global_fragment_color(vert_color, position);
 }
 """)
+
+
+def _build_line_program(visual, mode, position, color, transform):
+    """ Build the LineVisual program for the given features.
+    """
+    if mode == 'fast':
+        main_vshader = line_vertex_shader
+        main_fshader = line_fragment_shader
+    else:
+        main_vshader = tri_vertex_shader
+        main_fshader = tri_fragment_shader
+    posShader = {'xy': XYPositionVertexShader, 
+                 'xyz': XYZPositionVertexShader,
+                 'texture': XYTexPositionVertexShader}[position]
+    colorShader = {'uniform': UniformColorVertexShader,
+                   'rgb': RGBColorVertexShader,
+                   'rgba': RGBAColorVertexShader}[color]
+    return Program([main_vshader, visual.transform_chain(), posShader, 
+                    colorShader],
+                   [main_fshader, NullColorFragmentShader])
+
+# The program variants of LineVisual. The transform feature is the 
+# signature of the transform chain (the types of the transforms). The
+# program is shared by the lines of a variant, so each line sets the
+# uniforms of its own transforms before drawing.
+line_programs = ShaderPermutations('line', _build_line_program,
+                                   mode=('fast', 'quality'),
+                                   position=('xy', 'xyz', 'texture'),
+                                   color=('uniform', 'rgb', 'rgba'),
+                                   transform=None)
+
         
 class LineVisual(Visual):
     def __init__(self, **kwds):
@@ -300,33 +332,29 @@ class LineVisual(Visual):
         self.indexes = VertexBuffer(data=np.arange(len(self._data)*2, dtype=np.float32))
 
     def _generate_program(self):
+        # Get the features of the program we need
         if self._opts['mode'] == 'fast':
-            main_vshader = line_vertex_shader
-            main_fshader = line_fragment_shader
+            features = {'mode': 'fast'}
             if self._opts['pos'].shape[-1] == 2:
-                posShader = XYPositionVertexShader
+                features['position'] = 'xy'
             else:
-                posShader = XYZPositionVertexShader
+                features['position'] = 'xyz'
         else:
-            main_vshader = tri_vertex_shader
-            main_fshader = tri_fragment_shader
-            posShader = XYTexPositionVertexShader
+            features = {'mode': 'quality', 'position': 'texture'}
         
         if isinstance(self._opts['color'], tuple):
-            colorShader = UniformColorVertexShader
+            features['color'] = 'uniform'
         elif self._opts['color'].shape[-1] == 3:
-            colorShader = RGBColorVertexShader
+            features['color'] = 'rgb'
         else:
-            colorShader = RGBAColorVertexShader
-            
-        self._program = ShaderProgram(
-            main_vshader, 
-            self.transform_chain(),
-            main_fshader,
-            posShader,
-            colorShader,
-            NullColorFragmentShader,
-            )
+            features['color'] = 'rgba'
+        
+        features['transform'] = tuple([type(tr) for tr in self.transforms])
+        
+        # Only builds (compiles and links) a program for a new variant
+        self._program = line_programs.get(features, self)
+        # The chain of our own transforms, to set their uniforms
+        self._transform_chain = self.transform_chain()
             
         #self._program._feedback_vars = ['position']
             
@@ -338,22 +366,7 @@ class LineVisual(Visual):
             self._generate_program()
         
         with self._program:
-            if self._opts['mode'] == 'fast':
-                self._program.attributes['in_position'] = self.vbo['pos']
-                if self._opts['pos'].shape[-1] == 2:
-                    self._program.uniforms['in_z_position'] = 1.0
-            else:
-                self._program.attributes['in_index'] = self.indexes
-                self._program.uniforms['in_position'] = self.ptex
-                self._program.uniforms['in_position_size'] = len(self._data)
-
-            if isinstance(self._opts['color'], tuple):
-                self._program.uniforms['in_color'] = self._opts['color']
-            elif self._opts['color'].shape[-1] == 3:
-                self._program.uniforms['in_alpha'] = 1.0;
-                self._program.attributes['in_color'] = self.vbo['color']
-            else:
-                self._program.attributes['in_color'] = self.vbo['color']
+            self._set_variables()
                 
             if self._opts['mode'] == 'fast':
                 #gl.glDrawArrays(gl.GL_LINE_STRIP, 0, self._data.size)
@@ -364,6 +377,24 @@ class LineVisual(Visual):
             
             fb = np.zeros((len(self._data), 4), dtype=np.float32)
             #self._program.feedback_arrays(fb, gl.GL_LINE_STRIP)
+    
+    def _set_variables(self):
+        # Set the uniforms and attributes of the (shared) program
+        self._transform_chain._apply_variables(self._program)
         
-        
+        if self._opts['mode'] == 'fast':
+            self._program.attributes['in_position'] = self.vbo['pos']
+            if self._opts['pos'].shape[-1] == 2:
+                self._program.uniforms['in_z_position'] = 1.0
+        else:
+            self._program.attributes['in_index'] = self.indexes
+            self._program.uniforms['in_position'] = self.ptex
+            self._program.uniforms['in_position_size'] = len(self._data)
 
+        if isinstance(self._opts['color'], tuple):
+            self._program.uniforms['in_color'] = self._opts['color']
+        elif self._opts['color'].shape[-1] == 3:
+            self._program.uniforms['in_alpha'] = 1.0;
+            self._program.attributes['in_color'] = self.vbo['color']
+        else:
+            self._program.attributes['in_color'] = self.vbo['color']